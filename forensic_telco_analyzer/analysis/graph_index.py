@@ -0,0 +1,253 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Bump whenever the layout of the cached .npz file changes
+INDEX_VERSION = 1
+
+
+class GraphIndex:
+    """Persistent CSR adjacency over dictionary-encoded phone numbers.
+
+    Numbers are mapped to dense integer codes; the call graph is a symmetric
+    CSR matrix of call counts between codes. Neighbourhood, common-contact
+    and shortest-path queries only touch the rows they need, so they stay
+    fast regardless of the size of the whole graph.
+    """
+
+    def __init__(self, nodes, adjacency):
+        self.nodes = np.asarray(nodes)
+        self.adjacency = adjacency.tocsr()
+        self._index = pd.Index(self.nodes)
+        self._numeric = self.nodes.dtype.kind in ('i', 'u')
+
+    @classmethod
+    def from_frame(cls, data, source_column='source_number', destination_column='destination_number'):
+        """Build an index from a frame with one row per call"""
+        # Imported here: network_analysis itself builds on GraphIndex
+        from forensic_telco_analyzer.analysis.network_analysis import encode_edges, edges_to_csr
+
+        nodes, lo, hi, weight = encode_edges(data, source_column, destination_column)
+        if nodes.dtype.kind not in ('i', 'u'):
+            # Fixed-width strings keep the binary cache free of pickled objects
+            nodes = nodes.astype(str)
+        return cls(nodes, edges_to_csr(len(nodes), lo, hi, weight))
+
+    @classmethod
+    def load(cls, correlated_file, use_cache=True, source_column='source_number',
+             destination_column='destination_number'):
+        """Load an index for a call CSV, reusing the binary cache when it is fresh"""
+        cache_file = cls.cache_path(correlated_file)
+        stat = os.stat(correlated_file)
+
+        if use_cache and os.path.exists(cache_file):
+            index = cls.load_cache(cache_file, expected_stat=stat)
+            if index is not None:
+                return index
+
+        calls = pd.read_csv(correlated_file, usecols=[source_column, destination_column])
+        index = cls.from_frame(calls, source_column, destination_column)
+
+        if use_cache:
+            try:
+                index.save_cache(cache_file, source_stat=stat)
+            except OSError as e:
+                print(f"Warning: Could not write graph index cache '{cache_file}': {e}")
+
+        return index
+
+    @staticmethod
+    def cache_path(correlated_file):
+        """Path of the binary index kept next to a call CSV"""
+        return f"{correlated_file}.graph.npz"
+
+    def save_cache(self, cache_file, source_stat=None):
+        """Write the index to an uncompressed .npz file"""
+        arrays = {
+            'version': np.array(INDEX_VERSION),
+            'nodes': self.nodes,
+            'indptr': self.adjacency.indptr,
+            'indices': self.adjacency.indices,
+            'weights': self.adjacency.data,
+        }
+        if source_stat is not None:
+            arrays['source_mtime_ns'] = np.array(source_stat.st_mtime_ns)
+            arrays['source_size'] = np.array(source_stat.st_size)
+
+        # Write to a temporary file first so readers never see a partial index
+        tmp_file = f"{cache_file}.tmp.npz"
+        np.savez(tmp_file, **arrays)
+        os.replace(tmp_file, cache_file)
+
+    @classmethod
+    def load_cache(cls, cache_file, expected_stat=None):
+        """Load an index from its binary cache, or None if it is stale"""
+        try:
+            with np.load(cache_file, allow_pickle=False) as cache:
+                if int(cache['version']) != INDEX_VERSION:
+                    return None
+                if expected_stat is not None:
+                    if 'source_mtime_ns' not in cache.files:
+                        return None
+                    if (int(cache['source_mtime_ns']) != expected_stat.st_mtime_ns or
+                            int(cache['source_size']) != expected_stat.st_size):
+                        return None
+
+                nodes = cache['nodes']
+                adjacency = sparse.csr_matrix((cache['weights'], cache['indices'], cache['indptr']),
+                                              shape=(len(nodes), len(nodes)))
+                return cls(nodes, adjacency)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable graph index cache '{cache_file}': {e}")
+            return None
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, number):
+        return self.code(number) is not None
+
+    def code(self, number):
+        """Dense code of a phone number, or None if it never appears in the graph"""
+        candidates = [number]
+        if self._numeric:
+            try:
+                # Numbers typed into the CLI or dashboard arrive as strings
+                candidates.append(int(str(number).strip().lstrip('+')))
+            except ValueError:
+                pass
+        else:
+            candidates.append(str(number).strip())
+
+        for candidate in candidates:
+            position = self._index.get_indexer([candidate])[0]
+            if position >= 0:
+                return int(position)
+        return None
+
+    def _require(self, number):
+        code = self.code(number)
+        if code is None:
+            raise KeyError(f"Number not found in call graph: {number}")
+        return code
+
+    def _expand(self, frontier):
+        """(parents, children) pairs for every edge leaving a frontier of codes"""
+        rows = self.adjacency[frontier]
+        parents = np.repeat(frontier, np.diff(rows.indptr))
+        return parents, rows.indices
+
+    def _edge_count(self, frontier):
+        return int((self.adjacency.indptr[frontier + 1] - self.adjacency.indptr[frontier]).sum())
+
+    def neighbors(self, number):
+        """Direct contacts of a number with their call counts, busiest first"""
+        code = self._require(number)
+        start, end = self.adjacency.indptr[code], self.adjacency.indptr[code + 1]
+        contacts = pd.DataFrame({
+            'Node': self.nodes[self.adjacency.indices[start:end]],
+            'Calls': self.adjacency.data[start:end].astype(np.int64)
+        })
+        return contacts.sort_values('Calls', ascending=False, kind='stable').reset_index(drop=True)
+
+    def _k_hop_codes(self, code, k):
+        hops = {code: 0}
+        reached = np.array([code])
+        frontier = reached
+        for hop in range(1, k + 1):
+            _, children = self._expand(frontier)
+            frontier = np.setdiff1d(children, reached, assume_unique=False)
+            if not len(frontier):
+                break
+            reached = np.union1d(reached, frontier)
+            hops.update(dict.fromkeys(frontier.tolist(), hop))
+        return hops
+
+    def k_hop(self, number, k=1):
+        """Every number within k hops, with its hop distance (the number itself at 0)"""
+        hops = self._k_hop_codes(self._require(number), k)
+        codes = np.fromiter(hops.keys(), dtype=np.int64, count=len(hops))
+        return pd.DataFrame({
+            'Node': self.nodes[codes],
+            'Hops': np.fromiter(hops.values(), dtype=np.int64, count=len(hops))
+        })
+
+    def common_contacts(self, number_a, number_b):
+        """Numbers in contact with both a and b, with call counts to each"""
+        rows = self.adjacency[[self._require(number_a), self._require(number_b)]]
+        calls_a = rows.getrow(0).tocoo()
+        calls_b = rows.getrow(1).tocoo()
+        shared, in_a, in_b = np.intersect1d(calls_a.col, calls_b.col, return_indices=True)
+        common = pd.DataFrame({
+            'Node': self.nodes[shared],
+            'Calls A': calls_a.data[in_a].astype(np.int64),
+            'Calls B': calls_b.data[in_b].astype(np.int64)
+        })
+        common['Total Calls'] = common['Calls A'] + common['Calls B']
+        return common.sort_values('Total Calls', ascending=False, kind='stable').reset_index(drop=True)
+
+    def shortest_path(self, number_a, number_b, max_hops=None):
+        """Fewest-hop chain of numbers from a to b by bidirectional BFS, or None"""
+        source, target = self._require(number_a), self._require(number_b)
+        if source == target:
+            return [self.nodes[source]]
+
+        # Parent pointers and hop distances from each end of the search
+        parents = [{source: -1}, {target: -1}]
+        distance = [{source: 0}, {target: 0}]
+        frontiers = [np.array([source]), np.array([target])]
+        hops = 0
+
+        while len(frontiers[0]) and len(frontiers[1]):
+            if max_hops is not None and hops >= max_hops:
+                return None
+
+            # Always grow the side with fewer edges to scan
+            side = 0 if self._edge_count(frontiers[0]) <= self._edge_count(frontiers[1]) else 1
+            other = 1 - side
+            level = distance[side][int(frontiers[side][0])] + 1
+
+            edge_parents, children = self._expand(frontiers[side])
+            children, first = np.unique(children, return_index=True)
+            edge_parents = edge_parents[first]
+            new = np.fromiter((c not in parents[side] for c in children.tolist()), dtype=bool, count=len(children))
+            children, edge_parents = children[new], edge_parents[new]
+
+            for child, parent in zip(children.tolist(), edge_parents.tolist()):
+                parents[side][child] = parent
+                distance[side][child] = level
+            hops += 1
+
+            # The full level is expanded, so the best meeting point minimises the other side's distance
+            meetings = [c for c in children.tolist() if c in parents[other]]
+            if meetings:
+                meet = min(meetings, key=lambda c: distance[other][c])
+                if max_hops is not None and level + distance[other][meet] > max_hops:
+                    return None
+                return [self.nodes[code] for code in self._join(parents, meet)]
+
+            frontiers[side] = children
+
+        return None
+
+    @staticmethod
+    def _join(parents, meet):
+        forward = []
+        code = meet
+        while code != -1:
+            forward.append(code)
+            code = parents[0][code]
+        forward.reverse()
+
+        code = parents[1][meet]
+        while code != -1:
+            forward.append(code)
+            code = parents[1][code]
+        return forward
+
+    def ego_subgraph(self, number, radius=1):
+        """(nodes, adjacency) of the subgraph induced by everything within radius hops"""
+        hops = self._k_hop_codes(self._require(number), radius)
+        codes = np.sort(np.fromiter(hops.keys(), dtype=np.int64, count=len(hops)))
+        return self.nodes[codes], self.adjacency[codes][:, codes].tocsr()
@@ -0,0 +1,247 @@
+import hashlib
+import logging
+import os
+
+import numpy as np
+import plotly.graph_objs as go
+from scipy import sparse
+from scipy.sparse import csgraph
+from scipy.sparse.linalg import eigsh
+
+from forensic_telco_analyzer.analysis.sparse_centrality import pagerank
+
+# Bump whenever the layout algorithm or the cached file layout changes
+LAYOUT_VERSION = 1
+
+# Components up to this size get a dense eigendecomposition
+DENSE_COMPONENT_SIZE = 400
+
+# Level-of-detail budget for a single rendered view
+MAX_VISIBLE_NODES = 3000
+MAX_VISIBLE_EDGES = 6000
+
+
+def evict_layouts(cache_dir, max_bytes, keep=None):
+    """Remove the least recently used layout files until cache_dir holds at most max_bytes"""
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.startswith('layout_') and name.endswith('.npz') and '.tmp' not in name and path != keep:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    if keep is not None and os.path.exists(keep):
+        total += os.path.getsize(keep)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except FileNotFoundError:
+            pass
+
+
+def graph_version(nodes, adjacency):
+    """Content hash identifying one version of a call graph"""
+    adjacency = adjacency.tocsr()
+    adjacency.sort_indices()
+    digest = hashlib.sha1(str(LAYOUT_VERSION).encode())
+    digest.update(np.asarray(nodes).astype(str).tobytes())
+    for array in (adjacency.indptr, adjacency.indices, adjacency.data):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()[:20]
+
+
+def _component_positions(adjacency):
+    """Spectral coordinates in [-1, 1] for one connected component"""
+    n = adjacency.shape[0]
+    if n == 1:
+        return np.zeros((1, 2))
+    if n <= 3:
+        angles = 2 * np.pi * np.arange(n) / n
+        return np.column_stack([np.cos(angles), np.sin(angles)])
+
+    # Leading eigenvectors of D^-1/2 A D^-1/2 are the smoothest ones of the
+    # normalized Laplacian; the first is trivial, the next two are the layout
+    structure = adjacency.copy()
+    structure.data[:] = 1.0
+    degree = np.asarray(structure.sum(axis=1)).ravel()
+    scale = sparse.diags(1.0 / np.sqrt(degree))
+    normalized = scale @ structure @ scale
+
+    if n <= DENSE_COMPONENT_SIZE:
+        _, vectors = np.linalg.eigh(normalized.toarray())
+        coords = vectors[:, -3:-1]
+    else:
+        _, vectors = eigsh(normalized, k=3, which='LA', v0=np.ones(n), tol=1e-4, maxiter=n * 10)
+        coords = vectors[:, :2]
+    coords = scale @ coords
+
+    spread = np.abs(coords).max(axis=0)
+    coords = coords / np.where(spread > 0, spread, 1.0)
+    # Rank-based stretch keeps dense cores from collapsing onto one pixel
+    ranks = np.argsort(np.argsort(coords, axis=0), axis=0) / max(n - 1, 1) * 2 - 1
+    return 0.5 * coords + 0.5 * ranks
+
+
+def spectral_layout(adjacency):
+    """2-D positions for every node: spectral per component, components packed by size"""
+    n = adjacency.shape[0]
+    n_components, labels = csgraph.connected_components(adjacency, directed=False)
+    sizes = np.bincount(labels, minlength=n_components)
+    order = np.argsort(labels, kind='stable')
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    positions = np.zeros((n, 2))
+
+    # Each component gets a square cell whose side grows with sqrt(size),
+    # placed on shelves from largest to smallest
+    radius = np.sqrt(sizes)
+    shelf_width = max(radius.max() * 2, np.sqrt((4 * radius ** 2).sum()))
+    x = y = shelf_height = 0.0
+    for component in np.argsort(-sizes, kind='stable'):
+        members = order[bounds[component]:bounds[component + 1]]
+        side = 2 * radius[component]
+        if x + side > shelf_width and x > 0:
+            x, y = 0.0, y + shelf_height
+            shelf_height = 0.0
+        sub = adjacency[members][:, members] if len(members) > 1 else None
+        coords = _component_positions(sub) if sub is not None else np.zeros((1, 2))
+        positions[members] = coords * radius[component] * 0.9 + [x + radius[component], -(y + radius[component])]
+        x += side
+        shelf_height = max(shelf_height, side)
+
+    return positions
+
+
+class GraphLayout:
+    """Node positions, scores and edges of one graph version, cached on disk"""
+
+    def __init__(self, version, nodes, positions, scores, edge_lo, edge_hi, edge_weight):
+        self.version = version
+        self.nodes = np.asarray(nodes)
+        self.positions = np.asarray(positions, dtype=np.float32)
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self.edge_lo = np.asarray(edge_lo)
+        self.edge_hi = np.asarray(edge_hi)
+        self.edge_weight = np.asarray(edge_weight)
+
+    @staticmethod
+    def cache_file(cache_dir, version):
+        return os.path.join(cache_dir, f'layout_{version}.npz')
+
+    @classmethod
+    def load(cls, cache_dir, version):
+        """Cached layout for a graph version, or None"""
+        cache_file = cls.cache_file(cache_dir, version)
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            # Mark the entry recently used, so eviction removes the least recently used layouts first
+            os.utime(cache_file)
+            with np.load(cache_file, allow_pickle=False) as cache:
+                return cls(version, cache['nodes'], cache['positions'], cache['scores'],
+                           cache['edge_lo'], cache['edge_hi'], cache['edge_weight'])
+        except (OSError, KeyError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable layout cache '{cache_file}': {e}")
+            return None
+
+    @classmethod
+    def load_or_compute(cls, nodes, adjacency, cache_dir, scores=None, max_bytes=None):
+        """
+        Layout for a graph, computed once per graph version.
+        Args:
+            nodes (array): Numbers, indexed by adjacency code.
+            adjacency (csr_matrix): Symmetric weighted call graph.
+            cache_dir (str): Directory holding layout_<version>.npz files.
+            scores (array): Per-node importance for level of detail (PageRank by default).
+            max_bytes (int): Size cap of cache_dir; least recently used layouts are evicted past it.
+        """
+        version = graph_version(nodes, adjacency)
+        layout = cls.load(cache_dir, version)
+        if layout is not None:
+            return layout
+
+        logging.info(f"Computing layout for {len(nodes)} nodes...")
+        positions = spectral_layout(adjacency)
+        if scores is None:
+            scores, _ = pagerank(adjacency)
+        upper = sparse.triu(adjacency, k=1).tocoo()
+        layout = cls(version, np.asarray(nodes).astype(str), positions, scores, upper.row, upper.col, upper.data)
+        layout.save(cache_dir, max_bytes)
+        return layout
+
+    def save(self, cache_dir, max_bytes=None):
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_file = self.cache_file(cache_dir, self.version)
+        tmp_file = f"{cache_file}.tmp.npz"
+        np.savez(tmp_file, nodes=self.nodes, positions=self.positions, scores=self.scores,
+                 edge_lo=self.edge_lo, edge_hi=self.edge_hi, edge_weight=self.edge_weight)
+        os.replace(tmp_file, cache_file)
+        if max_bytes is not None:
+            evict_layouts(cache_dir, max_bytes, keep=cache_file)
+
+    def visible(self, max_nodes=MAX_VISIBLE_NODES, x_range=None, y_range=None):
+        """Codes of the highest scoring nodes inside the viewport"""
+        candidates = np.arange(len(self.nodes))
+        if x_range is not None and y_range is not None:
+            x, y = self.positions[:, 0], self.positions[:, 1]
+            candidates = np.flatnonzero((x >= min(x_range)) & (x <= max(x_range)) &
+                                        (y >= min(y_range)) & (y <= max(y_range)))
+        if len(candidates) > max_nodes:
+            top = np.argpartition(-self.scores[candidates], max_nodes - 1)[:max_nodes]
+            candidates = candidates[top]
+        return np.sort(candidates)
+
+    def figure(self, max_nodes=MAX_VISIBLE_NODES, max_edges=MAX_VISIBLE_EDGES, x_range=None, y_range=None,
+               highlight=None):
+        """Interactive WebGL figure of the visible nodes and the heaviest edges between them"""
+        shown = self.visible(max_nodes, x_range, y_range)
+        keep = np.zeros(len(self.nodes), dtype=bool)
+        keep[shown] = True
+
+        edges = np.flatnonzero(keep[self.edge_lo] & keep[self.edge_hi])
+        if len(edges) > max_edges:
+            edges = edges[np.argpartition(-self.edge_weight[edges], max_edges - 1)[:max_edges]]
+
+        # One trace for all edges: segments separated by NaN
+        segments = np.full((len(edges) * 3, 2), np.nan, dtype=np.float32)
+        segments[0::3] = self.positions[self.edge_lo[edges]]
+        segments[1::3] = self.positions[self.edge_hi[edges]]
+
+        scores = self.scores[shown]
+        sizes = 5 + 20 * np.sqrt(scores / scores.max()) if len(scores) and scores.max() > 0 else 6
+        traces = [
+            go.Scattergl(x=segments[:, 0], y=segments[:, 1], mode='lines', hoverinfo='skip',
+                         line={'width': 0.5, 'color': 'rgba(150, 150, 150, 0.5)'}, name='Calls'),
+            go.Scattergl(x=self.positions[shown, 0], y=self.positions[shown, 1], mode='markers',
+                         text=self.nodes[shown], customdata=scores,
+                         hovertemplate='%{text}<br>PageRank: %{customdata:.5f}<extra></extra>',
+                         marker={'size': sizes, 'color': scores, 'colorscale': 'Viridis', 'showscale': True,
+                                 'colorbar': {'title': 'PageRank'}},
+                         name='Numbers')
+        ]
+        if highlight is not None:
+            match = np.flatnonzero(self.nodes == str(highlight))
+            if len(match):
+                traces.append(go.Scattergl(x=self.positions[match, 0], y=self.positions[match, 1], mode='markers',
+                                           text=self.nodes[match], hoverinfo='text', name='Target',
+                                           marker={'size': 18, 'color': 'red', 'symbol': 'star'}))
+
+        title = f'Showing {len(shown)} of {len(self.nodes)} numbers'
+        if len(shown) == max_nodes:
+            title += ' (zoom in for more)'
+
+        figure = go.Figure(traces)
+        figure.update_layout(
+            title=title,
+            showlegend=False, hovermode='closest', uirevision=self.version,
+            xaxis={'visible': False, 'range': list(x_range) if x_range else None},
+            yaxis={'visible': False, 'range': list(y_range) if y_range else None, 'scaleanchor': 'x'},
+            margin={'l': 10, 'r': 10, 't': 40, 'b': 10}, height=700
+        )
+        return figure
@@ -0,0 +1,298 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from forensic_telco_analyzer.analysis.network_analysis import (
+    DEFAULT_BETWEENNESS_PIVOTS, SPARSE_NODE_THRESHOLD, edges_to_csr
+)
+from forensic_telco_analyzer.analysis.sparse_centrality import (
+    BATCH_CELL_BUDGET, bfs_distances, dependency_sums, hop_structure, pagerank, rescale_betweenness
+)
+
+# Bump whenever the layout of the saved state changes
+STATE_VERSION = 1
+
+# Consumed rows kept to check that a source file was only appended to
+TAIL_ROWS = 16
+
+
+class IncrementalCentrality:
+    """Call graph and centrality scores that absorb new call batches in place.
+
+    Degree and call volume are updated exactly for the numbers a batch
+    touches. PageRank restarts from the previous vector. Betweenness is kept
+    as unscaled per-pivot dependency sums; after a batch only the pivots
+    whose shortest paths can change (those at different distances from the
+    two ends of a newly created contact) are recomputed. More calls between
+    numbers that were already in contact never change betweenness.
+    """
+
+    def __init__(self, nodes, adjacency, degree, pagerank_scores, dependency, pivots, exact,
+                 rows_consumed=0, tail=None, source_column='source_number',
+                 destination_column='destination_number'):
+        self.nodes = np.asarray(nodes)
+        self.adjacency = adjacency.tocsr()
+        self.degree = np.asarray(degree, dtype=np.int64)
+        self.pagerank = np.asarray(pagerank_scores, dtype=np.float64)
+        self.dependency = np.asarray(dependency, dtype=np.float64)
+        self.pivots = np.asarray(pivots, dtype=np.int64)
+        self.exact = bool(exact)
+        self.rows_consumed = int(rows_consumed)
+        self.tail = np.empty((0, 2), dtype=str) if tail is None else np.asarray(tail, dtype=str)
+        self.source_column = source_column
+        self.destination_column = destination_column
+        self._index = pd.Index(self.nodes)
+
+    @classmethod
+    def from_frame(cls, data, betweenness_pivots=None, seed=42, source_column='source_number',
+                   destination_column='destination_number', checkpoint=None):
+        """Compute the full state for a frame of calls; checkpoint() runs between betweenness batches"""
+        n_nodes = pd.concat([data[source_column], data[destination_column]]).dropna().nunique()
+        if betweenness_pivots is None and n_nodes > SPARSE_NODE_THRESHOLD:
+            betweenness_pivots = DEFAULT_BETWEENNESS_PIVOTS
+
+        empty = sparse.csr_matrix((0, 0))
+        state = cls(np.array([], dtype=str), empty, [], [], [], [], exact=betweenness_pivots is None,
+                    source_column=source_column, destination_column=destination_column)
+        state._absorb(data)
+        state._seed_pivots(betweenness_pivots, seed, checkpoint)
+        state.pagerank, _ = pagerank(state.adjacency)
+        return state
+
+    @staticmethod
+    def state_path(correlated_file):
+        """Path of the saved state kept next to a call CSV"""
+        return f"{correlated_file}.centrality.npz"
+
+    def _seed_pivots(self, betweenness_pivots, seed, checkpoint=None):
+        n = len(self.nodes)
+        if betweenness_pivots is None or betweenness_pivots >= n:
+            self.pivots = np.arange(n)
+        else:
+            self.pivots = np.sort(np.random.default_rng(seed).choice(n, size=betweenness_pivots, replace=False))
+        self.dependency = dependency_sums(hop_structure(self.adjacency), self.pivots, checkpoint=checkpoint)
+
+    def _encode(self, values):
+        """Codes for numbers, appending numbers never seen before"""
+        codes = self._index.get_indexer(values)
+        unseen = codes < 0
+        if unseen.any():
+            new_codes, new_nodes = pd.factorize(values[unseen])
+            codes[unseen] = len(self.nodes) + new_codes
+            self.nodes = np.concatenate([self.nodes, np.asarray(new_nodes, dtype=str)])
+            self._index = pd.Index(self.nodes)
+        return codes.astype(np.int64)
+
+    def _absorb(self, delta):
+        """Fold a batch of calls into the adjacency and degree; return the batch's edge list"""
+        self.rows_consumed += len(delta)
+        raw = delta[[self.source_column, self.destination_column]].astype(str).to_numpy()
+        self.tail = np.concatenate([self.tail, raw])[-TAIL_ROWS:]
+
+        calls = delta[[self.source_column, self.destination_column]].dropna()
+        n_old = len(self.nodes)
+        src = self._encode(calls[self.source_column].astype(str).to_numpy())
+        dst = self._encode(calls[self.destination_column].astype(str).to_numpy())
+        n = len(self.nodes)
+
+        lo, hi = np.minimum(src, dst), np.maximum(src, dst)
+        keys, weight = np.unique(lo * n + hi, return_counts=True)
+        lo, hi = np.divmod(keys, n)
+
+        if n > n_old:
+            indptr = np.concatenate([self.adjacency.indptr, np.full(n - n_old, self.adjacency.indptr[-1])])
+            self.adjacency = sparse.csr_matrix((self.adjacency.data, self.adjacency.indices, indptr), shape=(n, n))
+            self.degree = np.concatenate([self.degree, np.zeros(n - n_old, dtype=np.int64)])
+            self.pagerank = np.concatenate([self.pagerank, np.zeros(n - n_old)])
+            self.dependency = np.concatenate([self.dependency, np.zeros(n - n_old)])
+
+        previous = self.adjacency
+        self.adjacency = previous + edges_to_csr(n, lo, hi, weight)
+
+        # Only rows the batch touched can change degree; networkx counts self-loops twice
+        touched = np.unique(np.concatenate([lo, hi]))
+        self.degree[touched] = (self.adjacency.indptr[touched + 1] - self.adjacency.indptr[touched] +
+                                (self.adjacency.diagonal()[touched] != 0))
+        return previous, n_old, lo, hi
+
+    def update(self, delta, checkpoint=None):
+        """
+        Fold a batch of new calls into the state.
+        Args:
+            delta (DataFrame): New call records (same columns as the original data).
+            checkpoint (callable): Called between betweenness batches; may raise to stop
+                (the state is then inconsistent and must not be saved).
+        Returns:
+            dict: Counts of new numbers, new contacts and recomputed pivots, and the
+            PageRank iterations needed.
+        """
+        previous, n_old, lo, hi = self._absorb(delta)
+        n = len(self.nodes)
+
+        # New contacts are the only changes that can alter shortest paths
+        known = (lo < n_old) & (hi < n_old)
+        existing = np.zeros(len(lo), dtype=bool)
+        if known.any():
+            existing[known] = np.asarray(previous[lo[known], hi[known]]).ravel() != 0
+        created = ~existing & (lo != hi)
+        u, v = lo[created], hi[created]
+
+        structure = hop_structure(self.adjacency)
+        old_pivots = self.pivots[self.pivots < n_old]
+        affected = np.zeros(len(old_pivots), dtype=bool)
+        if len(u) and len(old_pivots):
+            old_structure = hop_structure(previous)
+            # Testing a pivot costs one BFS per contact end; past that, plain recomputation is cheaper
+            if 2 * len(u) < len(old_pivots):
+                batch = max(1, BATCH_CELL_BUDGET // (2 * max(n, 1)))
+                for start in range(0, len(u), batch):
+                    ends_u, ends_v = u[start:start + batch], v[start:start + batch]
+                    dist = bfs_distances(old_structure, np.concatenate([ends_u, ends_v]))[old_pivots]
+                    # A source equidistant from both ends never routes through the new contact
+                    affected |= (dist[:, :len(ends_u)] != dist[:, len(ends_u):]).any(axis=1)
+            else:
+                affected[:] = True
+
+            if 2 * affected.sum() < len(old_pivots):
+                recompute = old_pivots[affected]
+                self.dependency -= dependency_sums(old_structure, recompute, checkpoint=checkpoint)
+                self.dependency += dependency_sums(structure, recompute, checkpoint=checkpoint)
+            elif affected.any():
+                # Swapping out most pivots costs more than rerunning them all once
+                self.dependency = dependency_sums(structure, old_pivots, checkpoint=checkpoint)
+
+        new_pivots = np.arange(n_old, n) if self.exact else np.array([], dtype=np.int64)
+        if len(new_pivots):
+            self.dependency += dependency_sums(structure, new_pivots, checkpoint=checkpoint)
+            self.pivots = np.concatenate([self.pivots, new_pivots])
+
+        # Numbers new to the graph start from the uniform share
+        start = np.where(self.pagerank > 0, self.pagerank, 1.0 / n)
+        self.pagerank, iterations = pagerank(self.adjacency, start=start)
+
+        stats = {
+            'rows': len(delta),
+            'new_numbers': n - n_old,
+            'new_contacts': int(created.sum()),
+            'recomputed_pivots': int(affected.sum()) + len(new_pivots),
+            'pagerank_iterations': iterations
+        }
+        logging.info(f"Centrality refreshed: {stats}")
+        return stats
+
+    def to_frame(self):
+        """Centrality table in the same layout as NetworkAnalyzer.calculate_centrality"""
+        n = len(self.nodes)
+        return pd.DataFrame({
+            'Node': self.nodes,
+            'Degree Centrality': self.degree / (n - 1) if n > 1 else np.ones(n),
+            'Betweenness Centrality': rescale_betweenness(self.dependency, n, 0 if self.exact else len(self.pivots)),
+            'PageRank': self.pagerank
+        }).sort_values(by='PageRank', ascending=False)
+
+    def read_delta(self, correlated_file):
+        """Rows appended to a call CSV since the state was saved, or None if it was rewritten"""
+        skip = max(self.rows_consumed - len(self.tail), 0)
+        columns = [self.source_column, self.destination_column]
+        frame = pd.read_csv(correlated_file, dtype={column: str for column in columns},
+                            skiprows=range(1, skip + 1))
+        return self._delta(frame, skip)
+
+    def frame_delta(self, data):
+        """Rows of an in-memory call frame beyond those already folded in, or None if it was rewritten"""
+        if len(data) < self.rows_consumed:
+            return None
+        skip = max(self.rows_consumed - len(self.tail), 0)
+        return self._delta(data.iloc[skip:], skip)
+
+    def _delta(self, frame, skip):
+        columns = [self.source_column, self.destination_column]
+        overlap = frame.iloc[:self.rows_consumed - skip]
+        if len(overlap) != len(self.tail) or not np.array_equal(overlap[columns].astype(str).to_numpy(), self.tail):
+            return None
+        return frame.iloc[self.rows_consumed - skip:]
+
+    def save(self, state_file):
+        """Write the state to an uncompressed .npz file"""
+        arrays = {
+            'version': np.array(STATE_VERSION),
+            'nodes': self.nodes.astype(str),
+            'indptr': self.adjacency.indptr,
+            'indices': self.adjacency.indices,
+            'weights': self.adjacency.data,
+            'degree': self.degree,
+            'pagerank': self.pagerank,
+            'dependency': self.dependency,
+            'pivots': self.pivots,
+            'exact': np.array(self.exact),
+            'rows_consumed': np.array(self.rows_consumed),
+            'tail': self.tail.astype(str),
+            'columns': np.array([self.source_column, self.destination_column]),
+        }
+
+        # Write to a temporary file first so readers never see a partial state
+        tmp_file = f"{state_file}.tmp.npz"
+        np.savez(tmp_file, **arrays)
+        os.replace(tmp_file, state_file)
+
+    @classmethod
+    def load(cls, state_file):
+        """Load saved state, or None if it is missing or unreadable"""
+        if not os.path.exists(state_file):
+            return None
+        try:
+            with np.load(state_file, allow_pickle=False) as state:
+                if int(state['version']) != STATE_VERSION:
+                    return None
+                n = len(state['nodes'])
+                adjacency = sparse.csr_matrix((state['weights'], state['indices'], state['indptr']), shape=(n, n))
+                source_column, destination_column = state['columns'].tolist()
+                return cls(state['nodes'], adjacency, state['degree'], state['pagerank'], state['dependency'],
+                           state['pivots'], bool(state['exact']), int(state['rows_consumed']), state['tail'],
+                           source_column, destination_column)
+        except (OSError, KeyError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable centrality state '{state_file}': {e}")
+            return None
+
+
+def refresh_centrality(correlated_file, state_file=None, betweenness_pivots=None, seed=42, data=None,
+                       checkpoint=None):
+    """
+    Centrality for a call CSV, reusing saved state and folding in only appended rows.
+    Args:
+        correlated_file (str): Call CSV with source_number/destination_number columns.
+        state_file (str): Where the state is kept (defaults to next to the CSV).
+        betweenness_pivots (int): Pivots for approximate betweenness on a full rebuild.
+        seed (int): Seed for pivot sampling on a full rebuild.
+        data (DataFrame): Contents of correlated_file when already in memory; the CSV is then not read.
+        checkpoint (callable): Called between betweenness batches; may raise to stop (nothing is saved then).
+    Returns:
+        DataFrame: Node, Degree Centrality, Betweenness Centrality and PageRank.
+    """
+    state_file = state_file or IncrementalCentrality.state_path(correlated_file)
+    state = IncrementalCentrality.load(state_file)
+    if state is None:
+        delta = None
+    elif data is not None:
+        delta = state.frame_delta(data)
+    else:
+        delta = state.read_delta(correlated_file)
+
+    if delta is None:
+        logging.info(f"Computing centrality for {correlated_file} from scratch...")
+        if data is None:
+            data = pd.read_csv(correlated_file, dtype={'source_number': str, 'destination_number': str})
+        state = IncrementalCentrality.from_frame(data, betweenness_pivots=betweenness_pivots, seed=seed,
+                                                 checkpoint=checkpoint)
+        state.save(state_file)
+    elif len(delta):
+        logging.info(f"Folding {len(delta)} new rows into saved centrality state...")
+        state.update(delta, checkpoint)
+        state.save(state_file)
+    else:
+        logging.info("Centrality state is up to date.")
+
+    return state.to_frame()
@@ -1,45 +1,154 @@
 import networkx as nx
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
 import logging
 from networkx.algorithms import centrality
 from plotly.graph_objs import Figure, Scatter, Layout
+from forensic_telco_analyzer.analysis.sparse_centrality import sparse_centrality
+from forensic_telco_analyzer.analysis.community import louvain_communities, modularity, summarize_communities
+from forensic_telco_analyzer.analysis.graph_index import GraphIndex
 import matplotlib
 matplotlib.use('Agg')  # MUST BE SET BEFORE IMPORTING PYLOT
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Graphs above this many nodes use the sparse centrality backend by default
+SPARSE_NODE_THRESHOLD = 5000
+# Sampled pivots for approximate betweenness on large graphs
+DEFAULT_BETWEENNESS_PIVOTS = 256
+
+def encode_edges(data, source_column='source_number', destination_column='destination_number'):
+    """
+    Dictionary-encode the numbers of a CDR frame and count calls per undirected pair.
+    Args:
+        data (DataFrame): Frame with one row per call.
+    Returns:
+        tuple: (nodes, lo, hi, weight) where nodes holds the distinct numbers and
+        lo <= hi are integer codes into it, one entry per distinct pair.
+    """
+    calls = data[[source_column, destination_column]].dropna()
+    codes, nodes = pd.factorize(pd.concat([calls[source_column], calls[destination_column]], ignore_index=True))
+    src, dst = np.split(codes.astype(np.int64), 2)
+    
+    # Calls in either direction accumulate on the same undirected edge
+    lo, hi = np.minimum(src, dst), np.maximum(src, dst)
+    keys, weight = np.unique(lo * len(nodes) + hi, return_counts=True)
+    lo, hi = np.divmod(keys, len(nodes))
+    return np.asarray(nodes), lo, hi, weight
+
+
+def edges_to_csr(n_nodes, lo, hi, weight):
+    """Symmetric SciPy CSR adjacency matrix for an undirected weighted edge list"""
+    from scipy import sparse
+    
+    off_diagonal = lo != hi
+    rows = np.concatenate([lo, hi[off_diagonal]])
+    cols = np.concatenate([hi, lo[off_diagonal]])
+    weights = np.concatenate([weight, weight[off_diagonal]]).astype(np.float64)
+    return sparse.csr_matrix((weights, (rows, cols)), shape=(n_nodes, n_nodes))
+
+
 class NetworkAnalyzer:
     def __init__(self, correlated_file):
         """
-        Initialize the NetworkAnalyzer with the path to the correlated data file.
+        Initialize the NetworkAnalyzer with the correlated data.
         Args:
-            correlated_file (str): Path to the correlated data CSV file.
+            correlated_file (str or DataFrame): Path to the correlated data CSV file,
+                or an already loaded frame.
         """
-        if not correlated_file or not os.path.exists(correlated_file):
-            raise FileNotFoundError(f"File not found: {correlated_file}")
-        
-        logging.info(f"Loading correlated data from {correlated_file}...")
-        self.data = pd.read_csv(correlated_file)
+        if isinstance(correlated_file, pd.DataFrame):
+            self.data = correlated_file
+        else:
+            if not correlated_file or not os.path.exists(correlated_file):
+                raise FileNotFoundError(f"File not found: {correlated_file}")
+            
+            logging.info(f"Loading correlated data from {correlated_file}...")
+            self.data = pd.read_csv(correlated_file)
         self.graph = nx.Graph()
+        self.nodes = None
+        self.adjacency = None
+        self._index = None
+
+    @classmethod
+    def from_index(cls, index):
+        """
+        Create an analyzer over a prebuilt call graph instead of call records.
+        Args:
+            index (GraphIndex): Dictionary-encoded adjacency, e.g. from GraphIndex.load.
+        """
+        analyzer = cls(pd.DataFrame(columns=['source_number', 'destination_number']))
+        analyzer.nodes, analyzer.adjacency, analyzer._index = index.nodes, index.adjacency, index
+        return analyzer
+
+    @property
+    def index(self):
+        """GraphIndex for neighbourhood and path queries, built on first use."""
+        if self._index is None:
+            self._ensure_adjacency()
+            self._index = GraphIndex(self.nodes, self.adjacency)
+        return self._index
 
-    def build_graph(self):
-        """Build a graph from CDR data."""
+    def ego_network(self, center, radius=1):
+        """
+        Analyzer restricted to the subgraph within radius hops of a number.
+        Args:
+            center: Phone number at the middle of the ego network.
+            radius (int): Number of hops to include.
+        """
+        nodes, adjacency = self.index.ego_subgraph(center, radius)
+        logging.info(f"Ego network of {center} ({radius} hops): {len(nodes)} nodes.")
+        return NetworkAnalyzer.from_index(GraphIndex(nodes, adjacency))
+
+    def build_graph(self, backend='networkx'):
+        """
+        Build a weighted, undirected call graph from CDR data.
+        Args:
+            backend (str): 'networkx' builds self.graph; 'sparse' only builds
+                self.adjacency (SciPy CSR) and self.nodes, without networkx objects.
+        """
         logging.info("Building communication network graph...")
-        for _, row in self.data.iterrows():
-            src = row['source_number']
-            dst = row['destination_number']
-            if not self.graph.has_edge(src, dst):
-                self.graph.add_edge(src, dst, weight=1)
-            else:
-                self.graph[src][dst]['weight'] += 1
+        self.nodes, lo, hi, weight = encode_edges(self.data)
+        
+        if backend == 'sparse':
+            self.adjacency = edges_to_csr(len(self.nodes), lo, hi, weight)
+            logging.info(f"Sparse graph built with {len(self.nodes)} nodes and {len(weight)} edges.")
+            return
+        
+        self.graph = nx.Graph()
+        self.graph.add_nodes_from(self.nodes.tolist())
+        self.graph.add_weighted_edges_from(zip(self.nodes[lo].tolist(), self.nodes[hi].tolist(), weight.tolist()))
         logging.info(f"Graph built with {self.graph.number_of_nodes()} nodes and {self.graph.number_of_edges()} edges.")
 
-    def calculate_centrality(self):
-        """Calculate centrality measures."""
+    def calculate_centrality(self, backend='auto', betweenness_pivots=None, seed=42, workers=None, checkpoint=None):
+        """
+        Calculate centrality measures.
+        Args:
+            backend (str): 'networkx' for exact networkx algorithms, 'sparse' for the
+                SciPy backend in analysis.sparse_centrality, or 'auto' to use the
+                sparse backend above SPARSE_NODE_THRESHOLD nodes.
+            betweenness_pivots (int): Sparse backend only; number of sampled pivots for
+                approximate betweenness. Defaults to exact below SPARSE_NODE_THRESHOLD
+                nodes and DEFAULT_BETWEENNESS_PIVOTS above.
+            seed (int): Seed for pivot sampling.
+            workers (int): Worker processes for betweenness pivot batches.
+            checkpoint (callable): Sparse backend only; called between betweenness pivot
+                batches and may raise to stop the computation (e.g. a cancelled job).
+        """
         logging.info("Calculating centrality measures...")
+        if backend == 'auto':
+            if self.adjacency is not None:
+                # Graph was built without networkx objects
+                backend = 'sparse'
+            else:
+                backend = 'sparse' if self.graph.number_of_nodes() > SPARSE_NODE_THRESHOLD else 'networkx'
+        
+        if backend == 'sparse':
+            return self._calculate_sparse_centrality(betweenness_pivots, seed, workers, checkpoint)
+        
+        self._ensure_graph()
         degree_centrality = nx.degree_centrality(self.graph)
         betweenness_centrality = nx.betweenness_centrality(self.graph)
         pagerank = nx.pagerank(self.graph)
@@ -54,11 +163,87 @@ class NetworkAnalyzer:
         logging.info("Centrality measures calculated.")
         return centrality_df
 
-    def visualize_graph(self, output_file=None):
-        """Visualize the communication network graph."""
+    def _ensure_adjacency(self):
+        if self.adjacency is None:
+            self.nodes, lo, hi, weight = encode_edges(self.data)
+            self.adjacency = edges_to_csr(len(self.nodes), lo, hi, weight)
+
+    def _ensure_graph(self):
+        """Materialise the networkx graph from the sparse adjacency when only that exists."""
+        if self.graph.number_of_nodes() == 0 and self.adjacency is not None:
+            from scipy import sparse
+            
+            upper = sparse.triu(self.adjacency).tocoo()
+            self.graph = nx.Graph()
+            self.graph.add_nodes_from(self.nodes.tolist())
+            self.graph.add_weighted_edges_from(zip(self.nodes[upper.row].tolist(), self.nodes[upper.col].tolist(),
+                                                   upper.data.astype(np.int64).tolist()))
+
+    def _calculate_sparse_centrality(self, betweenness_pivots, seed, workers, checkpoint=None):
+        self._ensure_adjacency()
+        
+        if betweenness_pivots is None and len(self.nodes) > SPARSE_NODE_THRESHOLD:
+            betweenness_pivots = DEFAULT_BETWEENNESS_PIVOTS
+        
+        scores = sparse_centrality(self.adjacency, betweenness_pivots=betweenness_pivots, seed=seed, workers=workers,
+                                   checkpoint=checkpoint)
+        centrality_df = pd.DataFrame({
+            'Node': self.nodes,
+            'Degree Centrality': scores['degree'],
+            'Betweenness Centrality': scores['betweenness'],
+            'PageRank': scores['pagerank']
+        }).sort_values(by='PageRank', ascending=False)
+        
+        logging.info("Centrality measures calculated.")
+        return centrality_df
+
+    def detect_communities(self, resolution=1.0, seed=42, top_members=5):
+        """
+        Detect call communities with Louvain modularity optimisation on the sparse adjacency.
+        Args:
+            resolution (float): Modularity resolution; higher values give smaller communities.
+            seed (int): Seed for the node visiting order.
+            top_members (int): Highest-volume numbers listed per community.
+        Returns:
+            tuple: (labels_df, summary_df) with one row per node (Node, Community) and one
+            row per community (Community, Size, Internal Calls, External Calls, Top Members).
+        """
+        logging.info("Detecting communities...")
+        self._ensure_adjacency()
+        
+        labels = louvain_communities(self.adjacency, resolution=resolution, seed=seed)
+        labels_df = pd.DataFrame({'Node': self.nodes, 'Community': labels})
+        summary_df = summarize_communities(self.adjacency, self.nodes, labels, top_n=top_members)
+        
+        logging.info(f"Found {len(summary_df)} communities "
+                     f"(modularity {modularity(self.adjacency, labels, resolution):.3f}).")
+        return labels_df, summary_df
+
+    def visualize_graph(self, output_file=None, center=None, radius=1, highlight=None):
+        """
+        Visualize the communication network graph.
+        Args:
+            output_file (str): Image file to save the drawing to.
+            center: Optional phone number; only its ego network is drawn.
+            radius (int): Hops around center to include.
+            highlight: Phone number drawn in red (defaults to center).
+        """
+        if center is not None:
+            ego = self.ego_network(center, radius)
+            return ego.visualize_graph(output_file, highlight=center if highlight is None else highlight)
+        
         logging.info("Visualizing the graph...")
+        self._ensure_graph()
+        if self.graph.number_of_nodes() > SPARSE_NODE_THRESHOLD:
+            logging.warning(f"Drawing {self.graph.number_of_nodes()} nodes; pass center= to draw an ego network instead.")
         pos = nx.spring_layout(self.graph, seed=42)
         
+        node_color = 'skyblue'
+        if highlight is not None:
+            highlight_code = self.index.code(highlight)
+            highlight_node = self.nodes[highlight_code] if highlight_code is not None else None
+            node_color = ['red' if node == highlight_node else 'skyblue' for node in self.graph.nodes()]
+        
         # Draw the graph using Matplotlib
         plt.figure(figsize=(12, 12))
         nx.draw(
@@ -68,7 +253,7 @@ class NetworkAnalyzer:
             node_size=50,
             font_size=8,
             edge_color='gray',
-            node_color='skyblue',
+            node_color=node_color,
             alpha=0.7
         )
         
@@ -86,7 +271,7 @@ def analyze_correlated_network(correlated_file):
     data = pd.read_csv(correlated_file)
     
     # Initialize NetworkAnalyzer
-    analyzer = NetworkAnalyzer(correlated_file)
+    analyzer = NetworkAnalyzer(data)
     
     # Build graph and calculate centrality measures
     analyzer.build_graph()
@@ -96,6 +281,11 @@ def analyze_correlated_network(correlated_file):
     os.makedirs("data/processed", exist_ok=True)
     centrality_df.to_csv("data/processed/centrality_measures.csv", index=False)
     
+    # Detect and save communities
+    labels_df, summary_df = analyzer.detect_communities()
+    labels_df.to_csv("data/processed/community_labels.csv", index=False)
+    summary_df.to_csv("data/processed/community_summary.csv", index=False)
+    
     # Visualize graph
     static_dir = os.path.join(os.getcwd(), 'static')
     if not os.path.exists(static_dir):
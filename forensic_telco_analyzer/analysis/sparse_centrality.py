@@ -0,0 +1,230 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from forensic_telco_analyzer.utils.processes import pool_context
+
+# Dense (nodes x sources) work arrays per betweenness batch stay below this many cells
+BATCH_CELL_BUDGET = 8_000_000
+
+# Below this many (pivot, node) pairs betweenness runs in-process
+PARALLEL_WORK_THRESHOLD = 50_000_000
+
+# With a checkpoint, parallel betweenness is split into this many chunks per worker
+CHECKPOINT_CHUNKS = 4
+
+# Adjacency shared with betweenness worker processes by _init_worker
+_worker_adjacency = None
+
+
+def _self_loops(adjacency):
+    return adjacency.diagonal() != 0
+
+
+def degree_centrality(adjacency):
+    """Degree centrality (degree / (n - 1)), matching nx.degree_centrality"""
+    n = adjacency.shape[0]
+    if n <= 1:
+        return np.ones(n)
+    # networkx counts a self-loop twice towards a node's degree
+    degree = np.diff(adjacency.indptr) + _self_loops(adjacency)
+    return degree / (n - 1)
+
+
+def strength_centrality(adjacency):
+    """Weighted degree (total call volume) of every node"""
+    return np.asarray(adjacency.sum(axis=1)).ravel() + adjacency.diagonal()
+
+
+def pagerank(adjacency, alpha=0.85, tol=1.0e-6, max_iter=100, start=None):
+    """Weighted PageRank by power iteration, matching nx.pagerank
+
+    start is an optional initial vector (e.g. a previous result) used to
+    warm-start the iteration. Returns (scores, iterations).
+    """
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.array([]), 0
+
+    out_weight = np.asarray(adjacency.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inv_out = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+    transposed = adjacency.T.tocsr()
+
+    if start is None or len(start) != n:
+        x = np.full(n, 1.0 / n)
+    else:
+        x = np.asarray(start, dtype=np.float64)
+        x = x / x.sum()
+
+    for iteration in range(1, max_iter + 1):
+        last = x
+        x = alpha * (transposed @ (last * inv_out))
+        x += (alpha * last[dangling].sum() + (1.0 - alpha)) / n
+        if np.abs(x - last).sum() < n * tol:
+            return x, iteration
+
+    raise RuntimeError(f"PageRank failed to converge in {max_iter} iterations")
+
+
+def hop_structure(adjacency):
+    """Unweighted adjacency without self-loops, as used for shortest paths"""
+    structure = adjacency.tocsr(copy=True)
+    structure.setdiag(0)
+    structure.eliminate_zeros()
+    structure.data[:] = 1.0
+    return structure
+
+
+def _accumulate_batch(structure, sources):
+    """Brandes dependency scores summed over one batch of BFS sources
+
+    All sources in the batch are explored level by level at once, using a
+    sparse-times-dense product per BFS level for both path counting and
+    dependency accumulation.
+    """
+    n = structure.shape[0]
+    b = len(sources)
+    columns = np.arange(b)
+
+    dist = np.full((n, b), -1, dtype=np.int32)
+    sigma = np.zeros((n, b))
+    dist[sources, columns] = 0
+    sigma[sources, columns] = 1.0
+
+    depth = 0
+    while True:
+        frontier = np.where(dist == depth, sigma, 0.0)
+        reached = structure @ frontier
+        new = (dist == -1) & (reached > 0)
+        if not new.any():
+            break
+        depth += 1
+        dist[new] = depth
+        sigma[new] = reached[new]
+
+    delta = np.zeros((n, b))
+    for level in range(depth, 0, -1):
+        at_level = dist == level
+        ratio = np.divide(1.0 + delta, sigma, out=np.zeros((n, b)), where=at_level)
+        contribution = structure @ ratio
+        parents = dist == level - 1
+        delta[parents] += sigma[parents] * contribution[parents]
+
+    delta[sources, columns] = 0.0
+    return delta.sum(axis=1)
+
+
+def bfs_distances(structure, sources):
+    """Hop distances from each source (one column per source, -1 where unreachable)"""
+    n = structure.shape[0]
+    b = len(sources)
+    dist = np.full((n, b), -1, dtype=np.int32)
+    dist[sources, np.arange(b)] = 0
+
+    depth = 0
+    while True:
+        frontier = (dist == depth).astype(np.float64)
+        new = (dist == -1) & ((structure @ frontier) > 0)
+        if not new.any():
+            return dist
+        depth += 1
+        dist[new] = depth
+
+
+def _batch_size(n, batch_size):
+    return max(1, min(batch_size, BATCH_CELL_BUDGET // max(n, 1)))
+
+
+def _betweenness_chunk(pivots, batch_size, structure=None, checkpoint=None):
+    structure = structure if structure is not None else _worker_adjacency
+    scores = np.zeros(structure.shape[0])
+    size = _batch_size(structure.shape[0], batch_size)
+    for start in range(0, len(pivots), size):
+        if checkpoint is not None:
+            checkpoint()
+        scores += _accumulate_batch(structure, pivots[start:start + size])
+    return scores
+
+
+def dependency_sums(structure, pivots, batch_size=64, checkpoint=None):
+    """Unscaled betweenness contributions of the given BFS sources (see hop_structure);
+    checkpoint() is called before each batch of sources and may raise to stop early"""
+    return _betweenness_chunk(np.asarray(pivots), batch_size, structure, checkpoint)
+
+
+def rescale_betweenness(scores, n, n_pivots, normalized=True):
+    """Rescale summed dependencies the way networkx does for undirected graphs"""
+    if normalized:
+        scale = 1.0 / ((n - 1) * (n - 2)) if n > 2 else None
+    else:
+        scale = 0.5
+    if scale is None:
+        return scores
+    if 0 < n_pivots < n:
+        scale *= n / n_pivots
+    return scores * scale
+
+
+def _init_worker(structure):
+    global _worker_adjacency
+    _worker_adjacency = structure
+
+
+def betweenness_centrality(adjacency, k=None, seed=42, normalized=True, workers=None, batch_size=64,
+                           checkpoint=None):
+    """Unweighted betweenness centrality, exact or estimated from k pivots
+
+    With k=None every node is a source and the result equals
+    nx.betweenness_centrality. Otherwise k pivots are drawn with the given
+    seed and the scores are extrapolated, as networkx does. Pivot batches
+    are split across worker processes when workers > 1. checkpoint() is
+    called between pivot batches (e.g. to cancel a job) and may raise.
+    """
+    n = adjacency.shape[0]
+    structure = hop_structure(adjacency)
+
+    if k is None or k >= n:
+        pivots = np.arange(n)
+    else:
+        pivots = np.sort(np.random.default_rng(seed).choice(n, size=k, replace=False))
+
+    if workers is None:
+        # Worker start-up only pays off once there is real work to split
+        workers = min(os.cpu_count() or 1, 8) if len(pivots) * n > PARALLEL_WORK_THRESHOLD else 1
+    workers = max(1, min(workers, len(pivots) // _batch_size(n, batch_size) or 1))
+
+    if workers == 1:
+        scores = _betweenness_chunk(pivots, batch_size, structure, checkpoint)
+    else:
+        logging.info(f"Estimating betweenness from {len(pivots)} pivots on {workers} workers...")
+        # Smaller chunks give the checkpoint a chance to run while the work is in progress
+        chunks = np.array_split(pivots, workers * (1 if checkpoint is None else CHECKPOINT_CHUNKS))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context(),
+                                 initializer=_init_worker, initargs=(structure,)) as pool:
+            futures = [pool.submit(_betweenness_chunk, chunk, batch_size) for chunk in chunks]
+            try:
+                scores = np.zeros(n)
+                for future in futures:
+                    scores += future.result()
+                    if checkpoint is not None:
+                        checkpoint()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    return rescale_betweenness(scores, n, len(pivots), normalized)
+
+
+def sparse_centrality(adjacency, betweenness_pivots=None, seed=42, workers=None, checkpoint=None):
+    """Degree, betweenness and PageRank for a CSR adjacency as a dict of arrays"""
+    scores, _ = pagerank(adjacency)
+    return {
+        'degree': degree_centrality(adjacency),
+        'betweenness': betweenness_centrality(adjacency, k=betweenness_pivots, seed=seed, workers=workers,
+                                              checkpoint=checkpoint),
+        'pagerank': scores,
+    }
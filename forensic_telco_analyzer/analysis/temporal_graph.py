@@ -0,0 +1,169 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from forensic_telco_analyzer.analysis.network_analysis import edges_to_csr
+from forensic_telco_analyzer.analysis.sparse_centrality import pagerank
+
+# Pandas period alias for one time slice (weekly)
+DEFAULT_SLICE_FREQ = 'W'
+
+
+class TemporalGraph:
+    """Call graph bucketed into time slices, one sparse adjacency delta per slice.
+
+    All slices share one dictionary encoding of the numbers, so a rolling
+    window graph is maintained by adding the slice that enters the window
+    and subtracting the one that leaves it, rather than rebuilding from the
+    call records.
+    """
+
+    def __init__(self, data, slice_freq=DEFAULT_SLICE_FREQ, timestamp_column='timestamp',
+                 source_column='source_number', destination_column='destination_number'):
+        missing = {source_column, destination_column, timestamp_column} - set(data.columns)
+        if missing:
+            raise ValueError(f"Missing columns for temporal graph: {sorted(missing)}")
+        calls = data[[source_column, destination_column, timestamp_column]].dropna()
+        timestamps = pd.to_datetime(calls[timestamp_column], errors='coerce')
+        valid = timestamps.notna().to_numpy()
+        calls, timestamps = calls[valid], timestamps[valid]
+        if calls.empty:
+            raise ValueError("No timestamped calls to build a temporal graph from")
+
+        codes, nodes = pd.factorize(pd.concat([calls[source_column], calls[destination_column]], ignore_index=True))
+        src, dst = np.split(codes.astype(np.int64), 2)
+        lo, hi = np.minimum(src, dst), np.maximum(src, dst)
+
+        periods = timestamps.dt.to_period(slice_freq)
+        self.slice_freq = slice_freq
+        self.nodes = np.asarray(nodes)
+        # Every slice between the first and last call, including empty ones
+        self.periods = pd.period_range(periods.min(), periods.max(), freq=slice_freq)
+        slice_ids = self.periods.get_indexer(periods)
+
+        # Count calls per (slice, pair) without building a combined integer key
+        order = np.lexsort((hi, lo, slice_ids))
+        slice_ids, lo, hi = slice_ids[order], lo[order], hi[order]
+        boundary = np.ones(len(order), dtype=bool)
+        boundary[1:] = (slice_ids[1:] != slice_ids[:-1]) | (lo[1:] != lo[:-1]) | (hi[1:] != hi[:-1])
+        starts = np.flatnonzero(boundary)
+        weight = np.diff(np.append(starts, len(order)))
+        self._slice_ids, self._lo, self._hi, self._weight = slice_ids[starts], lo[starts], hi[starts], weight
+
+        n = len(self.nodes)
+        bounds = np.searchsorted(self._slice_ids, np.arange(len(self.periods) + 1))
+        self.deltas = [
+            edges_to_csr(n, self._lo[a:b], self._hi[a:b], self._weight[a:b])
+            for a, b in zip(bounds[:-1], bounds[1:])
+        ]
+
+        # Slice in which every pair of numbers first called each other
+        pair_keys = self._lo * n + self._hi
+        _, first = np.unique(pair_keys, return_index=True)
+        self._first_contact = np.sort(first)
+        logging.info(f"Temporal graph built: {n} nodes over {len(self.periods)} slices ({slice_freq}).")
+
+    def __len__(self):
+        return len(self.periods)
+
+    def new_contacts(self):
+        """Pairs of numbers in the slice they first called each other, with that slice's call count"""
+        first = self._first_contact
+        return pd.DataFrame({
+            'Period': self.periods[self._slice_ids[first]].astype(str),
+            'Number A': self.nodes[self._lo[first]],
+            'Number B': self.nodes[self._hi[first]],
+            'Calls': self._weight[first]
+        })
+
+    def rolling(self, window=4, step=1):
+        """
+        Yield (start_period, end_period, adjacency) for each rolling window.
+        Args:
+            window (int): Slices per window.
+            step (int): Slices the window advances between yields.
+        """
+        n = len(self.nodes)
+        current = sparse.csr_matrix((n, n))
+        window = max(1, min(window, len(self.deltas)))
+        for end, delta in enumerate(self.deltas):
+            current = current + delta
+            if end >= window:
+                # The slice leaving the window cancels exactly: weights are call counts
+                current = current - self.deltas[end - window]
+                current.eliminate_zeros()
+            start = end - window + 1
+            if start >= 0 and start % step == 0:
+                yield self.periods[start], self.periods[end], current
+
+    def rolling_centrality(self, window=4, step=1, top_n=20, alpha=0.85):
+        """
+        PageRank of every rolling window graph, warm-started from the previous window.
+        Args:
+            window (int): Slices per window.
+            step (int): Slices the window advances each time.
+            top_n (int): Highest ranked numbers reported per window.
+            alpha (float): PageRank damping factor.
+        Returns:
+            tuple: (summary_df, rankings_df). summary_df has one row per window with
+            its size and number of new contacts; rankings_df lists the top_n numbers
+            of each window with their rank in the previous window.
+        """
+        n = len(self.nodes)
+        new_per_slice = np.bincount(self._slice_ids[self._first_contact], minlength=len(self.periods))
+        previous_scores = np.zeros(n)
+        previous_rank = np.full(n, np.nan)
+        previous_end = -1
+        summary, rankings = [], []
+
+        for start, end, adjacency in self.rolling(window, step):
+            end_index = self.periods.get_loc(end)
+            strength = np.asarray(adjacency.sum(axis=1)).ravel()
+            active = np.flatnonzero(strength > 0)
+            # PageRank over the numbers active in this window only
+            window_graph = adjacency[active][:, active]
+
+            warm = previous_scores[active]
+            if warm.sum() > 0:
+                # Numbers new to this window start from the uniform share
+                warm = np.where(warm > 0, warm, 1.0 / len(active))
+                scores, iterations = pagerank(window_graph, alpha=alpha, start=warm)
+            else:
+                scores, iterations = pagerank(window_graph, alpha=alpha)
+
+            order = np.argsort(-scores, kind='stable')
+            rank = np.full(n, np.nan)
+            rank[active[order]] = np.arange(1, len(active) + 1)
+
+            top = order[:top_n]
+            top_codes = active[top]
+            rankings.append(pd.DataFrame({
+                'Window Start': str(start),
+                'Window End': str(end),
+                'Node': self.nodes[top_codes],
+                'Rank': rank[top_codes].astype(np.int64),
+                'Previous Rank': previous_rank[top_codes],
+                'Rank Change': previous_rank[top_codes] - rank[top_codes],
+                'PageRank': scores[top],
+                'Contacts': np.diff(window_graph.indptr)[top],
+                'Calls': (strength[top_codes] + adjacency.diagonal()[top_codes]).astype(np.int64)
+            }))
+            summary.append({
+                'Window Start': str(start),
+                'Window End': str(end),
+                'Nodes': len(active),
+                'Edges': (window_graph.nnz + np.count_nonzero(window_graph.diagonal())) // 2,
+                'Calls': int(sparse.triu(adjacency).sum()),
+                'New Contacts': int(new_per_slice[previous_end + 1:end_index + 1].sum()),
+                'PageRank Iterations': iterations
+            })
+
+            previous_scores = np.zeros(n)
+            previous_scores[active] = scores
+            previous_rank = rank
+            previous_end = end_index
+
+        rankings_df = pd.concat(rankings, ignore_index=True) if rankings else pd.DataFrame()
+        return pd.DataFrame(summary), rankings_df
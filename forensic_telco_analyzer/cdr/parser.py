@@ -1,10 +1,11 @@
-import pandas as pd
 import os
 from forensic_telco_analyzer.utils.parser_base import BaseParser
 
 class CDRParser(BaseParser):
-    def __init__(self, file_path):
-        super().__init__(file_path)
+    subscriber_columns = ('source_number', 'destination_number')
+
+    def __init__(self, file_path, **limits):
+        super().__init__(file_path, **limits)
     
     def parse(self):
         """Parse CDR file and return DataFrame"""
@@ -13,10 +14,8 @@ class CDRParser(BaseParser):
                 print(f"Error: File {self.file_path} not found")
                 return None
                 
-            self.data = pd.read_csv(self.file_path)
-            
-            # Normalize column names
-            self.data.columns = [col.lower().replace(' ', '_') for col in self.data.columns]
+            # Read only the requested columns and rows, with normalized column names
+            self.data = self.read_csv()
             
             return self.data
         except Exception as e:
@@ -8,6 +8,8 @@ class CorrelationEngine:
         self.cdr_data = None
         self.ipdr_data = None
         self.tdr_data = None
+        self.store = None
+        self.store_tables = set()
         self.correlation_results = {}
 
     def load_data(self, cdr_file=None, ipdr_file=None, tdr_file=None):
@@ -30,14 +32,81 @@ class CorrelationEngine:
                 self.tdr_data['timestamp'] = pd.to_datetime(self.tdr_data['timestamp'])
             print(f"Loaded TDR data: {len(self.tdr_data)} records")
 
+    def load_frames(self, cdr_data=None, ipdr_data=None, tdr_data=None):
+        """Use already parsed CDR, IPDR, and TDR frames (e.g. from a CaseSession) instead of reading files."""
+        for name, data in (('cdr', cdr_data), ('ipdr', ipdr_data), ('tdr', tdr_data)):
+            if data is None:
+                continue
+            if 'timestamp' in data.columns and not pd.api.types.is_datetime64_any_dtype(data['timestamp']):
+                # Convert on a copy; the caller's frame may be shared with other stages
+                data = data.assign(timestamp=pd.to_datetime(data['timestamp']))
+            setattr(self, f'{name}_data', data)
+            print(f"Loaded {name.upper()} data: {len(data)} records")
+
+    def load_store(self, store, tables=('cdr', 'ipdr', 'tdr')):
+        """Correlate through indexed tables of a CaseStore instead of matching frames row by row.
+        Only the given tables are used; they must hold the same data as the loaded frames."""
+        self.store = store
+        self.store_tables = set(tables)
+
+    def _stored(self, *tables):
+        """Stored kinds of the columns of each table, or None unless all are in the store with timestamps"""
+        if self.store is None or not set(tables) <= self.store_tables:
+            return None
+        infos = [self.store.info(table) for table in tables]
+        if any(info is None or info['columns'].get('timestamp') != 'datetime' for info in infos):
+            return None
+        return [info['columns'] for info in infos]
+
+    def _stored_column(self, alias, kinds, column):
+        return f'{alias}."{column}"' if column in kinds else 'NULL'
+
     def correlate_cdr_tdr(self, time_window_minutes=30):
         """Correlate CDR and TDR data to find matching calls and tower pings."""
-        if self.cdr_data is None or self.tdr_data is None:
+        stored = self._stored('cdr', 'tdr')
+        if stored is None and (self.cdr_data is None or self.tdr_data is None):
             print("Error: Both CDR and TDR data must be loaded for correlation.")
             return None
 
         print("Correlating CDR and TDR data...")
 
+        if stored is not None:
+            result_df = self._stored_cdr_tdr(time_window_minutes, *stored)
+        else:
+            result_df = self._match_cdr_tdr(time_window_minutes)
+        if result_df.empty:
+            print("No correlations found between CDR and TDR data.")
+            return None
+
+        print(f"Found {len(result_df)} correlations between calls and tower pings.")
+        self.correlation_results['cdr_tdr'] = result_df
+        return result_df
+
+    def _stored_cdr_tdr(self, time_window_minutes, cdr_kinds, tdr_kinds):
+        """CDR/TDR matches as one indexed range join: pings of the same number within the window"""
+        if 'source_number' not in cdr_kinds or 'source_number' not in tdr_kinds:
+            return pd.DataFrame()
+        window = int(pd.Timedelta(minutes=time_window_minutes).value)
+        result_df = self.store.select(
+            f'''SELECT c.timestamp AS call_timestamp, t.timestamp AS tower_timestamp,
+                       c.source_number AS phone_number,
+                       {self._stored_column('c', cdr_kinds, 'destination_number')} AS called_number,
+                       {self._stored_column('t', tdr_kinds, 'cell_id')} AS cell_id,
+                       {self._stored_column('t', tdr_kinds, 'imsi')} AS imsi
+                FROM cdr c JOIN tdr t
+                  ON t.source_number = c.source_number
+                 AND t.timestamp BETWEEN c.timestamp - ? AND c.timestamp + ?
+                ORDER BY c.rowid, t.rowid''',
+            (window, window),
+            kinds={'call_timestamp': 'datetime', 'tower_timestamp': 'datetime',
+                   'phone_number': cdr_kinds['source_number'], 'called_number': cdr_kinds.get('destination_number'),
+                   'cell_id': tdr_kinds.get('cell_id'), 'imsi': tdr_kinds.get('imsi')}
+        )
+        if not result_df.empty:
+            result_df['time_diff_minutes'] = (result_df['call_timestamp'] - result_df['tower_timestamp']).abs().dt.total_seconds() / 60
+        return result_df
+
+    def _match_cdr_tdr(self, time_window_minutes):
         results = []
         for _, call in self.cdr_data.iterrows():
             call_time = call['timestamp']
@@ -61,23 +130,53 @@ class CorrelationEngine:
                     'time_diff_minutes': abs((call_time - ping['timestamp']).total_seconds()) / 60
                 })
 
-        result_df = pd.DataFrame(results)
-        if result_df.empty:
-            print("No correlations found between CDR and TDR data.")
-            return None
-
-        print(f"Found {len(result_df)} correlations between calls and tower pings.")
-        self.correlation_results['cdr_tdr'] = result_df
-        return result_df
+        return pd.DataFrame(results)
 
     def correlate_ipdr_cdr(self, time_window_minutes=5):
         """Correlate IPDR and CDR data to find potential VoIP calls matching regular calls."""
-        if self.ipdr_data is None or self.cdr_data is None:
+        stored = self._stored('ipdr', 'cdr')
+        if stored is None and (self.ipdr_data is None or self.cdr_data is None):
             print("Error: Both IPDR and CDR data must be loaded for correlation.")
             return None
 
         print("Correlating IPDR and CDR data...")
 
+        if stored is not None:
+            result_df = self._stored_ipdr_cdr(time_window_minutes, *stored)
+        else:
+            result_df = self._match_ipdr_cdr(time_window_minutes)
+        if result_df.empty:
+            print("No correlations found between IPDR and CDR data.")
+            return None
+
+        print(f"Found {len(result_df)} correlations between calls and IP traffic.")
+        self.correlation_results['ipdr_cdr'] = result_df
+        return result_df
+
+    def _stored_ipdr_cdr(self, time_window_minutes, ipdr_kinds, cdr_kinds):
+        """IPDR/CDR matches as one range join on the indexed IPDR timestamps"""
+        window = int(pd.Timedelta(minutes=time_window_minutes).value)
+        result_df = self.store.select(
+            f'''SELECT c.timestamp AS call_timestamp, i.timestamp AS ip_timestamp,
+                       {self._stored_column('c', cdr_kinds, 'source_number')} AS phone_number,
+                       {self._stored_column('c', cdr_kinds, 'destination_number')} AS called_number,
+                       {self._stored_column('i', ipdr_kinds, 'src_ip')} AS src_ip,
+                       {self._stored_column('i', ipdr_kinds, 'dst_ip')} AS dst_ip,
+                       {self._stored_column('i', ipdr_kinds, 'protocol')} AS protocol
+                FROM cdr c JOIN ipdr i
+                  ON i.timestamp BETWEEN c.timestamp - ? AND c.timestamp + ?
+                ORDER BY c.rowid, i.rowid''',
+            (window, window),
+            kinds={'call_timestamp': 'datetime', 'ip_timestamp': 'datetime',
+                   'phone_number': cdr_kinds.get('source_number'), 'called_number': cdr_kinds.get('destination_number'),
+                   'src_ip': ipdr_kinds.get('src_ip'), 'dst_ip': ipdr_kinds.get('dst_ip'),
+                   'protocol': ipdr_kinds.get('protocol')}
+        )
+        if not result_df.empty:
+            result_df['time_diff_minutes'] = (result_df['call_timestamp'] - result_df['ip_timestamp']).abs().dt.total_seconds() / 60
+        return result_df
+
+    def _match_ipdr_cdr(self, time_window_minutes):
         results = []
         for _, call in self.cdr_data.iterrows():
             call_time = call['timestamp']
@@ -100,14 +199,7 @@ class CorrelationEngine:
                     'time_diff_minutes': abs((call_time - traffic['timestamp']).total_seconds()) / 60
                 })
 
-        result_df = pd.DataFrame(results)
-        if result_df.empty:
-            print("No correlations found between IPDR and CDR data.")
-            return None
-
-        print(f"Found {len(result_df)} correlations between calls and IP traffic.")
-        self.correlation_results['ipdr_cdr'] = result_df
-        return result_df
+        return pd.DataFrame(results)
 
     def correlate_all(self, time_window_minutes=30):
         """Correlate all data types to find comprehensive patterns."""
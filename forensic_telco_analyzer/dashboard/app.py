@@ -2,7 +2,7 @@
 import dash
 from dash import dcc
 from dash import html
-from dash.dependencies import Input, Output
+from dash.dependencies import MATCH, Input, Output, State
 import pandas as pd
 import os
 import plotly.express as px
@@ -17,6 +17,18 @@ import matplotlib.pyplot as plt
 import matplotlib
 matplotlib.use('Agg')  # Use the non-GUI Agg backend
 import time
+import gzip
+from markupsafe import escape
+from forensic_telco_analyzer.tdr.batch_maps import MANIFEST_FILE, load_manifest
+from forensic_telco_analyzer.dashboard.charts import bar_chart, pie_chart, timeline_figure
+from forensic_telco_analyzer.dashboard.data_access import DatasetCache
+from forensic_telco_analyzer.dashboard.metrics import metrics
+from forensic_telco_analyzer.dashboard.map_service import TDR_READ_OPTIONS, MapCache, MapService
+from forensic_telco_analyzer.analysis.graph_layout import GraphLayout
+from forensic_telco_analyzer.dashboard.jobs import JobRunner
+from forensic_telco_analyzer.dashboard.network_view import LAYOUT_CACHE_DIR, build_network_view
+from forensic_telco_analyzer.dashboard.tables import TABLE_TYPE, TableViews, server_table
+from forensic_telco_analyzer.store import CASE_DB, CaseStore
 
 
 # Configure logging
@@ -27,98 +39,20 @@ app = dash.Dash(__name__, suppress_callback_exceptions=True, assets_folder='asse
 server = app.server
 app.title = 'Forensic Telecommunications Analysis Dashboard'
 
-# Define the NetworkAnalyzer class
-class NetworkAnalyzer:
-    def __init__(self, correlated_file):
-        """
-        Initialize the NetworkAnalyzer with the path to the correlated data file.
-        Args:
-            correlated_file (str): Path to the correlated data CSV file.
-        """
-        if not correlated_file or not os.path.exists(correlated_file):
-            raise FileNotFoundError(f"File not found: {correlated_file}")
-        
-        logging.info(f"Loading correlated data from {correlated_file}...")
-        self.data = pd.read_csv(correlated_file)
-        self.graph = nx.Graph()
-
-    def build_graph(self):
-        """Build a graph from CDR data."""
-        logging.info("Building communication network graph...")
-        for _, row in self.data.iterrows():
-            src = row['source_number']
-            dst = row['destination_number']
-            if not self.graph.has_edge(src, dst):
-                self.graph.add_edge(src, dst, weight=1)
-            else:
-                self.graph[src][dst]['weight'] += 1
-        logging.info(f"Graph built with {self.graph.number_of_nodes()} nodes and {self.graph.number_of_edges()} edges.")
-
-    def calculate_centrality(self):
-        """Calculate centrality measures."""
-        logging.info("Calculating centrality measures...")
-        degree_centrality = nx.degree_centrality(self.graph)
-        betweenness_centrality = nx.betweenness_centrality(self.graph)
-        pagerank = nx.pagerank(self.graph)
-        
-        centrality_df = pd.DataFrame({
-            'Node': list(degree_centrality.keys()),
-            'Degree Centrality': list(degree_centrality.values()),
-            'Betweenness Centrality': list(betweenness_centrality.values()),
-            'PageRank': list(pagerank.values())
-        }).sort_values(by='PageRank', ascending=False)
-        
-        logging.info("Centrality measures calculated.")
-        return centrality_df
+# Time every route and callback; Prometheus metrics are served on /metrics
+metrics.init_app(server)
 
-    def visualize_graph(self, output_file=None):
-        """Visualize the communication network graph."""
-        logging.info("Visualizing the graph...")
-        pos = nx.spring_layout(self.graph, seed=42)
-        
-        # Draw the graph using Matplotlib
-        plt.figure(figsize=(12, 12))
-        nx.draw(
-            self.graph,
-            pos,
-            with_labels=True,
-            node_size=50,
-            font_size=8,
-            edge_color='gray',
-            node_color='skyblue',
-            alpha=0.7
-        )
-        
-        if output_file:
-            plt.savefig(output_file)
-            logging.info(f"Graph visualization saved to {output_file}.")
-        
-        plt.close()  # Close figure to free memory
+# Processed artifacts are parsed once and shared by every callback until the files change
+datasets = DatasetCache()
 
-def analyze_correlated_network(correlated_file):
-    """Perform network analysis on correlated data."""
-    logging.info("Performing network analysis...")
-    
-    # Load correlated data
-    data = pd.read_csv(correlated_file)
-    
-    # Initialize NetworkAnalyzer
-    analyzer = NetworkAnalyzer(correlated_file)
-    
-    # Build graph and calculate centrality measures
-    analyzer.build_graph()
-    centrality_df = analyzer.calculate_centrality()
-    
-    # Save centrality measures
-    os.makedirs("data/processed", exist_ok=True)
-    centrality_df.to_csv("data/processed/centrality_measures.csv", index=False)
-    
-    # Visualize graph
-    static_dir = os.path.join(os.getcwd(), 'static')
-    if not os.path.exists(static_dir):
-        os.makedirs(static_dir)
-    graph_output_path = os.path.join(static_dir, 'network_graph.png')
-    analyzer.visualize_graph(output_file=graph_output_path)
+# Table pages are sliced from the cached frames; only the rows on screen go to the browser
+table_views = TableViews(datasets, store=CaseStore(os.path.join('data', 'processed', CASE_DB)))
+
+# Movement maps are rendered on demand in a background process and served by URL
+map_service = MapService(os.path.join('data', 'processed'), datasets=datasets)
+
+# Heavy callbacks run in worker processes; the job table is shared by every server process
+job_runner = JobRunner()
 
 app.layout = html.Div([
     html.H1("Network Analysis"),
@@ -252,12 +186,33 @@ app.layout = html.Div([
                          ],
                         value=None,
                         placeholder='Select a correlation file'
-                    )
+                    ),
+                    html.Label('Focus on Number (optional):'),
+                    dcc.Input(id='network-target', type='text', debounce=True,
+                              placeholder='Phone number', style={'width': '60%'}),
+                    html.Label(' Hops: '),
+                    dcc.Input(id='network-hops', type='number', min=1, max=3, step=1, value=2,
+                              debounce=True, style={'width': '15%'})
                 ], style={'width': '50%', 'margin': '0 auto', 'marginBottom': 20}),
+                html.Div([
+                    html.Button('Cancel', id='network-job-cancel', n_clicks=0)
+                ], style={'textAlign': 'center', 'marginBottom': 20}),
+                dcc.Store(id='network-job'),
+                # Polls the running network analysis job
+                dcc.Interval(id='network-job-poll', interval=1000, disabled=True),
                 html.Div(id='network-graph-content')
             ])
         ]),
 
+        # Diagnostics Tab
+        dcc.Tab(label='Diagnostics', children=[
+            html.Div([
+                html.H3('Callback Performance', style={'textAlign': 'center'}),
+                dcc.Interval(id='diagnostics-poll', interval=5000),
+                html.Div(id='diagnostics-content')
+            ])
+        ]),
+
     ], style={'marginTop': 20})
 ], style={'padding': 20, 'fontFamily': 'Arial'})
 
@@ -275,6 +230,7 @@ def download_report():
     Output('dynamic-content', 'children'),
     [Input('parent-dropdown', 'value')]
 )
+@metrics.instrument
 def generate_network_dropdown(selected_value):
     if selected_value:
         return html.Div([
@@ -292,16 +248,39 @@ def generate_network_dropdown(selected_value):
     Output('network-content', 'children'),
     [Input('network-dropdown', 'value')]
 )
+@metrics.instrument
 def update_network_content(selected_option):
     if selected_option:
         return html.Div(f'Selected Network Option: {selected_option}', style={'textAlign': 'center'})
     return html.Div('Please select a network option.', style={'textAlign': 'center'})
 
+# Serve one page of any server-side table, after its filter and sort
+@app.callback(
+    [Output({'type': TABLE_TYPE, 'index': MATCH}, 'data'),
+     Output({'type': TABLE_TYPE, 'index': MATCH}, 'page_count')],
+    [Input({'type': TABLE_TYPE, 'index': MATCH}, 'page_current'),
+     Input({'type': TABLE_TYPE, 'index': MATCH}, 'page_size'),
+     Input({'type': TABLE_TYPE, 'index': MATCH}, 'sort_by'),
+     Input({'type': TABLE_TYPE, 'index': MATCH}, 'filter_query')],
+    [State({'type': TABLE_TYPE, 'index': MATCH}, 'id')]
+)
+@metrics.instrument
+def update_server_table(page_current, page_size, sort_by, filter_query, table_id):
+    try:
+        records, page_count = table_views.page(table_id['index'], page_current, page_size, sort_by, filter_query)
+    except Exception as e:
+        logging.error(f"Error loading table page for {table_id['index']}: {str(e)}", exc_info=True)
+        return [], 1
+    if records is None:
+        return [], 1
+    return records, page_count
+
 # Callback for CDR content
 @app.callback(
     Output('cdr-content', 'children'),
     [Input('cdr-content', 'id')]
 )
+@metrics.instrument
 def update_cdr_content(_):
     # Check for frequent contacts data
     frequent_contacts_file = os.path.join('data', 'processed', 'frequent_contacts.csv')
@@ -312,15 +291,16 @@ def update_cdr_content(_):
     # Load and display frequent contacts
     if os.path.exists(frequent_contacts_file):
         try:
-            frequent_contacts = pd.read_csv(frequent_contacts_file)
+            frequent_contacts = datasets.frame(frequent_contacts_file)
             if not frequent_contacts.empty:
                 # Ensure the data has valid lengths for plotting
                 if len(frequent_contacts.columns) >= 2:
-                    fig = px.bar(
-                        x=frequent_contacts.iloc[:, 0],  # First column (e.g., phone numbers)
-                        y=frequent_contacts.iloc[:, 1],  # Second column (e.g., call counts)
-                        labels={'x': 'Phone Number', 'y': 'Number of Calls'},
-                        title='Frequent Contacts Analysis'
+                    fig = bar_chart(
+                        frequent_contacts.iloc[:, 0],  # First column (e.g., phone numbers)
+                        frequent_contacts.iloc[:, 1],  # Second column (e.g., call counts)
+                        title='Frequent Contacts Analysis',
+                        x_label='Phone Number',
+                        y_label='Number of Calls'
                     )
                     content.append(dcc.Graph(figure=fig))
                 else:
@@ -334,20 +314,11 @@ def update_cdr_content(_):
     # Load and display unusual calls
     if os.path.exists(unusual_calls_file):
         try:
-            unusual_calls = pd.read_csv(unusual_calls_file)
+            unusual_calls = datasets.frame(unusual_calls_file)
             if not unusual_calls.empty:
                 content.append(html.H4('Unusual Call Patterns'))
                 content.append(html.Div([
-                    dash.dash_table.DataTable(
-                        data=unusual_calls.to_dict('records'),
-                        columns=[{'name': i, 'id': i} for i in unusual_calls.columns],
-                        style_table={'overflowX': 'auto'},
-                        style_cell={'textAlign': 'left'},
-                        style_header={
-                            'backgroundColor': 'rgb(230, 230, 230)',
-                            'fontWeight': 'bold'
-                        }
-                    )
+                    server_table(unusual_calls_file, unusual_calls)
                 ]))
             else:
                 content.append(html.Div("No unusual call patterns found.", style={'textAlign': 'center'}))
@@ -366,6 +337,7 @@ def update_cdr_content(_):
     Output('ipdr-content', 'children'),
     [Input('ipdr-content', 'id')]
 )
+@metrics.instrument
 def update_ipdr_content(_):
     # Check for IPDR analysis files
     top_source_file = os.path.join('data', 'processed', 'top_source_ips.csv')
@@ -377,46 +349,34 @@ def update_ipdr_content(_):
     # Load and display top source IPs
     if os.path.exists(top_source_file):
         try:
-            top_sources = pd.read_csv(top_source_file)
+            top_sources = datasets.frame(top_source_file)
             if not top_sources.empty:
-                fig = px.bar(
-                    top_sources, 
-                    x='ip_address', 
-                    y='count',
-                    title='Top Source IP Addresses'
-                )
+                fig = bar_chart(top_sources['ip_address'], top_sources['count'], title='Top Source IP Addresses', x_label='IP Address')
                 content.append(dcc.Graph(figure=fig))
         except Exception as e:
+            logging.error(f"Error loading top source IPs: {str(e)}", exc_info=True)
             content.append(html.Div(f"Error loading top source IPs: {str(e)}"))
     
     # Load and display top destination IPs
     if os.path.exists(top_dest_file):
         try:
-            top_dests = pd.read_csv(top_dest_file)
+            top_dests = datasets.frame(top_dest_file)
             if not top_dests.empty:
-                fig = px.bar(
-                    top_dests, 
-                    x='ip_address', 
-                    y='count',
-                    title='Top Destination IP Addresses'
-                )
+                fig = bar_chart(top_dests['ip_address'], top_dests['count'], title='Top Destination IP Addresses', x_label='IP Address')
                 content.append(dcc.Graph(figure=fig))
         except Exception as e:
+            logging.error(f"Error loading top destination IPs: {str(e)}", exc_info=True)
             content.append(html.Div(f"Error loading top destination IPs: {str(e)}"))
     
     # Load and display protocol distribution
     if os.path.exists(protocol_file):
         try:
-            protocols = pd.read_csv(protocol_file)
+            protocols = datasets.frame(protocol_file)
             if not protocols.empty:
-                fig = px.pie(
-                    protocols, 
-                    names='protocol', 
-                    values='count',
-                    title='Protocol Distribution'
-                )
+                fig = pie_chart(protocols['protocol'], protocols['count'], title='Protocol Distribution')
                 content.append(dcc.Graph(figure=fig))
         except Exception as e:
+            logging.error(f"Error loading protocol distribution: {str(e)}", exc_info=True)
             content.append(html.Div(f"Error loading protocol distribution: {str(e)}"))
     
     # If no data is available
@@ -430,6 +390,7 @@ def update_ipdr_content(_):
     Output('tdr-content', 'children'),
     [Input('tdr-content', 'id')]
 )
+@metrics.instrument
 def update_tdr_content(_):
     # Check for TDR analysis files
     processed_tdr_file = os.path.join('data', 'processed', 'processed_tdr.csv')
@@ -440,59 +401,41 @@ def update_tdr_content(_):
     # Load and display processed TDR data
     if os.path.exists(processed_tdr_file):
         try:
-            tdr_data = pd.read_csv(processed_tdr_file)
+            tdr_data = datasets.frame(processed_tdr_file, **TDR_READ_OPTIONS)
             if not tdr_data.empty:
                 # Show summary of TDR data
                 content.append(html.H4('TDR Data Summary'))
                 
-                # Count by IMSI
-                imsi_counts = tdr_data['imsi'].value_counts().reset_index()
-                imsi_counts.columns = ['IMSI', 'Count']
-                
-                fig = px.bar(
-                    imsi_counts, 
-                    x='IMSI', 
-                    y='Count',
-                    title='Records by IMSI'
+                # Count by IMSI from the cached index, busiest IMSIs plus an "Other" bar
+                imsi_index = datasets.index(processed_tdr_file, 'imsi', **TDR_READ_OPTIONS)
+                fig = bar_chart(
+                    list(imsi_index.keys()),
+                    [len(rows) for rows in imsi_index.values()],
+                    title='Records by IMSI',
+                    x_label='IMSI'
                 )
                 content.append(dcc.Graph(figure=fig))
                 
-                # Show first few rows of TDR data
-                content.append(html.H4('TDR Data Sample'))
+                # Page through the TDR records on the server
+                content.append(html.H4('TDR Records'))
                 content.append(html.Div([
-                    dash.dash_table.DataTable(
-                        data=tdr_data.head(10).to_dict('records'),
-                        columns=[{'name': i, 'id': i} for i in tdr_data.columns],
-                        style_table={'overflowX': 'auto'},
-                        style_cell={'textAlign': 'left'},
-                        style_header={
-                            'backgroundColor': 'rgb(230, 230, 230)',
-                            'fontWeight': 'bold'
-                        }
-                    )
+                    server_table(processed_tdr_file, tdr_data)
                 ]))
         except Exception as e:
+            logging.error(f"Error loading TDR data: {str(e)}", exc_info=True)
             content.append(html.Div(f"Error loading TDR data: {str(e)}"))
     
     # Load and display co-location analysis
     if os.path.exists(co_location_file):
         try:
-            co_location = pd.read_csv(co_location_file)
+            co_location = datasets.frame(co_location_file)
             if not co_location.empty:
                 content.append(html.H4('Co-Location Analysis'))
                 content.append(html.Div([
-                    dash.dash_table.DataTable(
-                        data=co_location.to_dict('records'),
-                        columns=[{'name': i, 'id': i} for i in co_location.columns],
-                        style_table={'overflowX': 'auto'},
-                        style_cell={'textAlign': 'left'},
-                        style_header={
-                            'backgroundColor': 'rgb(230, 230, 230)',
-                            'fontWeight': 'bold'
-                        }
-                    )
+                    server_table(co_location_file, co_location)
                 ]))
         except Exception as e:
+            logging.error(f"Error loading co-location analysis: {str(e)}", exc_info=True)
             content.append(html.Div(f"Error loading co-location analysis: {str(e)}"))
     
     # If no data is available
@@ -501,21 +444,53 @@ def update_tdr_content(_):
     
     return html.Div(content)
 
+# Upper bound on IMSIs listed in the map dropdown at once
+MAP_DROPDOWN_IMSI_LIMIT = 200
+
+# Shown while a movement map is rendered; reloads itself until the map is ready
+MAP_PENDING_PAGE = """<!DOCTYPE html>
+<html><head><meta http-equiv="refresh" content="2"></head>
+<body style="font-family: Arial; text-align: center; margin-top: 40px;">Generating map, please wait...</body></html>"""
+
 # Callback to populate map dropdown
 @app.callback(
     Output('map-dropdown', 'options'),
-    [Input('map-dropdown', 'id')]
+    [Input('map-dropdown', 'search_value')],
+    [State('map-dropdown', 'value')]
 )
-def update_map_dropdown(_):
+@metrics.instrument
+def update_map_dropdown(search_value, selected_map):
     processed_dir = os.path.join('data', 'processed')
-    if os.path.exists(processed_dir):
-        map_files = [
-            {'label': file, 'value': os.path.join(processed_dir, file)}
-            for file in os.listdir(processed_dir) if file.endswith('.html')
-        ]
-        return map_files
+    manifest_path = os.path.join(processed_dir, MANIFEST_FILE)
+    # When maps can be generated on demand, movement maps are listed per IMSI instead
+    on_demand = map_service.available()
+    options = []
     
-    return []
+    if os.path.exists(manifest_path):
+        # Prefer the manifest written by the map rendering stage over a directory scan
+        manifest = load_manifest(processed_dir)
+        options.extend(
+            {'label': entry.get('label', entry['file']), 'value': f"file:{entry['file']}"}
+            for entry in manifest['maps'].values()
+            if entry['file'].endswith('.html') and not (on_demand and entry.get('kind') == 'movement')
+        )
+    else:
+        options.extend(
+            {'label': file, 'value': f'file:{file}'}
+            for file in map_service.map_files()
+            if not (on_demand and file.startswith('movement_map_'))
+        )
+    
+    # Offer a bounded number of IMSIs, narrowed by what the user types
+    imsis = map_service.imsis() if on_demand else []
+    if search_value:
+        imsis = [imsi for imsi in imsis if search_value in imsi]
+    imsi_values = [f'imsi:{imsi}' for imsi in imsis[:MAP_DROPDOWN_IMSI_LIMIT]]
+    if selected_map and selected_map.startswith('imsi:') and selected_map not in imsi_values:
+        imsi_values.insert(0, selected_map)
+    options.extend({'label': f"Movement map - IMSI {value[5:]}", 'value': value} for value in imsi_values)
+    
+    return options
 
 # Callback to display selected map
 @app.callback(
@@ -523,22 +498,68 @@ def update_map_dropdown(_):
     [Input('map-dropdown', 'value')],
     prevent_initial_call=True
 )
+@metrics.instrument
 def update_map_content(selected_map):
     if not selected_map:
         # If no map is selected, display a message
         return html.Div('Please select a map to display.', style={'textAlign': 'center', 'marginTop': '20px'})
     
-    try:
-        # Dynamically create an iframe to display the selected HTML map
-        return html.Div([
-            html.Iframe(
-                srcDoc=open(selected_map, 'r').read(),  # Dynamically load the HTML content
-                style={'width': '100%', 'height': '600px', 'border': 'none'}
-            )
-        ])
-    except Exception as e:
-        # Handle errors gracefully and display an error message
-        return html.Div(f"Error loading map: {str(e)}", style={'textAlign': 'center', 'color': 'red'})
+    # The iframe fetches the map by URL, so the callback payload stays small
+    kind, _, name = selected_map.partition(':')
+    if kind == 'imsi':
+        src = f'/maps/movement/{name}'
+    else:
+        src = f'/maps/file/{os.path.basename(name)}'
+    
+    return html.Div([
+        html.Iframe(
+            src=src,
+            style={'width': '100%', 'height': '600px', 'border': 'none'}
+        )
+    ])
+
+def send_cached_map(key):
+    """Serve a cached map with gzip encoding and ETag revalidation"""
+    path = map_service.cache.get(key)
+    if path is None:
+        return "Map not found.", 404
+    
+    etag = MapCache.etag(key)
+    if flask.request.if_none_match.contains(etag):
+        response = flask.Response(status=304)
+    else:
+        with open(path, 'rb') as f:
+            body = f.read()
+        if 'gzip' in flask.request.accept_encodings:
+            response = flask.Response(body, mimetype='text/html')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = flask.Response(gzip.decompress(body), mimetype='text/html')
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+@app.server.route('/maps/movement/<imsi>')
+def serve_movement_map(imsi):
+    if not map_service.has_imsi(imsi):
+        return "No tower data for this IMSI.", 404
+    status, key = map_service.request(imsi)
+    if status == 'ready':
+        return send_cached_map(key)
+    if status == 'pending':
+        return MAP_PENDING_PAGE, 202
+    if status == 'failed':
+        return f"Failed to generate map for IMSI {escape(imsi)}.", 500
+    return f"No tower data for IMSI {escape(imsi)}.", 404
+
+@app.server.route('/maps/file/<file_name>')
+def serve_map_file(file_name):
+    key = map_service.file_entry(file_name)
+    if key is None:
+        return "Map not found.", 404
+    return send_cached_map(key)
 
 # Callback for Correlation content
 @app.callback(
@@ -546,6 +567,7 @@ def update_map_content(selected_map):
     [Input('correlation-content', 'id')],
     
 )
+@metrics.instrument
 def update_correlation_content(_):
     # Check for correlation result files
     cdr_tdr_file = os.path.join('data', 'processed', 'cdr_tdr_correlation.csv')
@@ -557,64 +579,58 @@ def update_correlation_content(_):
     # Load and display CDR-TDR correlations
     if os.path.exists(cdr_tdr_file):
         try:
-            cdr_tdr = pd.read_csv(cdr_tdr_file)
-            if not cdr_tdr.empty:
+            # Large tables with a current copy in the case store are paged from it without loading the CSV
+            preview = table_views.preview(cdr_tdr_file)
+            if preview is not None:
+                cdr_tdr, rows = preview
+            else:
+                cdr_tdr = datasets.frame(cdr_tdr_file)
+                rows = len(cdr_tdr)
+            if rows:
                 content.append(html.H4('CDR-TDR Correlations'))
                 content.append(html.Div([
-                    dash.dash_table.DataTable(
-                        data=cdr_tdr.head(10).to_dict('records'),
-                        columns=[{'name': i, 'id': i} for i in cdr_tdr.columns],
-                        style_table={'overflowX': 'auto'},
-                        style_cell={'textAlign': 'left'},
-                        style_header={
-                            'backgroundColor': 'rgb(230, 230, 230)',
-                            'fontWeight': 'bold'
-                        }
-                    )
+                    server_table(cdr_tdr_file, cdr_tdr, rows=rows)
                 ]))
         except Exception as e:
+            logging.error(f"Error loading CDR-TDR correlations: {str(e)}", exc_info=True)
             content.append(html.Div(f"Error loading CDR-TDR correlations: {str(e)}"))
 
     # Load and display IPDR-CDR correlations
     if os.path.exists(ipdr_cdr_file):
         try:
-            ipdr_cdr = pd.read_csv(ipdr_cdr_file)
-            if not ipdr_cdr.empty:
+            # Large tables with a current copy in the case store are paged from it without loading the CSV
+            preview = table_views.preview(ipdr_cdr_file)
+            if preview is not None:
+                ipdr_cdr, rows = preview
+            else:
+                ipdr_cdr = datasets.frame(ipdr_cdr_file)
+                rows = len(ipdr_cdr)
+            if rows:
                 content.append(html.H4('IPDR-CDR Correlations'))
                 content.append(html.Div([
-                    dash.dash_table.DataTable(
-                        data=ipdr_cdr.head(10).to_dict('records'),
-                        columns=[{'name': i, 'id': i} for i in ipdr_cdr.columns],
-                        style_table={'overflowX': 'auto'},
-                        style_cell={'textAlign': 'left'},
-                        style_header={
-                            'backgroundColor': 'rgb(230, 230, 230)',
-                            'fontWeight': 'bold'
-                        }
-                    )
+                    server_table(ipdr_cdr_file, ipdr_cdr, rows=rows)
                 ]))
         except Exception as e:
+            logging.error(f"Error loading IPDR-CDR correlations: {str(e)}", exc_info=True)
             content.append(html.Div(f"Error loading IPDR-CDR correlations: {str(e)}"))
 
     # Load and display all correlations
     if os.path.exists(all_corr_file):
         try:
-            all_corr = pd.read_csv(all_corr_file)
-            if not all_corr.empty:
+            # Large tables with a current copy in the case store are paged from it without loading the CSV
+            preview = table_views.preview(all_corr_file)
+            if preview is not None:
+                all_corr, rows = preview
+            else:
+                all_corr = datasets.frame(all_corr_file)
+                rows = len(all_corr)
+            if rows:
                 content.append(html.H4('All Data Correlations'))
                 content.append(html.Div([
-                    dash.dash_table.DataTable(
-                        data=all_corr.head(10).to_dict('records'),
-                        columns=[{'name': i, 'id': i} for i in all_corr.columns],
-                        style_table={'overflowX': 'auto'},
-                        style_cell={'textAlign': 'left'},
-                        style_header={
-                            'backgroundColor': 'rgb(230, 230, 230)',
-                            'fontWeight': 'bold'
-                        }
-                    )
+                    server_table(all_corr_file, all_corr, rows=rows)
                 ]))
         except Exception as e:
+            logging.error(f"Error loading all correlations: {str(e)}", exc_info=True)
             content.append(html.Div(f"Error loading all correlations: {str(e)}"))
 
     # If no data is available
@@ -628,25 +644,17 @@ def update_correlation_content(_):
     Output('osint-content', 'children'),
     [Input('osint-content', 'id')]
 )
+@metrics.instrument
 def update_osint_content(_):
     osint_file = os.path.join('data', 'processed', 'osint_results.csv')
     print(f"OSINT file path: {osint_file}")  # Debug print statement
     
     if os.path.exists(osint_file):
         try:
-            osint_data = pd.read_csv(osint_file)
+            osint_data = datasets.frame(osint_file)
             if not osint_data.empty:
                 return html.Div([
-                    dash.dash_table.DataTable(
-                        data=osint_data.to_dict('records'),
-                        columns=[{'name': i, 'id': i} for i in osint_data.columns],
-                        style_table={'overflowX': 'auto'},
-                        style_cell={'textAlign': 'left'},
-                        style_header={
-                            'backgroundColor': 'rgb(230, 230, 230)',
-                            'fontWeight': 'bold'
-                        }
-                    )
+                    server_table(osint_file, osint_data)
                 ])
             else:
                 return html.Div("No OSINT data available.", style={'textAlign': 'center'})
@@ -661,6 +669,7 @@ def update_osint_content(_):
     Output('timeline-content', 'children'),
     [Input('timeline-dropdown', 'value')]
 )
+@metrics.instrument
 def update_timeline(selected_phone):
     if not selected_phone:
         return html.Div('Please select a phone number to view its timeline.', style={'textAlign': 'center'})
@@ -669,25 +678,21 @@ def update_timeline(selected_phone):
         correlated_file = os.path.join('data', 'processed', 'correlated_osint_cdr.csv')
         
         if os.path.exists(correlated_file):
-            data = pd.read_csv(correlated_file)
-            
-            # Filter events for the selected phone number
-            events = data[data['source_number'] == selected_phone]
+            # Events for the selected phone number, looked up through the cached source_number index
+            events = datasets.rows(correlated_file, 'source_number', selected_phone)
 
-            fig = px.timeline(
+            # Busiest contacts on their own rows; large selections are bucketed to the plot width
+            fig = timeline_figure(
                 events,
-                x_start="timestamp",
-                x_end="timestamp",
-                y="destination_number",
-                title=f"Timeline of Events for {selected_phone}",
-                labels={"destination_number": "Contact", "timestamp": "Time"}
+                time_column='timestamp',
+                category_column='destination_number',
+                title=f"Timeline of Events for {selected_phone}"
             )
 
-            fig.update_layout(height=600)
-
             return dcc.Graph(figure=fig)
 
     except Exception as e:
+        logging.error(f"Error generating timeline: {str(e)}", exc_info=True)
         return html.Div(f"Error generating timeline: {str(e)}", style={'color': 'red', 'textAlign': 'center'})
 
 
@@ -696,62 +701,125 @@ def update_timeline(selected_phone):
     Output('timeline-dropdown', 'options'),
     [Input('timeline-dropdown', 'id')]
 )
+@metrics.instrument
 def populate_phone_numbers(_):
     cdr_file = os.path.join('data', 'processed', 'correlated_osint_cdr.csv')
     if os.path.exists(cdr_file):
         try:
-            cdr_data = pd.read_csv(cdr_file)
-            unique_numbers = cdr_data['source_number'].unique()
+            unique_numbers = datasets.index(cdr_file, 'source_number').keys()
             return [{'label': number, 'value': number} for number in unique_numbers]
         except Exception as e:
-            print(f"Error loading phone numbers: {str(e)}")
+            logging.error(f"Error loading phone numbers: {str(e)}", exc_info=True)
     return []
 
     
-# Callback for Network Graph content
+# Callback for Network Graph content: the analysis runs as a background job and is polled
 @app.callback(
-    Output('network-graph-content', 'children'),
-    [Input('network-dropdown', 'value')]
+    [Output('network-graph-content', 'children'),
+     Output('network-job', 'data'),
+     Output('network-job-poll', 'disabled')],
+    [Input('network-dropdown', 'value'),
+     Input('network-target', 'value'),
+     Input('network-hops', 'value'),
+     Input('network-job-poll', 'n_intervals'),
+     Input('network-job-cancel', 'n_clicks')],
+    [State('network-job', 'data')]
 )
-def update_network_graph(selected_file):
-    if not selected_file:
-        return html.Div('Please select a file to display.', style={'textAlign': 'center'})
+@metrics.instrument
+def update_network_graph(selected_file, target=None, hops=2, _n_intervals=None, _cancel_clicks=None, job_id=None):
+    triggered = [t['prop_id'].split('.')[0] for t in dash.callback_context.triggered]
+
+    if 'network-job-cancel' in triggered:
+        if job_id:
+            job_runner.cancel(job_id)
+        return html.Div('Network analysis cancelled.', style={'textAlign': 'center'}), None, True
+
+    if 'network-job-poll' not in triggered:
+        # Any change of inputs starts (or joins an identical) job
+        if not selected_file:
+            return html.Div('Please select a file to display.', style={'textAlign': 'center'}), None, True
+        target = target.strip() if target else None
+        hops = int(hops or 2)
+        try:
+            job_id = job_runner.submit('network', build_network_view, (selected_file, target, hops),
+                                       key=JobRunner.make_key('network', selected_file, target, hops))
+        except Exception as e:
+            logging.error(f"Error starting network analysis: {str(e)}", exc_info=True)
+            return html.Div(f"Error starting network analysis: {str(e)}",
+                            style={'color': 'red', 'textAlign': 'center'}), None, True
+
+    if not job_id:
+        return dash.no_update, dash.no_update, True
+
+    job = job_runner.status(job_id)
+    if job is None:
+        return html.Div('Network analysis job not found.', style={'textAlign': 'center'}), None, True
+    if job['status'] == 'done':
+        return job_runner.result(job_id), None, True
+    if job['status'] == 'failed':
+        logging.error(f"Network analysis job {job_id} failed: {job['error']}")
+        return html.Div(f"Error generating network graph: {job['error']}",
+                        style={'color': 'red', 'textAlign': 'center'}), None, True
+    if job['status'] == 'cancelled':
+        return html.Div('Network analysis cancelled.', style={'textAlign': 'center'}), None, True
+
+    progress = html.Div([
+        html.Progress(value=str(job['progress'] or 0), max='1', style={'width': '50%'}),
+        html.P(job['message'] or job['status'].capitalize())
+    ], style={'textAlign': 'center'})
+    return progress, job_id, False
+
+# Debug panel: where callback time goes in this server process
+@app.callback(
+    Output('diagnostics-content', 'children'),
+    [Input('diagnostics-poll', 'n_intervals')]
+)
+@metrics.instrument
+def update_diagnostics(_):
+    callbacks_df, stages_df = metrics.snapshot()
+    if callbacks_df.empty:
+        return html.Div('No callbacks recorded yet.', style={'textAlign': 'center'})
+
+    content = [html.P(f"Worker process {os.getpid()}; Prometheus metrics at /metrics")]
+    for title, frame in (('Callbacks', callbacks_df), ('Stages', stages_df)):
+        content.append(html.H4(title))
+        content.append(dash.dash_table.DataTable(
+            data=frame.to_dict('records'),
+            columns=[{'name': i, 'id': i} for i in frame.columns],
+            sort_action='native',
+            style_table={'overflowX': 'auto'},
+            style_cell={'textAlign': 'left'},
+            style_header={
+                'backgroundColor': 'rgb(230, 230, 230)',
+                'fontWeight': 'bold'
+            }
+        ))
+    return html.Div(content)
 
-    try:
-        # Perform network analysis
-        analyzer = NetworkAnalyzer(selected_file)
-        analyzer.build_graph()
-        centrality_df = analyzer.calculate_centrality()
-        
-        # Save centrality data for download
-        centrality_path = os.path.join('data', 'processed', 'centrality_measures.csv')
-        centrality_df.to_csv(centrality_path, index=False)
-
-        # Visualize the graph
-        graph_output = os.path.join('static', 'network_graph.png')
-        analyzer.visualize_graph(output_file=graph_output) # Save the graph as a static image
-
-        # Create dashboard content
-        content = [
-            html.H4("Centrality Measures"),
-            dash.dash_table.DataTable(
-                data=centrality_df.to_dict('records'),
-                columns=[{'name': i, 'id': i} for i in centrality_df.columns],
-                style_table={'overflowX': 'auto'},
-                style_cell={'textAlign': 'left'},
-                style_header={
-                    'backgroundColor': 'rgb(230, 230, 230)',
-                    'fontWeight': 'bold'
-                }
-            ),
-            html.H4("Network Graph"),
-            html.Img(src=f"/static/network_graph.png?t={time.time()}", style={'width': '100%', 'height': 'auto'})  # URL path with cache busting
-        ]
-        return html.Div(content)
+# Re-select the most central numbers inside the viewport whenever the graph is zoomed or panned
+@app.callback(
+    Output('network-figure', 'figure'),
+    [Input('network-figure', 'relayoutData')],
+    [State('network-layout', 'data')]
+)
+@metrics.instrument
+def refine_network_figure(relayout_data, layout_info):
+    if not relayout_data or not layout_info:
+        return dash.no_update
+
+    if 'xaxis.range[0]' in relayout_data and 'yaxis.range[0]' in relayout_data:
+        x_range = (relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]'])
+        y_range = (relayout_data['yaxis.range[0]'], relayout_data['yaxis.range[1]'])
+    elif 'xaxis.autorange' in relayout_data:
+        x_range = y_range = None
+    else:
+        return dash.no_update
+
+    layout = GraphLayout.load(LAYOUT_CACHE_DIR, layout_info['version'])
+    if layout is None:
+        return dash.no_update
+    return layout.figure(x_range=x_range, y_range=y_range, highlight=layout_info.get('target'))
 
-    except Exception as e:
-        return html.Div(f"Error generating network graph: {str(e)}", style={'color': 'red', 'textAlign': 'center'})
-    
 # Serve static files (e.g., images)
 @app.server.route('/assets/<path:path>')
 def serve_static(path):
@@ -762,30 +830,6 @@ def serve_static_file(filename):
     static_dir = os.path.join(os.getcwd(), 'static')
     return flask.send_from_directory(static_dir,'network_graph.png' )
 
-# After analysis, save the graph
-graph_filename = "network_graph.png"
-static_dir = 'static'  # Define the static directory
-graph_path = os.path.join(static_dir, 'network_graph.png')  # Full path
-
-# Ensure the static directory exists
-static_dir = os.path.join(os.getcwd(), 'static')
-if not os.path.exists(static_dir):
-    os.makedirs(static_dir, exist_ok=True)
-    
-# Determine the full path to your "static" directory.
-STATIC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
-    
-# Determine the full path to your "static" directory.
-STATIC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
-
-# Save the network graph image to the "static" folder.
-graph_output_path = os.path.join(static_dir, 'network_graph.png')
-# analyzer.visualize_graph(graph_output_path)
-  
-import os
-import matplotlib.pyplot as plt
-import networkx as nx
-
 def visualize_graph(graph, output_file):
     """Save network graph as an image."""
     plt.figure(figsize=(10, 8))
@@ -799,15 +843,11 @@ def visualize_graph(graph, output_file):
     plt.savefig('network_graph.png')  # Save to static folder
     plt.close()  # Close figure to free memory
 
-# Ensure the static directory exists
-static_dir = os.path.join(os.getcwd(), 'static')
-if not os.path.exists(static_dir):
-    os.makedirs(static_dir)
-
 @app.callback(
     Output('network-analysis-output', 'children'),
     [Input('network-dropdown', 'value')]
 )
+@metrics.instrument
 def update_network_analysis(selected_value):
     if not selected_value:
         return "Please select a value from the dropdown."
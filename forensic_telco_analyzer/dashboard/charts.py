@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+from pandas.tseries.frequencies import to_offset
+
+from forensic_telco_analyzer.dashboard.metrics import stage
+
+# Categories drawn individually before the rest are folded into one "Other" bucket
+TOP_N = 30
+
+# Nominal plot width the time buckets are sized for, and pixels per bucket
+CHART_WIDTH_PX = 1200
+PX_PER_BUCKET = 3
+
+# Raw events drawn one marker each; above this the timeline shows bucketed counts
+MAX_POINTS = 20000
+
+# Bucket widths tried from finest to coarsest
+BUCKET_STEPS = [pd.Timedelta(step) for step in (
+    '1s', '5s', '15s', '30s', '1min', '5min', '15min', '30min',
+    '1h', '3h', '6h', '12h', '1D', '7D', '30D'
+)]
+
+
+def top_n_counts(labels, counts=None, top_n=TOP_N, other_label='Other'):
+    """
+    Largest categories plus one bucket summing everything else.
+    Args:
+        labels (array): Raw values to count, or category labels when counts is given.
+        counts (array): Pre-aggregated counts per label.
+        top_n (int): Categories kept individually.
+        other_label (str): Name of the bucket for the remaining categories.
+    Returns:
+        DataFrame: label (str) and count columns, at most top_n + 1 rows.
+    """
+    if counts is None:
+        totals = pd.Series(labels).value_counts()
+    else:
+        totals = pd.Series(np.asarray(counts), index=np.asarray(labels)).groupby(level=0).sum()
+    top = totals.nlargest(top_n)
+    frame = pd.DataFrame({'label': top.index.astype(str), 'count': top.to_numpy()})
+
+    remaining = len(totals) - len(top)
+    if remaining > 0:
+        other = pd.DataFrame({'label': [f'{other_label} ({remaining})'], 'count': [totals.sum() - top.sum()]})
+        frame = pd.concat([frame, other], ignore_index=True)
+    return frame
+
+
+def bar_chart(labels, counts=None, title=None, x_label=None, y_label='Count', top_n=TOP_N):
+    """Bar chart of the top_n categories and an "Other" bar"""
+    with stage('aggregate'):
+        frame = top_n_counts(labels, counts, top_n)
+    figure = go.Figure(go.Bar(x=frame['label'], y=frame['count']))
+    figure.update_layout(title=title, xaxis={'title': x_label, 'type': 'category'}, yaxis={'title': y_label})
+    return figure
+
+
+def pie_chart(labels, counts=None, title=None, top_n=10):
+    """Pie chart of the top_n categories and an "Other" slice"""
+    with stage('aggregate'):
+        frame = top_n_counts(labels, counts, top_n)
+    figure = go.Figure(go.Pie(labels=frame['label'], values=frame['count']))
+    figure.update_layout(title=title)
+    return figure
+
+
+def bucket_step(start, end, width_px=CHART_WIDTH_PX, px_per_bucket=PX_PER_BUCKET):
+    """Finest bucket width that keeps start..end within width_px / px_per_bucket buckets"""
+    max_buckets = max(1, width_px // px_per_bucket)
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for step in BUCKET_STEPS:
+        if span / step <= max_buckets:
+            return step
+    return pd.Timedelta(np.ceil(span / max_buckets / BUCKET_STEPS[-1]) * BUCKET_STEPS[-1])
+
+
+def timeline_figure(events, time_column='timestamp', category_column='destination_number', title=None,
+                    top_n=TOP_N, max_points=MAX_POINTS, width_px=CHART_WIDTH_PX):
+    """
+    WebGL timeline of events per category whose size does not grow with the number of events.
+    Args:
+        events (DataFrame): One row per event.
+        time_column (str): Event time.
+        category_column (str): Row of the timeline each event is drawn on.
+        title (str): Figure title.
+        top_n (int): Categories drawn on their own row; the rest share an "Other" row.
+        max_points (int): Events drawn individually; larger inputs are shown as counts per time bucket.
+        width_px (int): Plot width the time buckets are sized for.
+    """
+    with stage('parse_times'):
+        times = pd.to_datetime(events[time_column], errors='coerce')
+        valid = times.notna().to_numpy()
+        times = times[valid]
+
+    with stage('aggregate'):
+        categories = events[category_column][valid].astype(str)
+        kept = top_n_counts(categories, top_n=top_n)['label']
+        other = kept.iloc[-1] if len(kept) > top_n else None
+        rows = categories.where(categories.isin(kept[:top_n]), other) if other is not None else categories
+
+    figure = go.Figure()
+    if len(times) <= max_points:
+        figure.add_trace(go.Scattergl(x=times, y=rows, mode='markers', marker={'size': 7},
+                                      hovertemplate='%{y}<br>%{x}<extra></extra>'))
+        subtitle = f'{len(times)} events'
+    else:
+        step = bucket_step(times.min(), times.max(), width_px)
+        start = times.min().floor('D')
+        buckets = ((times - start) // step).to_numpy()
+        row_codes, row_labels = pd.factorize(rows)
+        keys, counts = np.unique(row_codes.astype(np.int64) * (buckets.max() + 1) + buckets, return_counts=True)
+        row_of, bucket_of = np.divmod(keys, buckets.max() + 1)
+        figure.add_trace(go.Scattergl(
+            x=start + step * bucket_of + step / 2, y=np.asarray(row_labels)[row_of], mode='markers',
+            customdata=counts, hovertemplate='%{y}<br>%{x}<br>%{customdata} events<extra></extra>',
+            marker={'size': 4 + 12 * np.sqrt(counts / counts.max()), 'color': counts, 'colorscale': 'Viridis',
+                    'showscale': True, 'colorbar': {'title': 'Events'}}
+        ))
+        subtitle = f'{len(times)} events in {to_offset(step).freqstr} buckets'
+
+    figure.update_layout(
+        title=f'{title} ({subtitle})' if title else subtitle,
+        xaxis={'title': 'Time'}, yaxis={'title': 'Contact', 'type': 'category'},
+        height=600, showlegend=False
+    )
+    return figure
@@ -0,0 +1,229 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from forensic_telco_analyzer.dashboard.metrics import cache_lookup, count_rows, stage
+
+# Bump whenever the layout of the shared Arrow files changes
+SHARED_VERSION = 1
+
+
+class _Entry:
+    def __init__(self, signature, frame, shared=False):
+        self.signature = signature
+        self.frame = frame
+        self.indexes = {}
+        # Memory-mapped frames live in the page cache shared by all processes, not in this one
+        self.nbytes = 0 if shared else int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def _shared_path(shared_dir, key):
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return os.path.join(shared_dir, f'{os.path.basename(key[0])}.{digest}.arrow')
+
+
+def load_shared(shared_dir, key, signature):
+    """Frame memory-mapped from the Arrow copy of a CSV, or None if it is missing or stale"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+
+    shared_path = _shared_path(shared_dir, key)
+    if not os.path.exists(shared_path):
+        return None
+    try:
+        reader = pa.ipc.open_file(pa.memory_map(shared_path))
+        metadata = reader.schema.metadata or {}
+        if (metadata.get(b'version') != str(SHARED_VERSION).encode() or
+                metadata.get(b'source') != f'{signature[0]}:{signature[1]}'.encode()):
+            return None
+        # Numeric columns without nulls and Arrow-backed strings stay in the mapped pages
+        string_dtype = pd.StringDtype('pyarrow')
+        types = {pa.string(): string_dtype, pa.large_string(): string_dtype}
+        return reader.read_all().to_pandas(split_blocks=True, types_mapper=types.get)
+    except (OSError, pa.ArrowException) as e:
+        logging.warning(f"Ignoring unreadable shared dataset '{shared_path}': {e}")
+        return None
+
+
+def write_shared(shared_dir, key, signature, frame):
+    """Write the Arrow IPC copy of a parsed CSV that other processes map instead of parsing"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        logging.warning("pyarrow not installed; dashboard workers will each parse their own datasets. "
+                        "Install with: pip install pyarrow")
+        return False
+
+    shared_path = _shared_path(shared_dir, key)
+    try:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        table = table.replace_schema_metadata({
+            'version': str(SHARED_VERSION),
+            'source': f'{signature[0]}:{signature[1]}'
+        })
+        os.makedirs(shared_dir, exist_ok=True)
+        # Write to a temporary file first so readers never map a partial file
+        tmp_path = f'{shared_path}.{os.getpid()}.tmp'
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, shared_path)
+        return True
+    except (OSError, TypeError, ValueError, pa.ArrowException) as e:
+        logging.warning(f"Could not share dataset {key[0]}: {e}")
+        return False
+
+
+class DatasetCache:
+    """Memory-bounded LRU of the CSV artifacts the dashboard reads
+
+    Each file is parsed once and kept until its mtime or size changes or it
+    is evicted to stay under max_bytes. Per-column indexes (value -> row
+    positions) are built on first use and dropped with their frame. Frames
+    are shared between callbacks, so callers must not modify them in place.
+
+    With a shared_dir, each parsed file is also written as an Arrow IPC file
+    that every server process memory-maps instead of parsing the CSV and
+    holding a private copy (requires pyarrow).
+    """
+
+    def __init__(self, max_bytes=None, shared_dir=None):
+        if max_bytes is None:
+            max_bytes = int(os.environ.get('FTA_DATASET_CACHE_MB', 1024)) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.shared_dir = shared_dir or os.environ.get('FTA_SHARED_DATA_DIR')
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    @staticmethod
+    def _key(path, dtype, datetime_columns, usecols):
+        return (os.path.abspath(path),
+                tuple(sorted((dtype or {}).items())),
+                tuple(datetime_columns or ()),
+                tuple(usecols) if usecols is not None else None)
+
+    def frame(self, path, dtype=None, datetime_columns=None, usecols=None):
+        """
+        Parsed contents of a CSV file, or None if it does not exist.
+        Args:
+            path (str): CSV file.
+            dtype (dict): Column dtypes passed to read_csv.
+            datetime_columns (list): Columns converted with pd.to_datetime (invalid values become NaT).
+            usecols (list): Only load these columns.
+        """
+        entry = self._entry(path, dtype, datetime_columns, usecols)
+        return entry.frame if entry is not None else None
+
+    def _entry(self, path, dtype, datetime_columns, usecols):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = self._key(path, dtype, datetime_columns, usecols)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature:
+                self._entries.move_to_end(key)
+                cache_lookup(hit=True)
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Concurrent callbacks asking for the same file wait for a single parse
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry.signature == signature:
+                    self._entries.move_to_end(key)
+                    cache_lookup(hit=True)
+                    return entry
+
+            cache_lookup(hit=False)
+            frame = None
+            if self.shared_dir:
+                with stage('map_arrow'):
+                    frame = load_shared(self.shared_dir, key, signature)
+            shared = frame is not None
+            if frame is None:
+                with stage('read_csv'):
+                    frame = pd.read_csv(path, dtype=dtype, usecols=usecols)
+                    for column in datetime_columns or ():
+                        if column in frame.columns:
+                            frame[column] = pd.to_datetime(frame[column], errors='coerce')
+                if self.shared_dir:
+                    with stage('write_arrow'):
+                        if write_shared(self.shared_dir, key, signature, frame):
+                            # Drop the private copy in favour of the mapped one
+                            mapped = load_shared(self.shared_dir, key, signature)
+                            if mapped is not None:
+                                frame, shared = mapped, True
+            count_rows(len(frame))
+            entry = _Entry(signature, frame, shared)
+            logging.info(f"Loaded {path} into dataset cache ({'shared' if shared else f'{entry.nbytes / 1e6:.1f} MB'})")
+
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                self._evict()
+                # Later callers find the entry cached and never need this lock; callers already
+                # waiting on it keep their reference. Dropping it keeps one lock per loaded key from piling up.
+                if self._load_locks.get(key) is load_lock:
+                    del self._load_locks[key]
+        return entry
+
+    def _evict(self):
+        total = sum(entry.nbytes for entry in self._entries.values())
+        # The most recently used entry always stays, even if it alone exceeds the budget
+        while total > self.max_bytes and len(self._entries) > 1:
+            key, entry = self._entries.popitem(last=False)
+            total -= entry.nbytes
+            logging.info(f"Evicted {key[0]} from dataset cache")
+
+    def _column_index(self, entry, column):
+        index = entry.indexes.get(column)
+        if index is None:
+            with stage('build_index'):
+                index = entry.frame.groupby(column, sort=False).indices
+            with self._lock:
+                entry.indexes[column] = index
+                entry.nbytes += sum(positions.nbytes for positions in index.values())
+                self._evict()
+        return index
+
+    def indexed(self, path, column, dtype=None, datetime_columns=None, usecols=None):
+        """(frame, index) from the same load, where index maps each value of column to its row positions"""
+        entry = self._entry(path, dtype, datetime_columns, usecols)
+        if entry is None:
+            return None, None
+        return entry.frame, self._column_index(entry, column)
+
+    def index(self, path, column, dtype=None, datetime_columns=None, usecols=None):
+        """Mapping of each value of column to the positions of its rows, or None if the file is missing"""
+        return self.indexed(path, column, dtype, datetime_columns, usecols)[1]
+
+    def rows(self, path, column, value, dtype=None, datetime_columns=None, usecols=None):
+        """Rows whose column equals value, looked up through the column index"""
+        entry = self._entry(path, dtype, datetime_columns, usecols)
+        if entry is None:
+            return None
+        positions = self._column_index(entry, column).get(value, np.array([], dtype=np.intp))
+        return entry.frame.iloc[positions]
+
+    def invalidate(self, path=None):
+        """Drop cached entries for one file, or everything"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                return
+            path = os.path.abspath(path)
+            for key in [key for key in self._entries if key[0] == path]:
+                del self._entries[key]
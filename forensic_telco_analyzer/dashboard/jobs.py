@@ -0,0 +1,250 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import plotly.utils
+
+from forensic_telco_analyzer.utils.processes import pool_context
+
+JOBS_DB = os.path.join('data', 'processed', 'jobs.sqlite')
+
+# Directory next to the job table holding each job's result and any files it writes
+RESULTS_DIR = 'job_results'
+
+# Statuses a job can still leave
+ACTIVE_STATUSES = ('queued', 'running', 'cancelling')
+
+# Seconds between cancellation checks made by Progress.check inside long computations
+CANCEL_CHECK_SECONDS = 1.0
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when an analyst cancelled it"""
+
+
+@contextmanager
+def _connect(db_path):
+    """Connection that commits on success and is always closed"""
+    connection = sqlite3.connect(db_path, timeout=30)
+    connection.row_factory = sqlite3.Row
+    try:
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+
+def _set(db_path, job_id, **fields):
+    fields['updated_at'] = time.time()
+    assignments = ', '.join(f'{name} = ?' for name in fields)
+    with _connect(db_path) as connection:
+        connection.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*fields.values(), job_id))
+
+
+class Progress:
+    """Callable handed to a job for reporting progress; raises JobCancelled once cancelled"""
+
+    def __init__(self, db_path, job_id, results_dir=None):
+        self.db_path = db_path
+        self.job_id = job_id
+        self.results_dir = results_dir or os.path.join(os.path.dirname(db_path) or '.', RESULTS_DIR)
+        self._checked_at = 0.0
+
+    def result_file(self, name):
+        """Path for a file the job writes alongside its result, e.g. a table its result pages from"""
+        return os.path.join(self.results_dir, f'{self.job_id}_{name}')
+
+    def __call__(self, fraction, message=''):
+        with _connect(self.db_path) as connection:
+            row = connection.execute('SELECT status FROM jobs WHERE id = ?', (self.job_id,)).fetchone()
+            if row is None or row['status'] in ('cancelling', 'cancelled'):
+                raise JobCancelled(self.job_id)
+            connection.execute('UPDATE jobs SET progress = ?, message = ?, updated_at = ? WHERE id = ?',
+                               (float(fraction), message, time.time(), self.job_id))
+        self._checked_at = time.monotonic()
+
+    def check(self):
+        """Raise JobCancelled if the job was cancelled; cheap enough to call from inner loops"""
+        if time.monotonic() - self._checked_at < CANCEL_CHECK_SECONDS:
+            return
+        self._checked_at = time.monotonic()
+        with _connect(self.db_path) as connection:
+            row = connection.execute('SELECT status FROM jobs WHERE id = ?', (self.job_id,)).fetchone()
+        if row is None or row['status'] in ('cancelling', 'cancelled'):
+            raise JobCancelled(self.job_id)
+
+
+def _run_job(db_path, results_dir, job_id, func, args):
+    """Execute one job inside a worker process and record the outcome"""
+    progress = Progress(db_path, job_id, results_dir)
+    try:
+        # Only a queued job starts; one cancelled while it waited never runs
+        with _connect(db_path) as connection:
+            started = connection.execute(
+                "UPDATE jobs SET status = 'running', pid = ?, message = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (os.getpid(), 'Starting', time.time(), job_id)).rowcount
+        if not started:
+            raise JobCancelled(job_id)
+        result = func(*args, progress=progress)
+
+        result_path = os.path.join(results_dir, f'{job_id}.json')
+        tmp_path = f'{result_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            # Dash components and figures serialise the same way Dash sends them to the browser
+            json.dump(result, f, cls=plotly.utils.PlotlyJSONEncoder)
+        os.replace(tmp_path, result_path)
+        _set(db_path, job_id, status='done', progress=1.0, message='Done', result_path=result_path)
+    except JobCancelled:
+        _set(db_path, job_id, status='cancelled', message='Cancelled')
+    except Exception as e:
+        logging.exception(f"Job {job_id} failed")
+        _set(db_path, job_id, status='failed', error=str(e), message='Failed')
+
+
+class JobRunner:
+    """Runs long dashboard work in a process pool, tracked in a SQLite job table.
+
+    The table is shared, so every server process (and every analyst) sees the
+    same jobs: submitting work with the key of a queued, running or finished
+    job returns that job instead of starting another one.
+    """
+
+    def __init__(self, db_path=JOBS_DB, workers=None):
+        self.db_path = db_path
+        self.results_dir = os.path.join(os.path.dirname(db_path) or '.', RESULTS_DIR)
+        self.workers = workers or int(os.environ.get('FTA_JOB_WORKERS', 2))
+        self._pool = None
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _init_db(self):
+        if self._ready:
+            return
+        os.makedirs(self.results_dir, exist_ok=True)
+        with _connect(self.db_path) as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    key TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress REAL DEFAULT 0,
+                    message TEXT,
+                    error TEXT,
+                    result_path TEXT,
+                    pid INTEGER,
+                    created_at REAL,
+                    updated_at REAL
+                )''')
+            connection.execute('CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status)')
+        self._ready = True
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=pool_context())
+        return self._pool
+
+    @staticmethod
+    def make_key(kind, *parts):
+        """Deduplication key for a request; include input file stats so edits invalidate it"""
+        digest = hashlib.sha1(kind.encode())
+        for part in parts:
+            if isinstance(part, str) and os.path.exists(part):
+                stat = os.stat(part)
+                part = f'{os.path.abspath(part)}:{stat.st_mtime_ns}:{stat.st_size}'
+            digest.update(repr(part).encode())
+        return digest.hexdigest()
+
+    def submit(self, kind, func, args, key=None):
+        """
+        Queue func(*args, progress=...) in a worker process and return its job ID.
+        Args:
+            kind (str): Label for the job type.
+            func (callable): Top-level function returning a JSON-serialisable result.
+            args (tuple): Picklable positional arguments.
+            key (str): Deduplication key (see make_key); identical requests share a job.
+        """
+        self._init_db()
+        key = key or self.make_key(kind, *args)
+        with self._lock:
+            with _connect(self.db_path) as connection:
+                existing = connection.execute(
+                    "SELECT id, status, result_path, pid FROM jobs WHERE key = ? AND status IN "
+                    "('queued', 'running', 'done') ORDER BY created_at DESC LIMIT 1", (key,)
+                ).fetchone()
+            if existing is not None and self._reusable(existing):
+                return existing['id']
+
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            with _connect(self.db_path) as connection:
+                connection.execute(
+                    'INSERT INTO jobs (id, key, kind, status, progress, message, pid, created_at, updated_at) '
+                    "VALUES (?, ?, ?, 'queued', 0, 'Queued', ?, ?, ?)", (job_id, key, kind, os.getpid(), now, now)
+                )
+            future = self._executor().submit(_run_job, self.db_path, self.results_dir, job_id, func, args)
+            self._futures[job_id] = future
+            future.add_done_callback(lambda f, job_id=job_id: self._futures.pop(job_id, None))
+        return job_id
+
+    def _reusable(self, row):
+        if row['status'] == 'done':
+            return bool(row['result_path']) and os.path.exists(row['result_path'])
+        # Queued jobs record the submitting server process, running ones their worker
+        return self._alive(row['pid'])
+
+    @staticmethod
+    def _alive(pid):
+        if not pid:
+            return False
+        try:
+            os.kill(pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+
+    def status(self, job_id):
+        """Job row as a dict (status, progress, message, error), or None"""
+        self._init_db()
+        with _connect(self.db_path) as connection:
+            row = connection.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        if job['status'] in ACTIVE_STATUSES and not self._alive(job['pid']):
+            # The owning process died (e.g. the server restarted) without recording an outcome
+            job.update(status='failed', error='Worker process exited unexpectedly')
+            _set(self.db_path, job_id, status='failed', error=job['error'])
+        return job
+
+    def result(self, job_id):
+        """Decoded result of a finished job, or None"""
+        job = self.status(job_id)
+        if job is None or job['status'] != 'done' or not job['result_path']:
+            return None
+        with open(job['result_path']) as f:
+            return json.load(f)
+
+    def cancel(self, job_id):
+        """Cancel a job: queued jobs never start, running ones stop at their next progress report"""
+        job = self.status(job_id)
+        if job is None or job['status'] not in ACTIVE_STATUSES:
+            return False
+        future = self._futures.get(job_id)
+        if job['status'] == 'queued' and future is not None and future.cancel():
+            _set(self.db_path, job_id, status='cancelled', message='Cancelled')
+        else:
+            _set(self.db_path, job_id, status='cancelling', message='Cancelling')
+        return True
@@ -0,0 +1,212 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from forensic_telco_analyzer.dashboard.data_access import DatasetCache
+from forensic_telco_analyzer.tdr.batch_maps import (MANIFEST_FILE, imsi_data_hash, init_render_worker, load_manifest,
+                                                    render_imsi_html)
+from forensic_telco_analyzer.utils.processes import pool_context
+
+REGISTRY_FILE = 'tower_registry.npz'
+
+# How processed_tdr.csv is parsed wherever the dashboard reads it, so all readers share one cache entry
+TDR_READ_OPTIONS = {'dtype': {'imsi': str}, 'datetime_columns': ['timestamp']}
+
+# Seconds a map that failed to render is reported as failed before a request retries it
+FAILED_RETRY_SECONDS = 60
+
+
+class MapCache:
+    """Size-bounded LRU cache of gzipped map HTML on disk
+
+    Entries are stored as <key>.html.gz. A file's mtime is bumped on every
+    hit, so eviction removes the least recently used entries first.
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.html.gz')
+
+    def get(self, key):
+        """Path of a cached entry (marking it recently used), or None"""
+        path = self._path(key)
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, html):
+        """Compress and store HTML under key, then evict down to max_bytes"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f'{path}.tmp'
+        with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+            f.write(html.encode('utf-8') if isinstance(html, str) else html)
+        os.replace(tmp_path, path)
+        self._evict()
+        return path
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.html.gz'):
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                    entries.append((stat.st_mtime, stat.st_size, name))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                    total -= size
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def etag(key):
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class MapService:
+    """Renders movement maps on demand in a background process and caches them
+
+    request(imsi) never blocks on rendering: it reports 'ready' with a cache
+    key, 'pending' while a worker renders the map, 'failed' if rendering
+    raised (retried after FAILED_RETRY_SECONDS), or 'missing' when the IMSI
+    has no TDR records.
+    """
+
+    def __init__(self, processed_dir, cache_dir=None, max_bytes=None, workers=1, mode='auto', datasets=None):
+        self.processed_dir = processed_dir
+        self.tdr_file = os.path.join(processed_dir, 'processed_tdr.csv')
+        self.registry_file = os.path.join(processed_dir, REGISTRY_FILE)
+        if max_bytes is None:
+            max_bytes = int(os.environ.get('FTA_MAP_CACHE_MB', 512)) * 1024 * 1024
+        self.cache = MapCache(cache_dir or os.path.join(processed_dir, 'map_cache'), max_bytes)
+        self.workers = workers
+        self.mode = mode
+        self._pool = None
+        self._pending = {}
+        self._failed = {}
+        self._lock = threading.Lock()
+        self.datasets = datasets or DatasetCache()
+
+    def available(self):
+        """Whether on-demand rendering has both TDR data and a tower registry"""
+        return os.path.exists(self.tdr_file) and os.path.exists(self.registry_file)
+
+    def _tdr_data(self):
+        return self.datasets.indexed(self.tdr_file, 'imsi', **TDR_READ_OPTIONS)
+
+    def imsis(self):
+        """All IMSIs a movement map can be generated for"""
+        if not self.available():
+            return []
+        _, groups = self._tdr_data()
+        return list(groups.keys())
+
+    def has_imsi(self, imsi):
+        """Whether the TDR data has records of an IMSI"""
+        if not self.available():
+            return False
+        _, groups = self._tdr_data()
+        return str(imsi) in groups
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=pool_context(),
+                                             initializer=init_render_worker, initargs=(self.registry_file,))
+        return self._pool
+
+    def request(self, imsi):
+        """Return a (status, key) pair for an IMSI's movement map"""
+        if not self.available():
+            return 'missing', None
+
+        tdr, groups = self._tdr_data()
+        imsi = str(imsi)
+        if imsi not in groups:
+            return 'missing', None
+
+        imsi_data = tdr.iloc[groups[imsi]]
+        key = f'movement_{imsi}_{imsi_data_hash(imsi_data, self.mode, self.registry_file)[:16]}'
+        if self.cache.get(key):
+            return 'ready', key
+
+        with self._lock:
+            failed_at = self._failed.get(key, (None,))[0]
+            if failed_at is not None and time.monotonic() - failed_at < FAILED_RETRY_SECONDS:
+                return 'failed', key
+            self._failed.pop(key, None)
+            if key in self._pending:
+                return 'pending', key
+            try:
+                future = self._executor().submit(render_imsi_html, imsi, imsi_data, self.mode)
+            except BrokenProcessPool as e:
+                self._reset_pool()
+                logging.error(f"Failed to render map {key}: {e}")
+                self._failed[key] = (time.monotonic(), str(e))
+                return 'failed', key
+            self._pending[key] = future
+            pool = self._pool
+        # Outside the lock: a future that is already done runs the callback right here
+        future.add_done_callback(lambda f, key=key, pool=pool: self._store(key, f, pool))
+        return 'pending', key
+
+    def _reset_pool(self, pool=None):
+        """Drop a broken worker pool (if it is still the current one) so the next request starts
+        a new one; the caller holds the lock"""
+        if self._pool is not None and (pool is None or pool is self._pool):
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _store(self, key, future, pool=None):
+        try:
+            self.cache.put(key, future.result())
+        except (Exception, CancelledError) as e:
+            logging.error(f"Failed to render map {key}: {e}")
+            with self._lock:
+                if isinstance(e, BrokenProcessPool):
+                    self._reset_pool(pool)
+                self._failed[key] = (time.monotonic(), str(e))
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def map_files(self):
+        """Pre-rendered map files of the processed directory: those in the map manifest, or
+        every .html file for output written before manifests existed"""
+        if os.path.exists(os.path.join(self.processed_dir, MANIFEST_FILE)):
+            files = (entry['file'] for entry in load_manifest(self.processed_dir)['maps'].values())
+        elif os.path.isdir(self.processed_dir):
+            files = os.listdir(self.processed_dir)
+        else:
+            return []
+        return sorted({file for file in files if file.endswith('.html')})
+
+    def file_entry(self, file_name):
+        """Cache a pre-rendered map file from the processed directory; return its key, or None
+        for anything that is not one of its map files"""
+        if file_name not in self.map_files():
+            return None
+        path = os.path.join(self.processed_dir, file_name)
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        key = f"file_{hashlib.sha1(f'{path}:{stat.st_mtime_ns}:{stat.st_size}'.encode()).hexdigest()[:24]}"
+        if not self.cache.get(key):
+            with open(path, 'rb') as f:
+                self.cache.put(key, f.read())
+        return key
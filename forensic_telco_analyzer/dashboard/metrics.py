@@ -0,0 +1,294 @@
+import functools
+import hmac
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import flask
+import pandas as pd
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Addresses allowed to read /metrics unless FTA_METRICS_ALLOW_REMOTE is set. Behind a reverse proxy
+# every request comes from a local address, so proxied requests (with X-Forwarded-For or Forwarded
+# headers) are never trusted as local; set FTA_METRICS_TOKEN to scrape through a proxy.
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+PROXY_HEADERS = ('X-Forwarded-For', 'X-Real-IP', 'Forwarded')
+
+
+def metrics_allowed(request):
+    """Whether a Flask request may read /metrics
+
+    With FTA_METRICS_TOKEN set, the request must carry it as a bearer token
+    (Authorization: Bearer <token>), wherever it comes from. Otherwise only
+    direct local requests are served, unless FTA_METRICS_ALLOW_REMOTE is set.
+    """
+    token = os.environ.get('FTA_METRICS_TOKEN')
+    if token:
+        supplied = request.headers.get('Authorization', '')
+        return hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode())
+    if os.environ.get('FTA_METRICS_ALLOW_REMOTE'):
+        return True
+    proxied = any(header in request.headers for header in PROXY_HEADERS)
+    return request.remote_addr in LOCAL_ADDRESSES and not proxied
+
+_local = threading.local()
+
+
+class _Context:
+    """What one request or callback did: rows loaded, cache lookups, time per stage"""
+
+    def __init__(self):
+        self.callback = None
+        self.rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.stages = defaultdict(float)
+
+
+class _Series:
+    """Latency histogram and counters of one callback or route"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.errors = 0
+        self.bytes = 0
+        self.rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.stages = defaultdict(lambda: [0, 0.0])
+
+    def observe(self, seconds, context=None):
+        self.count += 1
+        self.seconds += seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        if context is not None:
+            self.errors += context.errors
+            self.rows += context.rows
+            self.hits += context.hits
+            self.misses += context.misses
+            for stage, stage_seconds in context.stages.items():
+                self.stages[stage][0] += 1
+                self.stages[stage][1] += stage_seconds
+
+
+def _current():
+    return getattr(_local, 'context', None)
+
+
+@contextmanager
+def stage(name):
+    """Attribute the time spent in a block to a named stage of the running callback"""
+    context = _current()
+    if context is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        context.stages[name] += time.perf_counter() - start
+
+
+def count_rows(rows):
+    """Record rows loaded from disk by the running callback"""
+    context = _current()
+    if context is not None:
+        context.rows += int(rows)
+
+
+def cache_lookup(hit):
+    """Record a dataset cache hit or miss for the running callback"""
+    context = _current()
+    if context is not None:
+        if hit:
+            context.hits += 1
+        else:
+            context.misses += 1
+
+
+class _ErrorCounter(logging.Handler):
+    """Counts errors logged while a callback runs, including those shown as inline error messages"""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+
+    def emit(self, record):
+        context = _current()
+        if context is not None:
+            context.errors += 1
+
+
+class Metrics:
+    """Per-process latency and resource metrics of dashboard callbacks and Flask routes
+
+    Under a multi-worker server every worker keeps its own counters, so
+    /metrics reports the worker that served the scrape (its pid is a label).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.callbacks = defaultdict(_Series)
+        self.routes = defaultdict(_Series)
+        self.statuses = defaultdict(int)
+        self.started = time.time()
+
+    def instrument(self, func):
+        """Decorator timing a Dash callback and collecting what it loaded"""
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            context = _current()
+            owned = context is None
+            if owned:
+                # Called outside a Flask request (e.g. directly from a script)
+                context = _local.context = _Context()
+            context.callback = name
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                context.errors += 1
+                raise
+            finally:
+                seconds = time.perf_counter() - start
+                with self._lock:
+                    self.callbacks[name].observe(seconds, context)
+                if owned:
+                    _local.context = None
+
+        return wrapper
+
+    def init_app(self, server):
+        """Time every Flask route and serve /metrics on a Flask server"""
+        logging.getLogger().addHandler(_ErrorCounter())
+
+        @server.before_request
+        def start_request():
+            _local.context = _Context()
+            _local.request_start = time.perf_counter()
+
+        @server.after_request
+        def finish_request(response):
+            context = _current()
+            start = getattr(_local, 'request_start', None)
+            if context is None or start is None:
+                return response
+            seconds = time.perf_counter() - start
+            route = flask.request.url_rule.rule if flask.request.url_rule else 'unmatched'
+            size = response.content_length or 0
+            with self._lock:
+                series = self.routes[route]
+                series.observe(seconds)
+                series.bytes += size
+                self.statuses[(route, response.status_code)] += 1
+                if context.callback:
+                    # The response body is the callback's serialized output
+                    self.callbacks[context.callback].bytes += size
+            _local.context = None
+            return response
+
+        @server.route('/metrics')
+        def serve_metrics():
+            if not metrics_allowed(flask.request):
+                return "Metrics are only served locally or with FTA_METRICS_TOKEN.", 403
+            return flask.Response(self.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+    def render_prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        pid = os.getpid()
+        lines = []
+
+        def histogram(metric, help_text, label, series_by_name):
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} histogram')
+            for name, series in sorted(series_by_name.items()):
+                labels = f'{label}="{name}",pid="{pid}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, series.buckets):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {series.count}')
+                lines.append(f'{metric}_sum{{{labels}}} {series.seconds:.6f}')
+                lines.append(f'{metric}_count{{{labels}}} {series.count}')
+
+        def counter(metric, help_text, rows):
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} counter')
+            for labels, value in rows:
+                label_text = ','.join(f'{key}="{val}"' for key, val in labels) + f',pid="{pid}"'
+                lines.append(f'{metric}{{{label_text}}} {value}')
+
+        with self._lock:
+            callbacks = dict(self.callbacks)
+            routes = dict(self.routes)
+            statuses = dict(self.statuses)
+
+            histogram('fta_callback_seconds', 'Wall time of dashboard callbacks.', 'callback', callbacks)
+            counter('fta_callback_errors_total', 'Callback runs that raised or logged an error.',
+                    [((('callback', name),), s.errors) for name, s in sorted(callbacks.items())])
+            counter('fta_callback_response_bytes_total', 'Bytes of serialized callback output.',
+                    [((('callback', name),), s.bytes) for name, s in sorted(callbacks.items())])
+            counter('fta_callback_rows_loaded_total', 'Rows loaded from disk by callbacks.',
+                    [((('callback', name),), s.rows) for name, s in sorted(callbacks.items())])
+            counter('fta_callback_cache_requests_total', 'Dataset cache lookups by callbacks.',
+                    [((('callback', name), ('result', result)), value) for name, s in sorted(callbacks.items())
+                     for result, value in (('hit', s.hits), ('miss', s.misses))])
+            counter('fta_callback_stage_seconds_total', 'Time callbacks spent in each stage.',
+                    [((('callback', name), ('stage', stage_name)), f'{seconds:.6f}')
+                     for name, s in sorted(callbacks.items()) for stage_name, (_, seconds) in sorted(s.stages.items())])
+            histogram('fta_route_seconds', 'Wall time of Flask requests.', 'route', routes)
+            counter('fta_route_response_bytes_total', 'Bytes sent by Flask routes.',
+                    [((('route', name),), s.bytes) for name, s in sorted(routes.items())])
+            counter('fta_route_responses_total', 'Flask responses by status code.',
+                    [((('route', route), ('status', status)), value) for (route, status), value in sorted(statuses.items())])
+
+        lines.append('# HELP fta_uptime_seconds Seconds since this worker started.')
+        lines.append('# TYPE fta_uptime_seconds gauge')
+        lines.append(f'fta_uptime_seconds{{pid="{pid}"}} {time.time() - self.started:.0f}')
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """
+        Callback metrics for the debug panel.
+        Returns:
+            tuple: (callbacks_df, stages_df). stages_df gives each stage's share of its callback's time.
+        """
+        callback_rows, stage_rows = [], []
+        with self._lock:
+            for name, s in sorted(self.callbacks.items(), key=lambda item: -item[1].seconds):
+                lookups = s.hits + s.misses
+                callback_rows.append({
+                    'Callback': name,
+                    'Calls': s.count,
+                    'Errors': s.errors,
+                    'Mean (ms)': round(1000 * s.seconds / s.count, 1) if s.count else 0.0,
+                    'Total (s)': round(s.seconds, 3),
+                    'Rows Loaded': s.rows,
+                    'Response KB': round(s.bytes / 1024, 1),
+                    'Cache Hit Rate': f'{s.hits / lookups:.0%}' if lookups else '-'
+                })
+                for stage_name, (calls, seconds) in sorted(s.stages.items(), key=lambda item: -item[1][1]):
+                    stage_rows.append({
+                        'Callback': name,
+                        'Stage': stage_name,
+                        'Calls': calls,
+                        'Total (s)': round(seconds, 3),
+                        'Share of Callback': f'{seconds / s.seconds:.0%}' if s.seconds else '-'
+                    })
+        return pd.DataFrame(callback_rows), pd.DataFrame(stage_rows)
+
+
+# Registry shared by the dashboard's callbacks and routes
+metrics = Metrics()
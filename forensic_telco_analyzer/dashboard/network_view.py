@@ -0,0 +1,88 @@
+import os
+import uuid
+
+from dash import dcc
+from dash import html
+
+from forensic_telco_analyzer.analysis.graph_index import GraphIndex
+from forensic_telco_analyzer.analysis.graph_layout import GraphLayout
+from forensic_telco_analyzer.analysis.incremental_centrality import refresh_centrality
+from forensic_telco_analyzer.analysis.network_analysis import NetworkAnalyzer
+from forensic_telco_analyzer.dashboard.tables import JOB_RESULTS_DIR, server_table
+
+# Cached node positions per graph version for the network visualization
+LAYOUT_CACHE_DIR = os.path.join('data', 'processed', 'layout_cache')
+LAYOUT_CACHE_MAX_BYTES = int(os.environ.get('FTA_LAYOUT_CACHE_MB', 256)) * 1024 * 1024
+
+
+def _report(progress, fraction, message):
+    if progress is not None:
+        progress(fraction, message)
+
+
+def _checkpoint(progress):
+    """Cancellation check for long computations, when run as a job"""
+    return getattr(progress, 'check', None)
+
+
+def _result_file(progress, name):
+    """Per-job path of a table the result pages from, so concurrent jobs never share one"""
+    if hasattr(progress, 'result_file'):
+        return progress.result_file(name)
+    return os.path.join(JOB_RESULTS_DIR, f'{uuid.uuid4().hex}_{name}')
+
+
+def build_network_view(selected_file, target=None, hops=2, progress=None):
+    """
+    Network Visualization tab content for a correlation file; runs as a background job.
+    Args:
+        selected_file (str): Correlated call CSV.
+        target (str): Optional number to restrict centrality and drawing to its ego network.
+        hops (int): Ego network radius.
+        progress (callable): progress(fraction, message) reporter supplied by the job runner; its
+            result_file() names the files the returned tables page from.
+    """
+    _report(progress, 0.05, 'Loading call graph')
+    analyzer = NetworkAnalyzer.from_index(GraphIndex.load(selected_file))
+    if target:
+        if target not in analyzer.index:
+            return html.Div(f"Number {target} not found in the selected file.",
+                            style={'color': 'red', 'textAlign': 'center'})
+        # Centrality and drawing cover only the target's ego network
+        focus = analyzer.ego_network(target, radius=hops)
+        _report(progress, 0.2, 'Calculating centrality')
+        centrality_df = focus.calculate_centrality(checkpoint=_checkpoint(progress))
+    else:
+        focus = analyzer
+        _report(progress, 0.2, 'Refreshing centrality')
+        # Reuses saved state; only rows appended since the last refresh are processed
+        centrality_df = refresh_centrality(selected_file, checkpoint=_checkpoint(progress))
+
+    # Tables are paged from files of this job; the CLI's artifacts in data/processed stay untouched
+    os.makedirs(JOB_RESULTS_DIR, exist_ok=True)
+    centrality_path = _result_file(progress, 'centrality_measures.csv')
+    centrality_df.to_csv(centrality_path, index=False)
+
+    # Detect communities and save them alongside the centrality data
+    _report(progress, 0.5, 'Detecting communities')
+    labels_df, summary_df = analyzer.detect_communities()
+    labels_df.to_csv(_result_file(progress, 'community_labels.csv'), index=False)
+    summary_path = _result_file(progress, 'community_summary.csv')
+    summary_df.to_csv(summary_path, index=False)
+
+    # Layouts are computed once per graph version and cached on disk
+    _report(progress, 0.75, 'Laying out graph')
+    layout = GraphLayout.load_or_compute(focus.nodes, focus.adjacency, LAYOUT_CACHE_DIR,
+                                         max_bytes=LAYOUT_CACHE_MAX_BYTES)
+
+    _report(progress, 0.95, 'Rendering')
+    content = [
+        html.H4(f"Centrality Measures - {hops}-hop network of {target}" if target else "Centrality Measures"),
+        server_table(centrality_path, centrality_df),
+        html.H4(f"Communities ({len(summary_df)})"),
+        server_table(summary_path, summary_df),
+        html.H4("Network Graph"),
+        dcc.Store(id='network-layout', data={'version': layout.version, 'target': target}),
+        dcc.Graph(id='network-figure', figure=layout.figure(highlight=target), config={'scrollZoom': True})
+    ]
+    return html.Div(content)
@@ -0,0 +1,156 @@
+# forensic_telco_analyzer/dashboard/serve.py
+import argparse
+import logging
+import os
+import sys
+import time
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+PROCESSED_DIR = os.path.join('data', 'processed')
+
+# Arrow copies of the processed CSVs, memory-mapped by every worker
+SHARED_DIR = os.path.join(PROCESSED_DIR, 'shared')
+
+# Processed files read by the dashboard tabs, with the column each tab looks rows up by
+DASHBOARD_ARTIFACTS = [
+    ('frequent_contacts.csv', None),
+    ('unusual_calls.csv', None),
+    ('top_source_ips.csv', None),
+    ('top_destination_ips.csv', None),
+    ('protocol_distribution.csv', None),
+    ('processed_tdr.csv', 'imsi'),
+    ('co_location_analysis.csv', None),
+    ('cdr_tdr_correlation.csv', None),
+    ('ipdr_cdr_correlation.csv', None),
+    ('all_correlation.csv', None),
+    ('osint_results.csv', None),
+    ('correlated_osint_cdr.csv', 'source_number'),
+]
+
+# Correlation files offered by the Network Visualization tab
+NETWORK_FILES = ['correlated_osint_cdr.csv', 'all_correlation.csv']
+
+
+def precompute(datasets, processed_dir=PROCESSED_DIR):
+    """
+    Build everything the tabs would otherwise compute on their first request.
+    Args:
+        datasets (DatasetCache): The dashboard's dataset cache.
+        processed_dir (str): Directory holding the processed artifacts.
+    """
+    # Imported here so the serving options are in place before the dashboard loads
+    from forensic_telco_analyzer.analysis.graph_index import GraphIndex
+    from forensic_telco_analyzer.analysis.graph_layout import GraphLayout
+    from forensic_telco_analyzer.analysis.incremental_centrality import refresh_centrality
+    from forensic_telco_analyzer.dashboard.network_view import LAYOUT_CACHE_DIR, LAYOUT_CACHE_MAX_BYTES
+    from forensic_telco_analyzer.dashboard.tables import TABLE_READ_OPTIONS
+
+    for name, index_column in DASHBOARD_ARTIFACTS:
+        path = os.path.join(processed_dir, name)
+        if not os.path.exists(path):
+            continue
+        start = time.time()
+        try:
+            read_options = TABLE_READ_OPTIONS.get(name, {})
+            frame = datasets.frame(path, **read_options)
+            if index_column and index_column in frame.columns:
+                datasets.index(path, index_column, **read_options)
+            logging.info(f"Prepared {name} ({len(frame)} rows) in {time.time() - start:.1f}s")
+        except Exception as e:
+            logging.error(f"Error preparing {name}: {str(e)}")
+
+    for name in NETWORK_FILES:
+        path = os.path.join(processed_dir, name)
+        if not os.path.exists(path):
+            continue
+        start = time.time()
+        try:
+            index = GraphIndex.load(path)
+            refresh_centrality(path)
+            GraphLayout.load_or_compute(index.nodes, index.adjacency, LAYOUT_CACHE_DIR,
+                                        max_bytes=LAYOUT_CACHE_MAX_BYTES)
+            logging.info(f"Prepared call graph of {name} ({len(index)} numbers) in {time.time() - start:.1f}s")
+        except Exception as e:
+            logging.error(f"Error preparing call graph of {name}: {str(e)}")
+
+
+def create_server(shared_dir=SHARED_DIR, precompute_artifacts=True):
+    """Flask server of the dashboard, with datasets shared through memory-mapped Arrow files"""
+    # The dataset cache reads its shared directory when the dashboard module is imported
+    os.environ['FTA_SHARED_DATA_DIR'] = shared_dir
+    from forensic_telco_analyzer.dashboard import app as dashboard
+
+    if precompute_artifacts:
+        start = time.time()
+        precompute(dashboard.datasets)
+        logging.info(f"Dashboard artifacts ready in {time.time() - start:.1f}s")
+    return dashboard.server
+
+
+def run_gunicorn(server, options):
+    """Serve under gunicorn; False if gunicorn is not installed"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        return False
+
+    class DashboardApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for name, value in self.options.items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            return self.application
+
+    DashboardApplication(server, options).run()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the forensic analysis dashboard with multiple workers')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8050, help='Port to bind (default: 8050)')
+    parser.add_argument('--workers', type=int, default=min(2 * (os.cpu_count() or 1) + 1, 8),
+                        help='Worker processes (default: 2 x CPUs + 1, at most 8)')
+    parser.add_argument('--threads', type=int, default=4, help='Threads per worker (default: 4)')
+    parser.add_argument('--timeout', type=int, default=300, help='Seconds before a silent worker is restarted')
+    parser.add_argument('--shared-dir', default=SHARED_DIR, help=f'Directory for shared Arrow datasets (default: {SHARED_DIR})')
+    parser.add_argument('--skip-precompute', action='store_true', help='Start without preparing artifacts')
+    args = parser.parse_args()
+
+    # Artifacts are prepared once in the master; forked workers inherit them
+    server = create_server(args.shared_dir, precompute_artifacts=not args.skip_precompute)
+
+    options = {
+        'bind': f'{args.host}:{args.port}',
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread',
+        'timeout': args.timeout,
+        'preload_app': True,
+    }
+    if run_gunicorn(server, options):
+        return
+
+    try:
+        from waitress import serve
+    except ImportError:
+        print("Error: A production WSGI server is required. Install with: pip install gunicorn")
+        print("(On Windows, use: pip install waitress)")
+        sys.exit(1)
+
+    # waitress has no process model; one process serves all requests from a thread pool
+    logging.info(f"gunicorn not available; serving with waitress on {args.host}:{args.port}")
+    serve(server, host=args.host, port=args.port, threads=args.workers * args.threads)
+
+
+if __name__ == '__main__':
+    main()
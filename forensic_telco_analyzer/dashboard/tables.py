@@ -0,0 +1,280 @@
+import math
+import os
+import threading
+from collections import OrderedDict
+
+import dash
+import numpy as np
+import pandas as pd
+
+from forensic_telco_analyzer.dashboard.map_service import TDR_READ_OPTIONS
+from forensic_telco_analyzer.dashboard.metrics import stage
+
+# Component type of tables paged, sorted and filtered on the server
+TABLE_TYPE = 'server-table'
+
+DEFAULT_PAGE_SIZE = 20
+
+# Processed CSVs at least this large are paged from the case store when it holds a current copy
+STORE_MIN_BYTES = int(float(os.environ.get('FTA_STORE_TABLE_MB', 256)) * 1024 * 1024)
+
+# Filtered row counts kept per store-backed view
+MAX_STORE_COUNTS = 64
+
+PROCESSED_DIR = os.path.join('data', 'processed')
+
+# Tables written by dashboard jobs (see JobRunner), one set of files per job
+JOB_RESULTS_DIR = os.path.join(PROCESSED_DIR, 'job_results')
+
+# Artifacts parsed with non-default options; must match the other readers so they share a cache entry
+TABLE_READ_OPTIONS = {
+    'processed_tdr.csv': TDR_READ_OPTIONS
+}
+
+TABLE_HEADER_STYLE = {
+    'backgroundColor': 'rgb(230, 230, 230)',
+    'fontWeight': 'bold'
+}
+
+# DataTable filter operator spellings; '>=' must be tried before '>' and so on
+FILTER_OPERATORS = [
+    (('ge ', '>=', 's>='), '>='), (('le ', '<=', 's<='), '<='), (('lt ', '<', 's<'), '<'),
+    (('gt ', '>', 's>'), '>'), (('ne ', '!=', 's!='), '!='), (('eq ', '=', 's='), '='),
+    (('contains ',), 'contains'), (('datestartswith ',), 'datestartswith')
+]
+
+
+def table_path(name):
+    """Processed artifact or job result behind a server-side table; names never leave those directories"""
+    directory, file_name = os.path.split(os.path.normpath(name))
+    if os.path.basename(directory) == os.path.basename(JOB_RESULTS_DIR):
+        return os.path.join(JOB_RESULTS_DIR, file_name)
+    return os.path.join(PROCESSED_DIR, file_name)
+
+
+def table_id(path):
+    """Name of a table's file as its component ID carries it: relative to the processed directory"""
+    path = table_path(path)
+    return os.path.relpath(path, PROCESSED_DIR).replace(os.sep, '/')
+
+
+def server_table(name, frame, page_size=DEFAULT_PAGE_SIZE, rows=None):
+    """
+    DataTable over a processed CSV that only ever holds the rows on screen.
+    Args:
+        name (str): Path of the artifact under data/processed, or of a job's table under its job_results.
+        frame (DataFrame): Contents of the artifact, used for the columns and the first page.
+        page_size (int): Rows per page.
+        rows (int): Total rows of the artifact when frame only holds its first page.
+    """
+    with stage('to_dict'):
+        first_page = frame.head(page_size).to_dict('records')
+    return dash.dash_table.DataTable(
+        id={'type': TABLE_TYPE, 'index': table_id(name)},
+        columns=[{'name': i, 'id': i} for i in frame.columns],
+        data=first_page,
+        page_current=0,
+        page_size=page_size,
+        page_count=max(1, math.ceil((len(frame) if rows is None else rows) / page_size)),
+        page_action='custom',
+        sort_action='custom',
+        sort_mode='multi',
+        sort_by=[],
+        filter_action='custom',
+        filter_query='',
+        style_table={'overflowX': 'auto'},
+        style_cell={'textAlign': 'left'},
+        style_header=TABLE_HEADER_STYLE
+    )
+
+
+def _literal(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in ('"', "'", '`'):
+        return value[1:-1]
+    return value
+
+
+def _coerce(series, value):
+    """Filter text converted to the type of the column it is compared with"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pd.to_datetime(value, errors='coerce')
+    if pd.api.types.is_bool_dtype(series):
+        return value.lower() == 'true'
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.to_numeric(value, errors='coerce')
+    # Text columns (e.g. IMSIs read as strings) keep leading zeros
+    return value
+
+
+def parse_filter(filter_query):
+    """(column, operator, value) triples of a DataTable filter_query"""
+    clauses = []
+    for part in (filter_query or '').split(' && '):
+        part = part.strip()
+        if not part.startswith('{') or '}' not in part:
+            continue
+        column, rest = part[1:].split('}', 1)
+        rest = rest.strip()
+        for spellings, operator in FILTER_OPERATORS:
+            spelling = next((s for s in spellings if rest.startswith(s)), None)
+            if spelling is not None:
+                clauses.append((column, operator, _literal(rest[len(spelling):])))
+                break
+    return clauses
+
+
+def _matches(series, operator, value):
+    """Boolean mask of series values satisfying one filter clause"""
+    if operator == 'contains':
+        return series.astype(str).str.contains(str(value), regex=False, na=False).to_numpy()
+    if operator == 'datestartswith':
+        return series.astype(str).str.startswith(str(value), na=False).to_numpy()
+
+    value = _coerce(series, value)
+    comparisons = {
+        '=': series.__eq__, '!=': series.__ne__, '<': series.__lt__,
+        '<=': series.__le__, '>': series.__gt__, '>=': series.__ge__
+    }
+    try:
+        return comparisons[operator](value).fillna(False).to_numpy(dtype=bool)
+    except TypeError:
+        return np.zeros(len(series), dtype=bool)
+
+
+class TableViews:
+    """Serves pages of cached frames, remembering the row order of recent filter/sort combinations
+
+    The filtered and sorted row positions of a view are computed once; every
+    further page of that view is a slice of the positions plus an iloc of
+    the rows on screen.
+
+    Artifacts of at least store_min_bytes that the case store holds a current
+    copy of are never loaded: each page is an indexed query returning only
+    the rows on screen.
+    """
+
+    def __init__(self, datasets, max_views=16, store=None, store_min_bytes=None):
+        self.datasets = datasets
+        self.max_views = max_views
+        self.store = store
+        self.store_min_bytes = STORE_MIN_BYTES if store_min_bytes is None else store_min_bytes
+        self._views = OrderedDict()
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _stored(self, path):
+        """Whether an artifact is paged from the case store"""
+        if self.store is None:
+            return False
+        try:
+            return os.path.getsize(path) >= self.store_min_bytes and self.store.is_fresh(os.path.basename(path), path)
+        except OSError:
+            return False
+
+    def preview(self, name, page_size=DEFAULT_PAGE_SIZE):
+        """(first page, total rows) of a store-backed artifact, or None if it is served from a frame"""
+        path = table_path(name)
+        if not self._stored(path):
+            return None
+        with stage('to_dict'):
+            return self.store.query(os.path.basename(path), limit=page_size), self.store.count(os.path.basename(path))
+
+    def page(self, name, page_current, page_size, sort_by=None, filter_query=''):
+        """(records, page_count) of one page of a processed artifact, or (None, 1) if it is missing"""
+        path = table_path(name)
+        if self._stored(path):
+            result = self._store_page(path, page_current, page_size, sort_by or [], filter_query or '')
+            if result is not None:
+                return result
+        read_options = TABLE_READ_OPTIONS.get(os.path.basename(name), {})
+        frame = self.datasets.frame(path, **read_options)
+        if frame is None:
+            return None, 1
+
+        with stage('filter_sort'):
+            positions = self._positions(path, frame, read_options, sort_by or [], filter_query or '')
+        page_size = int(page_size or DEFAULT_PAGE_SIZE)
+        page_count = max(1, math.ceil(len(positions) / page_size))
+        page_current = min(int(page_current or 0), page_count - 1)
+        start = page_current * page_size
+        with stage('to_dict'):
+            records = frame.iloc[positions[start:start + page_size]].to_dict('records')
+        return records, page_count
+
+    def _store_page(self, path, page_current, page_size, sort_by, filter_query):
+        """One page queried from the case store; None for filters SQL cannot express"""
+        name = os.path.basename(path)
+        info = self.store.info(name)
+        if info is None:
+            return None
+        filters = []
+        for column, operator, value in parse_filter(filter_query):
+            if column not in info['columns']:
+                continue
+            if operator in ('contains', 'datestartswith') and info['columns'][column] == 'datetime':
+                # Matches the text of the CSV, which the stored nanoseconds no longer have
+                return None
+            filters.append((column, 'startswith' if operator == 'datestartswith' else operator, value))
+        order_by = [(s['column_id'], s['direction'] == 'asc') for s in sort_by if s['column_id'] in info['columns']]
+
+        with stage('filter_sort'):
+            key = (path, filter_query, info['rows'], info['source_mtime_ns'])
+            with self._lock:
+                rows = self._counts.get(key)
+            if rows is None:
+                rows = self.store.count(name, filters)
+                with self._lock:
+                    self._counts[key] = rows
+                    while len(self._counts) > MAX_STORE_COUNTS:
+                        self._counts.popitem(last=False)
+            page_size = int(page_size or DEFAULT_PAGE_SIZE)
+            page_count = max(1, math.ceil(rows / page_size))
+            page_current = min(int(page_current or 0), page_count - 1)
+            frame = self.store.query(name, filters=filters, order_by=order_by,
+                                     limit=page_size, offset=page_current * page_size)
+        with stage('to_dict'):
+            records = frame.to_dict('records')
+        return records, page_count
+
+    def _positions(self, path, frame, read_options, sort_by, filter_query):
+        key = (path, filter_query, tuple((s['column_id'], s['direction']) for s in sort_by))
+        with self._lock:
+            view = self._views.get(key)
+            # A reloaded file is a new frame object, which invalidates its views
+            if view is not None and view[0] is frame:
+                self._views.move_to_end(key)
+                return view[1]
+
+        positions = np.arange(len(frame))
+        for column, operator, value in parse_filter(filter_query):
+            if column not in frame.columns:
+                continue
+            if operator == '=':
+                # Equality goes through the cached per-column index instead of a full scan
+                indexed_frame, index = self.datasets.indexed(path, column, **read_options)
+                matched = None
+                if indexed_frame is frame:
+                    # Every non-null value is a key, so a miss means no rows match
+                    matched = index.get(_coerce(frame[column], value), np.array([], dtype=np.intp))
+                if matched is None:
+                    matched = np.flatnonzero(_matches(frame[column], operator, value))
+                positions = np.intersect1d(positions, matched, assume_unique=True)
+            else:
+                subset = frame[column].iloc[positions]
+                positions = positions[_matches(subset, operator, value)]
+
+        sort_by = [s for s in sort_by if s['column_id'] in frame.columns]
+        if sort_by and len(positions):
+            subset = frame.iloc[positions][[s['column_id'] for s in sort_by]].reset_index(drop=True)
+            order = subset.sort_values(by=[s['column_id'] for s in sort_by],
+                                       ascending=[s['direction'] == 'asc' for s in sort_by],
+                                       kind='stable', na_position='last').index.to_numpy()
+            positions = positions[order]
+
+        with self._lock:
+            self._views[key] = (frame, positions)
+            self._views.move_to_end(key)
+            while len(self._views) > self.max_views:
+                self._views.popitem(last=False)
+        return positions
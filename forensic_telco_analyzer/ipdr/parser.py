@@ -2,9 +2,21 @@ import pandas as pd
 import os
 from forensic_telco_analyzer.utils.parser_base import BaseParser
 
+# Map common column names to standardized format
+COLUMN_MAPPING = {
+    'source_ip': 'src_ip',
+    'destination_ip': 'dst_ip',
+    'PRIVATEIP': 'src_ip',
+    'DESTIP': 'dst_ip',
+    'SOURCEIP': 'src_ip',
+    'DESTINATIONIP': 'dst_ip'
+}
+
 class IPDRParser(BaseParser):
-    def __init__(self, file_path):
-        super().__init__(file_path)
+    subscriber_columns = ('src_ip', 'dst_ip')
+
+    def __init__(self, file_path, **limits):
+        super().__init__(file_path, **limits)
         self.supported_formats = ['csv', 'pcap', 'pcapng']
     
     def parse(self):
@@ -19,27 +31,13 @@ class IPDRParser(BaseParser):
             
             # Handle CSV files
             if file_ext == 'csv':
-                self.data = pd.read_csv(self.file_path)
-                
-                # Map common column names to standardized format
-                column_mapping = {
-                    'source_ip': 'src_ip',
-                    'destination_ip': 'dst_ip',
-                    'PRIVATEIP': 'src_ip',
-                    'DESTIP': 'dst_ip',
-                    'SOURCEIP': 'src_ip',
-                    'DESTINATIONIP': 'dst_ip'
-                }
-                
-                # Rename columns if they exist
-                for old_col, new_col in column_mapping.items():
-                    if old_col in self.data.columns and new_col not in self.data.columns:
-                        self.data = self.data.rename(columns={old_col: new_col})
+                # Read only the requested columns and rows, with standardized column names
+                self.data = self.read_csv()
                 
                 # Add missing columns with default values
                 required_columns = ['src_ip', 'dst_ip', 'protocol']
                 for col in required_columns:
-                    if col not in self.data.columns:
+                    if col not in self.data.columns and (self.columns is None or col in self.columns):
                         self.data[col] = 'Unknown'
                 
                 return self.data
@@ -63,7 +61,8 @@ class IPDRParser(BaseParser):
                             }
                             ip_records.append(record)
                     
-                    self.data = pd.DataFrame(ip_records)
+                    # Packets are decoded in full; the limits apply to the decoded records
+                    self.data = self.apply_limits(pd.DataFrame(ip_records))
                     return self.data
                     
                 except ImportError:
@@ -84,10 +83,19 @@ class IPDRParser(BaseParser):
             print(f"Error parsing IPDR file: {e}")
             return None
     
+    def normalize_columns(self, columns):
+        """Column names with common IP column spellings renamed to src_ip/dst_ip"""
+        names = list(columns)
+        # Rename columns if they exist
+        for old_col, new_col in COLUMN_MAPPING.items():
+            if old_col in names and new_col not in names:
+                names[names.index(old_col)] = new_col
+        return names
+
     def parse_as_csv(self):
         """Fallback method to parse as CSV"""
         try:
-            self.data = pd.read_csv(self.file_path)
+            self.data = self.apply_limits(pd.read_csv(self.file_path))
             return self.data
         except Exception as e:
             print(f"Error parsing as CSV: {e}")
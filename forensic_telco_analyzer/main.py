@@ -1,66 +1,68 @@
 import argparse
+import importlib
+import logging
 import os
 import sys
-import pandas as pd
-import matplotlib.pyplot as plt
-import logging
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-import plotly.io as pio
-from plotly.subplots import make_subplots
-from dotenv import load_dotenv
-import logging
-from datetime import datetime
-from fpdf import FPDF
-
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Access the API key
-api_key = os.getenv('NUMVERIFY_API_KEY')
-
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # Add project root to path to enable absolute imports
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
-from forensic_telco_analyzer.cdr.parser import CDRParser
-from forensic_telco_analyzer.cdr.analyzer import CDRAnalyzer
-from forensic_telco_analyzer.cdr.visualizer import CDRVisualizer
-from forensic_telco_analyzer.ipdr.parser import IPDRParser
-from forensic_telco_analyzer.ipdr.analyzer import IPDRAnalyzer
-from forensic_telco_analyzer.ipdr.voip_extractor import VoIPExtractor
-from forensic_telco_analyzer.tdr.parser import TDRParser
-from forensic_telco_analyzer.tdr.analyzer import TDRAnalyzer
-from forensic_telco_analyzer.tdr.geo_mapper import GeoMapper
-from forensic_telco_analyzer.correlation.engine import CorrelationEngine
-from forensic_telco_analyzer.osint.phone_lookup import PhoneLookup
-from forensic_telco_analyzer.analysis.network_analysis import NetworkAnalyzer
-from forensic_telco_analyzer.dashboard.app import app
-from forensic_telco_analyzer.dashboard.app import analyze_correlated_network
-from forensic_telco_analyzer.dashboard.app import serve_static_content
-from forensic_telco_analyzer.dashboard.app import generate_network_dropdown_options
-from forensic_telco_analyzer.dashboard.app import update_network_content
-from forensic_telco_analyzer.dashboard.app import update_ipdr_content
-from forensic_telco_analyzer.dashboard.app import update_tdr_content
-from forensic_telco_analyzer.dashboard.app import update_cdr_content
-from forensic_telco_analyzer.dashboard.app import update_correlation_content
-from forensic_telco_analyzer.dashboard.app import update_osint_content
-from forensic_telco_analyzer.dashboard.app import update_network_graph
-from forensic_telco_analyzer.dashboard.app import update_ipdr_graph
-
-def main():
+# Stage functions and the module under forensic_telco_analyzer.stages that defines them.
+# Stage modules pull in pandas, matplotlib, networkx, fpdf etc., so they are only
+# imported when a stage actually runs; `--help` and argument errors never load them.
+STAGES = {
+    'process_cdr': 'cdr',
+    'process_ipdr': 'ipdr',
+    'process_tdr': 'tdr',
+    'process_correlation': 'correlation',
+    'process_osint': 'osint',
+    'correlate_osint_with_cdr': 'osint',
+    'save_correlated_data': 'osint',
+    'process_osint_correlation': 'osint',
+    'process_network_analysis': 'network',
+    'process_temporal_analysis': 'temporal',
+    'generate_pdf_report': 'report',
+}
+
+# Artifacts each stage writes to the output directory; they are what later stages
+# wait for and what the run manifest checks before skipping a stage
+CDR_OUTPUTS = ['frequent_contacts.csv', 'unusual_calls.csv', 'call_frequency.png', 'call_duration_histogram.png']
+IPDR_OUTPUTS = ['top_source_ips.csv', 'top_destination_ips.csv', 'protocol_distribution.csv',
+                'traffic_anomalies.csv', 'voip_calls.csv']
+TDR_OUTPUTS = ['processed_tdr.csv', 'co_location_analysis.csv', 'tower_registry.npz', 'heatmap_tiles.npz',
+               'tower_activity_heatmap.html', 'multi_imsi_comparison.html']
+NETWORK_OUTPUTS = ['centrality_measures.csv', 'community_labels.csv', 'community_summary.csv',
+                   'network_graph.png', 'ego_contacts.csv']
+# The network analysis of the OSINT-correlated calls writes the same files under its own prefix
+OSINT_NETWORK_PREFIX = 'osint_'
+OSINT_NETWORK_OUTPUTS = [OSINT_NETWORK_PREFIX + name for name in NETWORK_OUTPUTS]
+REPORT_INPUTS = ['centrality_measures.csv', 'community_summary.csv', 'network_graph.png']
+TEMPORAL_OUTPUTS = ['temporal_windows.csv', 'temporal_rankings.csv', 'new_contacts.csv']
+CORRELATION_OUTPUTS = ['cdr_tdr_correlation.csv', 'ipdr_cdr_correlation.csv', 'all_correlation.csv']
+
+
+def stage(name):
+    """Import the module of a stage function on first use and return the function"""
+    module = importlib.import_module(f'forensic_telco_analyzer.stages.{STAGES[name]}')
+    return getattr(module, name)
+
+
+def __getattr__(name):
+    # Keeps `from forensic_telco_analyzer.main import process_cdr` working without eager imports
+    if name in STAGES:
+        return stage(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def build_parser():
     parser = argparse.ArgumentParser(description='Forensic Telecommunications Analysis Tool')
     parser.add_argument('--cdr', help='Path to CDR file')
     parser.add_argument('--ipdr', help='Path to IPDR/PCAP file')
     parser.add_argument('--tdr', help='Path to Tower Dump Record file')
     parser.add_argument('--tower-locations', help='Path to tower location data')
+    parser.add_argument('--map-imsis', help='Comma-separated IMSIs to render movement maps for (default: all)')
+    parser.add_argument('--map-workers', type=int, help='Worker processes for movement map rendering')
     parser.add_argument('--output', help='Output directory for results')
     parser.add_argument('--dashboard', action='store_true', help='Launch dashboard')
     parser.add_argument('--correlate', action='store_true', help='Perform cross-data correlation between CDR, IPDR, and TDR')
@@ -68,433 +70,133 @@ def main():
     parser.add_argument('--osint-api-key', help='API key for phone number intelligence lookup')
     parser.add_argument('--correlate-osint', action='store_true', help='Correlate OSINT results with CDR data')
     parser.add_argument('--network-analysis', action='store_true', help='Perform network analysis')
+    parser.add_argument('--target', help='Phone number to focus network visualization and centrality on')
+    parser.add_argument('--hops', type=int, default=2, help='Hops around --target to include (default: 2)')
+    parser.add_argument('--temporal-analysis', action='store_true', help='Track the call network over rolling time windows')
+    parser.add_argument('--slice', default='W', help="Time slice for temporal analysis as a pandas period alias (default: 'W')")
+    parser.add_argument('--window', type=int, default=4, help='Slices per rolling window (default: 4)')
     parser.add_argument('--visualize', action='store_true', help='Visualize results')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
     parser.add_argument('--log-file', help='Path to log file')
+    parser.add_argument('--since', help='Only analyze records at or after this time (e.g. 2024-03-01)')
+    parser.add_argument('--until', help='Only analyze records before this time')
+    parser.add_argument('--subscribers', help='Comma-separated numbers, IMSIs or IPs to limit the records to')
+    parser.add_argument('--stage-workers', type=int, help='Pipeline stages run concurrently (default: 4)')
+    parser.add_argument('--force', action='store_true', help='Rerun every stage, even if its inputs are unchanged')
+    parser.add_argument('--profile', action='store_true',
+                        help='Report time, CPU, memory, rows and I/O per stage (runs stages one at a time)')
+    parser.add_argument('--profile-python', action='store_true',
+                        help='With --profile, also run each stage under cProfile and save its statistics')
+    return parser
+
 
+def main():
+    parser = build_parser()
     args = parser.parse_args()
-    
+
+    # Configure logging
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s',
+                        filename=args.log_file)
+
+    # Load environment variables (e.g. NUMVERIFY_API_KEY) from .env file
+    from dotenv import load_dotenv
+    load_dotenv()
+
     # Create output directory if specified
     if args.output:
         os.makedirs(args.output, exist_ok=True)
-    
-    # Process CDR file if provided
+
+    # Check for OSINT API key
+    if not args.osint_api_key:
+        args.osint_api_key = os.environ.get("NUMVERIFY_API_KEY")
+        if not args.osint_api_key:
+            raise ValueError("No OSINT API key provided. Use --osint-api-key or set NUMVERIFY_API_KEY.")
+
+    # Every input is parsed once and handed to the stages from memory
+    from forensic_telco_analyzer.pipeline import Pipeline
+    from forensic_telco_analyzer.session import CaseSession
+    from forensic_telco_analyzer.store import CASE_DB, CaseStore
+    # Parsed inputs and key derived tables are also kept in an indexed store next to the outputs
+    store = CaseStore(os.path.join(args.output, CASE_DB)) if args.output else None
+    subscribers = args.subscribers.split(',') if args.subscribers else None
+    session = CaseSession(cdr_file=args.cdr, ipdr_file=args.ipdr, tdr_file=args.tdr, output_dir=args.output,
+                          store=store, start=args.since, end=args.until, subscribers=subscribers)
+    profiler = None
+    if args.profile:
+        from forensic_telco_analyzer.profiling import PROFILE_DIR, Profiler
+        # Process-wide counters (CPU, RSS, I/O) can only be attributed to stages running alone
+        profiler = Profiler(python=args.profile_python, profile_dir=os.path.join(args.output or '.', PROFILE_DIR))
+        session.profiler = profiler
+    pipeline = Pipeline(session, workers=1 if profiler else args.stage_workers, force=args.force, profiler=profiler)
+
+    # Stages are declared in their original order; the pipeline derives what may run concurrently
     if args.cdr:
-        process_cdr(args.cdr, args.output)
-    
-    # Process IPDR file if provided
+        pipeline.add('cdr', stage('process_cdr'), files=[args.cdr], outputs=CDR_OUTPUTS, locks=['matplotlib'])
+
     if args.ipdr:
-        process_ipdr(args.ipdr, args.output)
-    
-    # Process TDR file if provided
+        pipeline.add('ipdr', stage('process_ipdr'), files=[args.ipdr], outputs=IPDR_OUTPUTS)
+
     if args.tdr:
-        process_tdr(args.tdr, args.tower_locations, args.output)
-    
-    # Perform network analysis if specified
-    correlated_file = os.path.join(args.output, "correlated_data.csv")
-    
+        map_imsis = args.map_imsis.split(',') if args.map_imsis else None
+        pipeline.add('tdr', stage('process_tdr'), files=[args.tdr, args.tower_locations], outputs=TDR_OUTPUTS,
+                     params={'tower_locations_file': args.tower_locations, 'map_imsis': map_imsis,
+                             'map_workers': args.map_workers})
+
+    # Network analysis of the correlated call data in the output directory
+    correlated_name = "correlated_data.csv"
+
     if args.network_analysis:
-        process_network_analysis(correlated_file, args.output)
-        generate_pdf_report(args.output)
+        pipeline.add('network', stage('process_network_analysis'), inputs=[correlated_name],
+                     outputs=NETWORK_OUTPUTS, locks=['matplotlib'],
+                     params={'correlated_name': correlated_name, 'target': args.target, 'hops': args.hops})
+        pipeline.add('report', stage('generate_pdf_report'), inputs=REPORT_INPUTS, outputs=['analysis_report.pdf'])
 
+    if args.temporal_analysis:
+        pipeline.add('temporal', stage('process_temporal_analysis'), inputs=[correlated_name], outputs=TEMPORAL_OUTPUTS,
+                     params={'correlated_name': correlated_name, 'slice_freq': args.slice, 'window': args.window})
 
     # Perform cross-data correlation if specified
     if args.correlate:
-        process_correlation(args.cdr, args.ipdr, args.tdr, args.output)
+        pipeline.add('correlation', stage('process_correlation'), files=[args.cdr, args.ipdr, args.tdr],
+                     outputs=CORRELATION_OUTPUTS)
 
-    # Check for OSINT API key
-    if not args.osint_api_key:
-        args.osint_api_key = os.environ.get("NUMVERIFY_API_KEY")
-        if not args.osint_api_key:
-            raise ValueError("No OSINT API key provided. Use --osint-api-key or set NUMVERIFY_API_KEY.")
-    
-    # Perform OSINT lookups if specified
-    if args.osint_api_key:
-        process_osint(args.cdr, args.osint_api_key, args.output)
-    
-    # Correlate OSINT results with CDR data if both are provided    
-    if args.osint_api_key and args.cdr:
-        process_osint_correlation(
-            osint_file=os.path.join(args.output, "osint_results.csv"),
-            cdr_file=args.cdr,
-            output_dir=args.output
-        )
-        
-        correlated_file = os.path.join(args.output, "correlated_osint_cdr.csv")
-        
-        # Ensure correlation data exists before proceeding with network analysis
-        if os.path.exists(correlated_file):
-            process_network_analysis(correlated_file, args.output)
-        else:
-            print(f"Correlation file not found: {correlated_file}")
+    # Perform OSINT lookups, then correlate them with CDR data and analyze the resulting network
+    pipeline.add('osint', stage('process_osint'), files=[args.cdr], outputs=['osint_results.csv'],
+                 params={'api_key': args.osint_api_key})
+    if args.cdr:
+        pipeline.add('osint_correlation', stage('process_osint_correlation'), files=[args.cdr],
+                     inputs=['osint_results.csv'], outputs=['correlated_osint_cdr.csv'])
+        pipeline.add('osint_network', stage('process_network_analysis'), inputs=['correlated_osint_cdr.csv'],
+                     outputs=OSINT_NETWORK_OUTPUTS, locks=['matplotlib'],
+                     params={'correlated_name': 'correlated_osint_cdr.csv', 'target': args.target, 'hops': args.hops,
+                             'prefix': OSINT_NETWORK_PREFIX})
+
+    statuses = pipeline.run()
+
+    if profiler is not None:
+        from forensic_telco_analyzer.profiling import PROFILE_REPORT, summary_table
+        report_path = os.path.join(args.output or '.', PROFILE_REPORT)
+        print(summary_table(profiler.save(report_path, statuses)))
+        logging.info(f"Profile report saved to {report_path}")
 
     # Launch dashboard if specified
     if args.dashboard:
         logging.info("Launching dashboard...")
         import webbrowser
         from threading import Timer
-        
+
         def open_browser():
             webbrowser.open_new("http://127.0.0.1:8050/")
-        
+
         Timer(1, open_browser).start()
-        from forensic_telco_analyzer.dashboard import app
+        # Building the Dash layout is the slowest import of all; only done when asked for
+        from forensic_telco_analyzer.dashboard.app import app
         app.run_server(debug=True, port=8050)
-    
+
     # If no input files specified, show help
     if not (args.cdr or args.ipdr or args.tdr):
         parser.print_help()
 
-def process_cdr(cdr_file, output_dir):
-    """Process CDR file and generate analysis"""
-    logging.info(f"Processing CDR file: {cdr_file}")
-    
-    # Parse CDR file
-    cdr_parser = CDRParser(cdr_file)
-    cdr_data = cdr_parser.parse()
-    
-    if cdr_data is not None:
-        # Analyze CDR data
-        analyzer = CDRAnalyzer(cdr_data)
-        frequent_contacts = analyzer.find_frequent_contacts()
-        unusual_calls = analyzer.detect_unusual_patterns()
-        
-        # Visualize CDR data
-        visualizer = CDRVisualizer(cdr_data)
-        
-        # Save analysis results
-        if output_dir:
-            # Save data analysis
-            frequent_contacts.to_csv(os.path.join(output_dir, 'frequent_contacts.csv'))
-            unusual_calls.to_csv(os.path.join(output_dir, 'unusual_calls.csv'))
-            
-            # Save visualizations
-            visualizer.plot_call_frequency(save_path=os.path.join(output_dir, 'call_frequency.png'))
-            visualizer.plot_call_duration_histogram(save_path=os.path.join(output_dir, 'call_duration_histogram.png'))
-            
-            logging.info(f"CDR analysis complete. Results saved to {output_dir}")
-    else:
-        logging.error("Failed to parse CDR file.")
-
-def process_ipdr(ipdr_file, output_dir):
-    """Process IPDR file and generate analysis"""
-    logging.info(f"Processing IPDR file: {ipdr_file}")
-    
-    # Parse IPDR file
-    ipdr_parser = IPDRParser(ipdr_file)
-    ipdr_data = ipdr_parser.parse()
-    
-    if ipdr_data is not None:
-        # Analyze IPDR data
-        analyzer = IPDRAnalyzer(ipdr_data)
-        top_talkers = analyzer.find_top_talkers()
-        protocol_analysis = analyzer.analyze_protocols()
-        anomalies = analyzer.detect_anomalies()
-        
-        # Extract VoIP data if available
-        voip_extractor = VoIPExtractor(ipdr_file)
-        sip_calls = voip_extractor.extract_sip_calls()
-        
-        # Save analysis results
-        if output_dir:
-            # Create a DataFrame from top talkers and save
-            pd.DataFrame({
-                'ip_address': top_talkers['top_sources'].index,
-                'count': top_talkers['top_sources'].values
-            }).to_csv(os.path.join(output_dir, 'top_source_ips.csv'), index=False)
-            
-            pd.DataFrame({
-                'ip_address': top_talkers['top_destinations'].index,
-                'count': top_talkers['top_destinations'].values
-            }).to_csv(os.path.join(output_dir, 'top_destination_ips.csv'), index=False)
-            
-            # Save protocol analysis
-            pd.DataFrame({
-                'protocol': protocol_analysis.index,
-                'count': protocol_analysis.values
-            }).to_csv(os.path.join(output_dir, 'protocol_distribution.csv'), index=False)
-            
-            # Save anomalies if any found
-            if not anomalies.empty:
-                pd.DataFrame({
-                    'timestamp': anomalies.index,
-                    'packet_count': anomalies.values
-                }).to_csv(os.path.join(output_dir, 'traffic_anomalies.csv'), index=False)
-            
-            # Save VoIP calls if any found
-            if not sip_calls.empty:
-                sip_calls.to_csv(os.path.join(output_dir, 'voip_calls.csv'), index=False)
-            
-            logging.info(f"IPDR analysis complete. Results saved to {output_dir}")
-    else:
-        logging.error("Failed to parse IPDR file.")
-
-def process_tdr(tdr_file, tower_locations_file, output_dir):
-    """Process Tower Dump Record file and generate analysis"""
-    logging.info(f"Processing TDR file: {tdr_file}")
-    
-    # Parse TDR file
-    tdr_parser = TDRParser(tdr_file)
-    tdr_data = tdr_parser.parse()
-    
-    if tdr_data is not None:
-        # Analyze TDR data
-        analyzer = TDRAnalyzer(tdr_data)
-        
-        # Set up geo mapping if tower locations provided
-        if tower_locations_file:
-            geo_mapper = GeoMapper(tdr_data)
-            if geo_mapper.load_tower_locations(tower_locations_file):
-                # Print diagnostic information
-                logging.info(f"Successfully loaded {len(geo_mapper.tower_locations)} tower locations")
-                logging.info(f"First 3 tower locations: {list(geo_mapper.tower_locations.items())[:3]}")
-                logging.info(f"Number of unique IMSIs in data: {len(tdr_data['imsi'].unique())}")
-                logging.info(f"Number of records in TDR data: {len(tdr_data)}")
-                
-                # Get unique IMSIs
-                imsis = tdr_data['imsi'].unique()
-                
-                logging.info(f"Creating movement maps for {min(5, len(imsis))} IMSIs...")
-                
-                # Create movement maps for each IMSI (limit to first 5 for demonstration)
-                for i, imsi in enumerate(imsis[:5]):
-                    logging.info(f"  Processing IMSI {imsi}...")
-                    movement_map = geo_mapper.create_movement_map(imsi)
-                    if output_dir:
-                        map_path = os.path.join(output_dir, f'movement_map_{imsi}.html')
-                        movement_map.save(map_path)
-                        logging.info(f"  Movement map for IMSI {imsi} saved to {map_path}")
-                
-                # Create a heatmap of tower activity
-                logging.info("Creating tower activity heatmap...")
-                heatmap = geo_mapper.create_heatmap(output_dir)
-                
-                # Create a multi-IMSI comparison map (if we have at least 2 IMSIs)
-                if len(imsis) >= 2:
-                    logging.info("Creating multi-IMSI comparison map...")
-                    multi_map = geo_mapper.create_multi_imsi_map(imsis[:5], output_dir)
-                
-                # Calculate movement speeds for each IMSI
-                logging.info("Calculating movement speeds...")
-                for i, imsi in enumerate(imsis[:5]):
-                    speeds = geo_mapper.calculate_movement_speed(imsi)
-                    if not speeds.empty and output_dir:
-                        speeds.to_csv(os.path.join(output_dir, f'movement_speed_{imsi}.csv'), index=False)
-                        logging.info(f"  Movement speeds for IMSI {imsi} saved to {output_dir}")
-        
-        # Save analysis results
-        if output_dir:
-            # Save basic TDR analysis
-            tdr_data.to_csv(os.path.join(output_dir, 'processed_tdr.csv'), index=False)
-            
-            # If we have at least two IMSIs, find co-location
-            imsis = tdr_data['imsi'].unique()
-            if len(imsis) >= 2:
-                logging.info("Analyzing co-location patterns...")
-                co_location = analyzer.find_co_location(imsis[0], imsis[1])
-                if not co_location.empty:
-                    co_location.to_csv(os.path.join(output_dir, 'co_location_analysis.csv'), index=False)
-                    logging.info(f"Co-location analysis saved to {output_dir}")
-            
-            logging.info(f"TDR analysis complete. Results saved to {output_dir}")
-    else:
-        logging.error("Failed to parse TDR file.")
-
-def process_correlation(cdr_file, ipdr_file, tdr_file, output_dir):
-    """Perform cross-data correlation and save results."""
-    logging.info("Starting cross-data correlation...")
-
-    # Initialize the Correlation Engine
-    engine = CorrelationEngine()
-
-    # Load data into the engine
-    engine.load_data(cdr_file=cdr_file, ipdr_file=ipdr_file, tdr_file=tdr_file)
-
-    # Perform correlations
-    cdr_tdr_results = engine.correlate_cdr_tdr()
-    ipdr_cdr_results = engine.correlate_ipdr_cdr()
-    all_correlations = engine.correlate_all()
-
-    # Save results to output directory
-    if output_dir:
-        engine.save_results(output_dir)
-
-    logging.info("Cross-data correlation complete. Results saved.")
-
-def process_osint(cdr_file, api_key, output_dir):
-    """Perform OSINT lookups for phone numbers in CDR data."""
-    logging.info("Starting OSINT lookups...")
-
-    # Load CDR data
-    try:
-        cdr_data = pd.read_csv(cdr_file)
-        unique_numbers = cdr_data['source_number'].unique()
-        logging.info(f"Processing {len(unique_numbers)} unique phone numbers for OSINT lookup...")
-    except Exception as e:
-        logging.error(f"Failed to load CDR file: {cdr_file}. Error: {str(e)}")
-        return
-
-    # Initialize the lookup service
-    lookup_service = PhoneLookup(api_key)
-    results = []
-
-    # Perform lookups for the first 50 numbers (for demonstration purposes)
-    for number in unique_numbers[:50]:
-        try:
-            result = lookup_service.lookup_number(number)
-            results.append(result)
-            logging.info(f"Lookup successful for number: {number}")
-        except Exception as e:
-            logging.error(f"Failed to perform lookup for number: {number}. Error: {str(e)}")
-
-    # Save results to a CSV file
-    os.makedirs(output_dir, exist_ok=True)
-    output_file = os.path.join(output_dir, "osint_results.csv")
-
-    try:
-        pd.DataFrame(results).to_csv(output_file, index=False)
-        logging.info(f"OSINT lookups complete. Results saved to {output_file}.")
-    except Exception as e:
-        logging.error(f"Failed to save OSINT results to {output_file}. Error: {str(e)}")
-
-def correlate_osint_with_cdr(osint_file, cdr_file):
-    """Correlate OSINT results with CDR data."""
-    print("Correlating OSINT results with CDR data...")
-    
-    # Load OSINT and CDR data
-    osint_data = pd.read_csv(osint_file)
-    cdr_data = pd.read_csv(cdr_file)
-    
-    # Merge OSINT results with CDR data on phone numbers
-    merged_data = pd.merge(
-        cdr_data,
-        osint_data,
-        left_on='source_number',
-        right_on='Phone Number',
-        how='left'
-    )
-    
-    # Check if 'Carrier' exists in merged data
-    if 'Carrier' in merged_data.columns:
-        merged_data['Anomaly'] = merged_data['Carrier'].isnull()
-    else:
-        print("Warning: 'Carrier' column not found in OSINT results.")
-        merged_data['Anomaly'] = True  # Flag all rows as anomalies if 'Carrier' is missing
-        merged_data['Carrier'] = "Unknown"  # Add 'Carrier' column with default value
-        print("Added 'Carrier' column with default value 'Unknown'.")
-        print("Added 'Anomaly' column with default value True.")
-        print("Correlation complete. Found anomalies.")
-        return merged_data
-    
-    # Add flags for potential anomalies (e.g., unknown carriers)
-    merged_data['Anomaly'] = merged_data['Carrier'].isnull()
-    
-    print(f"Correlation complete. Found {merged_data['Anomaly'].sum()} anomalies.")
-    return merged_data
-
-def save_correlated_data(data, output_dir):
-    """Save correlated data to a CSV file."""
-    os.makedirs(output_dir, exist_ok=True)
-    output_file = os.path.join(output_dir, "correlated_osint_cdr.csv")
-    data.to_csv(output_file, index=False)
-    print(f"Correlated data saved to {output_file}.")
-
-def process_osint_correlation(osint_file, cdr_file, output_dir):
-    """Perform correlation between OSINT results and CDR data."""
-    correlated_data = correlate_osint_with_cdr(osint_file, cdr_file)
-    
-    if correlated_data is not None:
-        os.makedirs(output_dir, exist_ok=True)
-        output_file = os.path.join(output_dir, "correlated_osint_cdr.csv")
-        correlated_data.to_csv(output_file, index=False)
-        print(f"Correlated data saved to {output_file}.")
-    else:
-        print("No correlated data to save.")
-
-def analyze_correlated_network(correlated_file):
-    """Perform network analysis on correlated data."""
-    print("Performing network analysis...")
-    
-    # Load correlated data
-    data = pd.read_csv(correlated_file)
-    
-    # Initialize NetworkAnalyzer
-    analyzer = NetworkAnalyzer(data)
-    
-    # Build graph and calculate centrality measures
-    analyzer.build_graph()
-    centrality_df = analyzer.calculate_centrality()
-    
-    # Save centrality measures
-    os.makedirs("data/processed", exist_ok=True)
-    centrality_df.to_csv("data/processed/centrality_measures.csv", index=False)
-    
-    # Visualize graph
-    analyzer.visualize_graph(output_file="data/processed/network_graph.png")
-
-
-def generate_pdf_report(output_dir):
-    """Generate a PDF report summarizing findings."""
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-
-    # Title Page
-    pdf.add_page()
-    pdf.set_font("Arial", size=16)
-    pdf.cell(200, 10, txt="Forensic Telecommunications Analysis Report", ln=True, align='C')
-
-    # Add Centrality Measures
-    centrality_file = os.path.join(output_dir, "centrality_measures.csv")
-    if os.path.exists(centrality_file):
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-        pdf.cell(200, 10, txt="Centrality Measures", ln=True)
-        
-        centrality_data = pd.read_csv(centrality_file)
-        for _, row in centrality_data.iterrows():
-            pdf.cell(200, 10, txt=f"Node: {row['Node']}, Degree: {row['Degree Centrality']:.2f}, "
-                                  f"Betweenness: {row['Betweenness Centrality']:.2f}, PageRank: {row['PageRank']:.2f}",
-                     ln=True)
-
-    # Add Network Graph
-    graph_file = os.path.join(output_dir, "network_graph.png")
-    if os.path.exists(graph_file):
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-        pdf.cell(200, 10, txt="Network Graph", ln=True)
-        pdf.image(graph_file, x=10, y=30, w=180)
-
-    # Save PDF
-    report_path = os.path.join(output_dir, "analysis_report.pdf")
-    pdf.output(report_path)
-    logging.info(f"PDF report generated at {report_path}")
-
-
-def process_network_analysis(correlated_file, output_dir):
-    """Perform network analysis on the correlated data."""
-    try:
-        # Initialize NetworkAnalyzer with the correlated data file
-        analyzer = NetworkAnalyzer(correlated_file)
-        
-        # Build and visualize the graph
-        analyzer.build_graph()
-        graph_output = os.path.join(output_dir, "network_graph.png")
-        analyzer.visualize_graph(output_file=graph_output)
-        
-    except FileNotFoundError as e:
-        print(f"Error: {e}")
-    except Exception as e:
-        print(f"An unexpected error occurred during network analysis: {e}")
-
-# Example usage
 if __name__ == "__main__":
     main()
-
-import pandas as pd
-
-# Load OSINT data
-osint_file = 'data/processed/osint_results.csv'
-osint_data = pd.read_csv(osint_file)
-
-# Print column names
-print("OSINT Columns:", osint_data.columns.tolist())
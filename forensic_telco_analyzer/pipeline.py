@@ -0,0 +1,270 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+MANIFEST_FILE = 'run_manifest.json'
+MANIFEST_VERSION = 1
+
+HASH_CHUNK_BYTES = 1 << 20
+
+DEFAULT_WORKERS = 4
+
+
+def file_hash(path, memo=None):
+    """
+    SHA-1 of a file's contents, or None if it does not exist.
+    Args:
+        path (str): File to hash.
+        memo (dict): Hashes by absolute path with the mtime and size they were taken at;
+            reused while the file is unchanged and updated after hashing.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    key = os.path.abspath(path)
+    entry = memo.get(key) if memo is not None else None
+    if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+        return entry['sha1']
+
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    if memo is not None:
+        memo[key] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha1': digest.hexdigest()}
+    return digest.hexdigest()
+
+
+class Stage:
+    """One step of a pipeline: a function of the session and the files it reads and writes"""
+
+    def __init__(self, name, func, files=(), inputs=(), outputs=(), params=None, locks=(), after=()):
+        self.name = name
+        self.func = func
+        self.files = [path for path in files if path]
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        self.locks = sorted(locks)
+        self.after = set(after)
+        self.depends_on = set()
+
+
+class Pipeline:
+    """Runs the stages of one case as a dependency graph on a thread pool
+
+    Stages declare the input files they read (files), the artifacts of the
+    output directory they read (inputs) and the artifacts they write
+    (outputs). In the order stages are added, a stage waits for the last
+    earlier stage writing one of its inputs, and for every earlier stage
+    reading or writing one of its outputs; everything else runs
+    concurrently. Threads are used because stages share the session's
+    in-memory frames. Stages holding the same named lock never overlap
+    (e.g. 'matplotlib', whose pyplot state is global).
+
+    A stage is skipped when its fingerprint (name, parameters and the content
+    hashes of everything it reads) matches the run manifest in the output
+    directory and the outputs it wrote last time are unchanged. Downstream
+    stages of a skipped stage then read its outputs from disk.
+    """
+
+    def __init__(self, session, workers=None, force=False, profiler=None):
+        self.session = session
+        self.workers = workers or DEFAULT_WORKERS
+        self.force = force
+        self.profiler = profiler
+        self.stages = {}
+        self._lock = threading.Lock()
+        self._locks = {}
+        self.manifest_path = session.artifact_path(MANIFEST_FILE)
+        self.manifest = self._load_manifest()
+
+    def add(self, name, func, files=(), inputs=(), outputs=(), params=None, locks=(), after=()):
+        """
+        Add a stage; func is called as func(session, **params).
+        Args:
+            name (str): Unique stage name, used as its key in the run manifest.
+            func (callable): The stage function.
+            files (list): Input files read by the stage (None entries are ignored).
+            inputs (list): Artifacts of the output directory read by the stage.
+            outputs (list): Artifacts the stage writes to the output directory.
+            params (dict): Keyword arguments of func; part of the fingerprint.
+            locks (list): Names of shared resources the stage must hold while it runs.
+            after (list): Stages that must finish first, beyond those implied by inputs and outputs.
+        """
+        if name in self.stages:
+            raise ValueError(f"Duplicate pipeline stage: {name}")
+        stage = Stage(name, func, files, inputs, outputs, params, locks, after)
+
+        unknown = stage.after - set(self.stages)
+        if unknown:
+            raise ValueError(f"Stage {name} runs after unknown stages: {sorted(unknown)}")
+        stage.depends_on |= stage.after
+
+        producers = {}
+        for earlier in self.stages.values():
+            for artifact in earlier.outputs:
+                producers[artifact] = earlier.name
+            if set(stage.outputs) & (set(earlier.outputs) | set(earlier.inputs)):
+                stage.depends_on.add(earlier.name)
+        stage.depends_on |= {producers[artifact] for artifact in stage.inputs if artifact in producers}
+
+        self.stages[name] = stage
+        return stage
+
+    def _load_manifest(self):
+        empty = {'version': MANIFEST_VERSION, 'files': {}, 'stages': {}}
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return empty
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION:
+                return manifest
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable run manifest {self.manifest_path}: {e}")
+        return empty
+
+    def _save_manifest(self):
+        if not self.manifest_path:
+            return
+        os.makedirs(os.path.dirname(self.manifest_path) or '.', exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _hash(self, path):
+        # Hashing reads the whole file, so it happens outside the manifest lock
+        with self._lock:
+            memo = dict(self.manifest['files'])
+        digest = file_hash(path, memo)
+        with self._lock:
+            if os.path.abspath(path) in memo:
+                self.manifest['files'][os.path.abspath(path)] = memo[os.path.abspath(path)]
+        return digest
+
+    def fingerprint(self, stage):
+        """Content hash of a stage's name, parameters, input limits and everything it reads"""
+        state = {
+            'stage': stage.name,
+            'params': stage.params,
+            'files': {os.path.abspath(path): self._hash(path) for path in stage.files},
+            'inputs': {artifact: self._hash(self.session.artifact_path(artifact))
+                       for artifact in stage.inputs if self.session.artifact_path(artifact)},
+        }
+        limits = getattr(self.session, 'limits', None)
+        if limits:
+            # The time window and subscribers the inputs were limited to change every output
+            state['limits'] = limits
+        return hashlib.sha1(json.dumps(state, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _up_to_date(self, stage, fingerprint):
+        if self.force or not self.manifest_path:
+            return False
+        with self._lock:
+            entry = self.manifest['stages'].get(stage.name)
+        if not entry or entry.get('fingerprint') != fingerprint:
+            return False
+        return all(self._hash(self.session.artifact_path(artifact)) == digest
+                   for artifact, digest in entry.get('outputs', {}).items())
+
+    def _profile_outputs(self, stage, start):
+        """Report the declared outputs a stage wrote, including files it did not save through the session"""
+        for artifact in stage.outputs:
+            path = self.session.artifact_path(artifact)
+            if path and os.path.exists(path) and os.path.getmtime(path) >= int(start):
+                self.profiler.bytes('out', artifact, os.path.getsize(path))
+
+    def _run_stage(self, stage):
+        fingerprint = self.fingerprint(stage)
+        if self._up_to_date(stage, fingerprint):
+            logging.info(f"Stage {stage.name}: inputs unchanged, skipped")
+            return 'skipped'
+
+        with self._lock:
+            locks = [self._locks.setdefault(name, threading.Lock()) for name in stage.locks]
+        for lock in locks:
+            lock.acquire()
+        start = time.time()
+        try:
+            logging.info(f"Stage {stage.name}: running")
+            if self.profiler is not None:
+                with self.profiler.stage(stage.name):
+                    stage.func(self.session, **stage.params)
+                    self._profile_outputs(stage, start)
+            else:
+                stage.func(self.session, **stage.params)
+        except Exception as e:
+            logging.error(f"Error in pipeline stage {stage.name}: {str(e)}", exc_info=True)
+            return 'failed'
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+        seconds = time.time() - start
+
+        outputs = {}
+        written = False
+        for artifact in stage.outputs:
+            path = self.session.artifact_path(artifact)
+            digest = self._hash(path) if path else None
+            if digest is not None:
+                outputs[artifact] = digest
+                # Whole seconds of slack for file systems with coarse timestamps
+                written = written or os.path.getmtime(path) >= int(start)
+        if stage.outputs and not written:
+            # A stage that logs its own errors returns normally; without fresh outputs it must not be
+            # recorded as up to date, or the next run would skip it with the same inputs
+            logging.warning(f"Stage {stage.name}: finished without writing any of its outputs; not recorded")
+            return 'ran'
+        with self._lock:
+            self.manifest['stages'][stage.name] = {
+                'fingerprint': fingerprint,
+                'outputs': outputs,
+                'seconds': round(seconds, 3),
+                'finished_at': datetime.now().isoformat(timespec='seconds')
+            }
+            self._save_manifest()
+        logging.info(f"Stage {stage.name}: finished in {seconds:.1f}s")
+        return 'ran'
+
+    def run(self):
+        """
+        Run every stage once its dependencies are done.
+        Returns:
+            dict: Stage name -> 'ran', 'skipped', 'failed' or 'blocked' (a dependency failed).
+        """
+        start = time.time()
+        statuses = {}
+        pending = dict(self.stages)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='stage') as pool:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if not stage.depends_on <= set(statuses):
+                        continue
+                    del pending[name]
+                    if any(statuses[dependency] in ('failed', 'blocked') for dependency in stage.depends_on):
+                        logging.error(f"Stage {name} not run: a stage it depends on failed")
+                        statuses[name] = 'blocked'
+                    else:
+                        running[pool.submit(self._run_stage, stage)] = name
+                if not running:
+                    # Blocked stages were resolved above; loop again for their dependents
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    statuses[running.pop(future)] = future.result()
+
+        counts = {status: list(statuses.values()).count(status) for status in ('ran', 'skipped', 'failed', 'blocked')}
+        logging.info(f"Pipeline finished in {time.time() - start:.1f}s: " +
+                     ', '.join(f"{count} {status}" for status, count in counts.items() if count))
+        return statuses
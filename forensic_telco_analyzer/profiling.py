@@ -0,0 +1,248 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; CPU time falls back to time.process_time and peak RSS is not reported
+    resource = None
+
+PROFILE_REPORT = 'profile_report.json'
+PROFILE_DIR = 'profiles'
+PROFILE_VERSION = 2
+
+# Functions listed per stage in the JSON report when Python profiling is on
+TOP_FUNCTIONS = 25
+
+
+def _rss_bytes():
+    """Current resident set size from /proc (Linux only), else None"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _io_bytes():
+    """(bytes read, bytes written) by all read and write calls of this process from /proc (Linux
+    only), else (None, None); includes imports, .pyc files and anything else the process touches"""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            counters = dict(line.split(':', 1) for line in f if ':' in line)
+        # rchar/wchar count every read and write call, including those served by the page cache
+        return int(counters['rchar']), int(counters['wchar'])
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+
+def _snapshot():
+    read_bytes, written_bytes = _io_bytes()
+    snapshot = {
+        'wall': time.perf_counter(),
+        'cpu': time.process_time(),
+        'children_cpu': None,
+        'peak_rss': None,
+        'rss': _rss_bytes(),
+        'read_bytes': read_bytes,
+        'written_bytes': written_bytes
+    }
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        snapshot['cpu'] = usage.ru_utime + usage.ru_stime
+        # Worker processes (e.g. map rendering) are counted once they have been waited for
+        snapshot['children_cpu'] = children.ru_utime + children.ru_stime
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        snapshot['peak_rss'] = usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    return snapshot
+
+
+def _delta(start, end, key):
+    if start[key] is None or end[key] is None:
+        return None
+    return round(end[key] - start[key], 4)
+
+
+class Profiler:
+    """Per-stage time, memory, row and I/O accounting of a pipeline run
+
+    Each stage (and each section inside it, e.g. parsing an input) records
+    wall and CPU time, peak and growth of the resident set size, rows read
+    from and written to the session, and the size of the artifacts it read
+    from and wrote to disk. CPU time, RSS and the process_*_bytes syscall
+    totals are process-wide counters, so stages must run one at a time to
+    be told apart; main.py does that when profiling. With python=True,
+    each stage is also run under cProfile and its statistics are saved to
+    profile_dir as <stage>.prof (readable with pstats or snakeviz).
+    """
+
+    def __init__(self, python=False, profile_dir=None):
+        self.python = python
+        self.profile_dir = profile_dir
+        self.entries = []
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self._start = _snapshot()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _current(self):
+        return getattr(self._local, 'entry', None)
+
+    @contextmanager
+    def _measure(self, name, kind, python=False):
+        parent = self._current()
+        entry = {'name': name, 'kind': kind, 'parent': parent['name'] if parent else None,
+                 'status': 'ok', 'rows_in': {}, 'rows_out': {}, 'bytes_in': {}, 'bytes_out': {}}
+        self._local.entry = entry
+        profile = cProfile.Profile() if python else None
+        start = _snapshot()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield entry
+        except BaseException:
+            entry['status'] = 'failed'
+            raise
+        finally:
+            if profile is not None:
+                profile.disable()
+            end = _snapshot()
+            self._local.entry = parent
+            entry.update({
+                'start_seconds': round(start['wall'] - self._start['wall'], 4),
+                'wall_seconds': round(end['wall'] - start['wall'], 4),
+                'cpu_seconds': round(end['cpu'] - start['cpu'], 4),
+                'children_cpu_seconds': _delta(start, end, 'children_cpu'),
+                'peak_rss_bytes': end['peak_rss'],
+                'peak_rss_growth_bytes': _delta(start, end, 'peak_rss'),
+                'rss_growth_bytes': _delta(start, end, 'rss'),
+                'process_read_bytes': _delta(start, end, 'read_bytes'),
+                'process_written_bytes': _delta(start, end, 'written_bytes')
+            })
+            if profile is not None:
+                entry['python_profile'] = self._save_profile(name, profile)
+            with self._lock:
+                self.entries.append(entry)
+
+    def stage(self, name):
+        """Context manager measuring one pipeline stage"""
+        return self._measure(name, 'stage', python=self.python)
+
+    def section(self, name):
+        """Context manager measuring part of the current stage (e.g. parsing an input)"""
+        return self._measure(name, 'section')
+
+    def rows(self, direction, name, rows):
+        """Record that the current stage read ('in') or wrote ('out') an artifact of some rows"""
+        entry = self._current()
+        if entry is not None:
+            entry['rows_out' if direction == 'out' else 'rows_in'][name] = rows
+
+    def bytes(self, direction, name, size):
+        """Record that the current stage read ('in') or wrote ('out') an artifact file of some size"""
+        entry = self._current()
+        if entry is not None:
+            entry['bytes_out' if direction == 'out' else 'bytes_in'][name] = size
+
+    def _save_profile(self, name, profile):
+        stats = pstats.Stats(profile)
+        top = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in sorted(
+                stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]:
+            top.append({'function': f'{filename}:{line}({function})', 'calls': calls,
+                        'own_seconds': round(own, 4), 'cumulative_seconds': round(cumulative, 4)})
+        result = {'top_functions': top}
+        if self.profile_dir:
+            try:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                path = os.path.join(self.profile_dir, f'{name}.prof')
+                stats.dump_stats(path)
+                result['stats_file'] = path
+            except OSError as e:
+                logging.error(f"Error saving profile of stage {name}: {str(e)}")
+        return result
+
+    def report(self, statuses=None):
+        """
+        The JSON-serializable report of the run.
+        Args:
+            statuses (dict): Pipeline status of every stage ('ran', 'skipped', ...).
+        """
+        end = _snapshot()
+        with self._lock:
+            entries = list(self.entries)
+        return {
+            'version': PROFILE_VERSION,
+            'started_at': self.started_at,
+            'wall_seconds': round(end['wall'] - self._start['wall'], 4),
+            'cpu_seconds': round(end['cpu'] - self._start['cpu'], 4),
+            'peak_rss_bytes': end['peak_rss'],
+            'process_read_bytes': _delta(self._start, end, 'read_bytes'),
+            'process_written_bytes': _delta(self._start, end, 'written_bytes'),
+            'statuses': statuses or {},
+            'entries': entries
+        }
+
+    def save(self, path, statuses=None):
+        """Write the report as JSON and return it"""
+        report = self.report(statuses)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp_path, path)
+        return report
+
+
+def _size(value):
+    if value is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(value) < 1024 or unit == 'GB':
+            return f'{value:.0f}{unit}' if unit == 'B' else f'{value:.1f}{unit}'
+        value /= 1024
+
+
+def summary_table(report):
+    """Readable table of a profile report, one line per stage and indented sections
+
+    Read and written are the sizes of the artifact files each stage (or
+    section) read from and wrote to disk, not process-wide I/O.
+    """
+    header = ['stage', 'wall s', 'cpu s', 'peak rss', 'rss +', 'rows in', 'rows out', 'read', 'written']
+    lines = [header]
+    # Entries are recorded as they finish; in start order each stage comes before its sections
+    for entry in sorted(report['entries'], key=lambda e: e['start_seconds']):
+        name = f'  {entry["name"]}' if entry['parent'] else entry['name']
+        if entry['status'] != 'ok':
+            name += f' ({entry["status"]})'
+        lines.append([
+            name, f'{entry["wall_seconds"]:.2f}', f'{entry["cpu_seconds"]:.2f}',
+            _size(entry['peak_rss_bytes']), _size(entry['rss_growth_bytes']),
+            str(sum(entry['rows_in'].values())), str(sum(entry['rows_out'].values())),
+            _size(sum(entry['bytes_in'].values())), _size(sum(entry['bytes_out'].values()))
+        ])
+    # Sections record their own artifacts, so stages and sections add up without double counting
+    lines.append(['total', f'{report["wall_seconds"]:.2f}', f'{report["cpu_seconds"]:.2f}',
+                  _size(report['peak_rss_bytes']), '', '', '',
+                  _size(sum(sum(e['bytes_in'].values()) for e in report['entries'])),
+                  _size(sum(sum(e['bytes_out'].values()) for e in report['entries']))])
+
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    out = io.StringIO()
+    for i, line in enumerate(lines):
+        out.write('  '.join(cell.ljust(widths[j]) if j == 0 else cell.rjust(widths[j])
+                            for j, cell in enumerate(line)).rstrip() + '\n')
+        if i == 0 or i == len(lines) - 2:
+            out.write('  '.join('-' * width for width in widths) + '\n')
+    return out.getvalue()
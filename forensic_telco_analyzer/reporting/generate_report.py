@@ -46,6 +46,23 @@ def generate_report(output_dir):
             report.set_font('Arial', '', 12)
             report.cell(0, 10, f"Node: {row['Node']}, PageRank: {row['PageRank']:.4f}", ln=True)
 
+    # Add Section for Communities
+    community_file = "data/processed/community_summary.csv"
+    
+    if os.path.exists(community_file):
+        community_df = pd.read_csv(community_file).head(10)  # Show the 10 largest communities
+        
+        report.add_page()
+        report.set_font('Arial', 'B', 14)
+        report.cell(0, 10, 'Communities', ln=True)
+        
+        for _, row in community_df.iterrows():
+            report.set_font('Arial', '', 12)
+            report.multi_cell(0, 10, (
+                f"Community {row['Community']}: {row['Size']} members, "
+                f"{row['Internal Calls']} internal calls. Top members: {row['Top Members']}"
+            ))
+
     # Save the PDF report
     os.makedirs(output_dir, exist_ok=True)
     report_path = os.path.join(output_dir, "analysis_report.pdf")
@@ -0,0 +1,197 @@
+import json
+import logging
+import os
+import threading
+from contextlib import nullcontext
+
+import pandas as pd
+
+from forensic_telco_analyzer.cdr.parser import CDRParser
+from forensic_telco_analyzer.ipdr.parser import IPDRParser
+from forensic_telco_analyzer.tdr.parser import TDRParser
+
+# Columnar copies of the inputs, used when they are read with limits
+PARSE_CACHE_DIR = 'parse_cache'
+
+
+class CaseSession:
+    """Inputs and derived artifacts of one analysis run, each parsed at most once
+
+    The CDR, IPDR and TDR files are parsed, normalized and typed on first
+    access and handed to every stage from memory. Artifacts a stage produces
+    (correlations, OSINT results, centrality tables...) are kept under their
+    file name and written to the output directory; later stages read them
+    back from memory instead of re-parsing the CSV. Artifacts that were not
+    produced in this run are loaded from the output directory once.
+
+    Frames are shared between stages, which may run on different threads, so
+    stages must not modify them in place.
+
+    Inputs can be limited to a time window [start, end) and to some
+    subscribers; the parsers push those limits into the read (see
+    BaseParser), keeping a columnar cache of each input under the output
+    directory.
+
+    With a CaseStore, parsed inputs are also kept in its 'cdr', 'ipdr' and
+    'tdr' tables (rewritten only when their file changed), as are the
+    artifacts stages put with store=True, so indexed queries can replace
+    full scans.
+    """
+
+    def __init__(self, cdr_file=None, ipdr_file=None, tdr_file=None, output_dir=None, store=None,
+                 start=None, end=None, subscribers=None):
+        self.cdr_file = cdr_file
+        self.ipdr_file = ipdr_file
+        self.tdr_file = tdr_file
+        self.output_dir = output_dir
+        self.store = store
+        self.limits = {key: value for key, value in
+                       (('start', start), ('end', end), ('subscribers', sorted(subscribers) if subscribers else None))
+                       if value is not None}
+        self._stored = set()
+        # Profiler of the run (see profiling.Profiler); parsing and artifact rows are reported to it
+        self.profiler = None
+        self._frames = {}
+        self._artifacts = {}
+        self._graphs = {}
+        self._lock = threading.RLock()
+        # Stages running concurrently may parse different inputs at the same time
+        self._input_locks = {name: threading.Lock() for name in ('cdr', 'ipdr', 'tdr')}
+
+    def _input(self, name, path, parser_class):
+        with self._input_locks[name]:
+            if name not in self._frames:
+                data = None
+                if path:
+                    logging.info(f"Parsing {name.upper()} file: {path}")
+                    cache_dir = self.artifact_path(PARSE_CACHE_DIR) if self.limits else None
+                    with self._section(f'parse_{name}'):
+                        data = parser_class(path, cache_dir=cache_dir, **self.limits).parse()
+                        if data is not None and 'timestamp' in data.columns:
+                            data['timestamp'] = pd.to_datetime(data['timestamp'], errors='coerce')
+                        self._rows('out', name, data)
+                        self._bytes('in', name, path)
+                    if data is not None and self.store is not None:
+                        self._store(name, data, path)
+                self._frames[name] = data
+            self._rows('in', name, self._frames[name])
+            return self._frames[name]
+
+    def _section(self, name):
+        return self.profiler.section(name) if self.profiler is not None else nullcontext()
+
+    def _rows(self, direction, name, frame):
+        if self.profiler is not None and frame is not None:
+            self.profiler.rows(direction, name, len(frame))
+
+    def _bytes(self, direction, name, path):
+        if self.profiler is not None and path and os.path.exists(path):
+            self.profiler.bytes(direction, name, os.path.getsize(path))
+
+    def _store(self, name, data, source):
+        try:
+            # A table parsed with other limits holds other rows
+            tag = json.dumps(self.limits, sort_keys=True, default=str) if self.limits else None
+            if not self.store.is_fresh(name, source, tag=tag):
+                self.store.write(name, data, source=source, tag=tag)
+            with self._lock:
+                self._stored.add(name)
+        except Exception as e:
+            logging.error(f"Error storing {name} in case store: {str(e)}")
+
+    def stored_inputs(self):
+        """Inputs parsed so far whose store table holds the same data as their frame"""
+        with self._lock:
+            return sorted(self._stored)
+
+    @property
+    def cdr(self):
+        """Parsed CDR frame, or None if no CDR file was given or it failed to parse"""
+        return self._input('cdr', self.cdr_file, CDRParser)
+
+    @property
+    def ipdr(self):
+        """Parsed IPDR frame, or None if no IPDR file was given or it failed to parse"""
+        return self._input('ipdr', self.ipdr_file, IPDRParser)
+
+    @property
+    def tdr(self):
+        """Parsed TDR frame, or None if no TDR file was given or it failed to parse"""
+        return self._input('tdr', self.tdr_file, TDRParser)
+
+    def artifact_path(self, name):
+        """Path of an artifact in the output directory (None without one)"""
+        return os.path.join(self.output_dir, name) if self.output_dir else None
+
+    def put(self, name, frame, save=True, store=False, **to_csv_options):
+        """
+        Keep an artifact for later stages and write it to the output directory.
+        Args:
+            name (str): File name of the artifact, e.g. 'correlated_osint_cdr.csv'.
+            frame (DataFrame): Contents of the artifact.
+            save (bool): Also write it to the output directory.
+            store (bool): Also write it to the case store, if the session has one.
+            to_csv_options: Passed to DataFrame.to_csv (defaults to index=False).
+        """
+        with self._lock:
+            self._artifacts[name] = frame
+            self._graphs.pop(name, None)
+        self._rows('out', name, frame)
+        path = self.artifact_path(name)
+        if save and path:
+            os.makedirs(self.output_dir, exist_ok=True)
+            to_csv_options.setdefault('index', False)
+            frame.to_csv(path, **to_csv_options)
+            self._bytes('out', name, path)
+        if store and self.store is not None:
+            try:
+                # Recorded against the CSV just written, so readers can tell when it changes
+                self.store.write(name, frame, source=path if save else None)
+            except Exception as e:
+                logging.error(f"Error storing {name} in case store: {str(e)}")
+        return path
+
+    def get(self, name):
+        """An artifact from memory, else from the output directory; None if it does not exist"""
+        with self._lock:
+            if name not in self._artifacts:
+                path = self.artifact_path(name)
+                if path is None or not os.path.exists(path):
+                    return None
+                logging.info(f"Loading {name} from {self.output_dir}")
+                self._artifacts[name] = pd.read_csv(path)
+                self._bytes('in', name, path)
+            frame = self._artifacts[name]
+        self._rows('in', name, frame)
+        return frame
+
+    def in_memory(self, name):
+        """Frame of an artifact already held by the session, without loading it from disk"""
+        frame = self._artifacts.get(name)
+        self._rows('in', name, frame)
+        return frame
+
+    def graph_index(self, name):
+        """
+        Call graph of an artifact with one row per call.
+        Built from the frame when the artifact is in memory; otherwise loaded
+        through the binary cache kept next to its CSV.
+        """
+        # Imported here: building graphs pulls in scipy and networkx
+        from forensic_telco_analyzer.analysis.graph_index import GraphIndex
+
+        with self._lock:
+            index = self._graphs.get(name)
+            if index is None:
+                frame = self._artifacts.get(name)
+                if frame is not None:
+                    self._rows('in', name, frame)
+                    index = GraphIndex.from_frame(frame)
+                else:
+                    path = self.artifact_path(name)
+                    if path is None or not os.path.exists(path):
+                        raise FileNotFoundError(f"File not found: {path or name}")
+                    index = GraphIndex.load(path)
+                    self._bytes('in', name, path)
+                self._graphs[name] = index
+            return index
@@ -0,0 +1,35 @@
+import logging
+import os
+
+from forensic_telco_analyzer.cdr.analyzer import CDRAnalyzer
+from forensic_telco_analyzer.cdr.visualizer import CDRVisualizer
+
+
+def process_cdr(session):
+    """Analyze the session's CDR data and save the results"""
+    logging.info(f"Processing CDR file: {session.cdr_file}")
+    output_dir = session.output_dir
+    cdr_data = session.cdr
+    
+    if cdr_data is not None:
+        # The analyzer adds columns to its data; keep them out of the shared frame
+        analyzer = CDRAnalyzer(cdr_data.copy(deep=False))
+        frequent_contacts = analyzer.find_frequent_contacts()
+        unusual_calls = analyzer.detect_unusual_patterns()
+        
+        # Visualize CDR data
+        visualizer = CDRVisualizer(cdr_data)
+        
+        # Save analysis results
+        if output_dir:
+            # Save data analysis; through the session, so a profile counts the rows written
+            session.put('frequent_contacts.csv', frequent_contacts, index=True)
+            session.put('unusual_calls.csv', unusual_calls, index=True)
+            
+            # Save visualizations
+            visualizer.plot_call_frequency(save_path=os.path.join(output_dir, 'call_frequency.png'))
+            visualizer.plot_call_duration_histogram(save_path=os.path.join(output_dir, 'call_duration_histogram.png'))
+            
+            logging.info(f"CDR analysis complete. Results saved to {output_dir}")
+    else:
+        logging.error("Failed to parse CDR file.")
@@ -0,0 +1,28 @@
+import logging
+
+from forensic_telco_analyzer.correlation.engine import CorrelationEngine
+
+
+def process_correlation(session):
+    """Perform cross-data correlation and save results."""
+    logging.info("Starting cross-data correlation...")
+
+    # Initialize the Correlation Engine
+    engine = CorrelationEngine()
+
+    # Hand the session's parsed frames to the engine
+    engine.load_frames(cdr_data=session.cdr, ipdr_data=session.ipdr, tdr_data=session.tdr)
+    if session.store is not None:
+        # Window matching runs as indexed range joins over the stored inputs
+        engine.load_store(session.store, tables=session.stored_inputs())
+
+    # Perform correlations
+    cdr_tdr_results = engine.correlate_cdr_tdr()
+    ipdr_cdr_results = engine.correlate_ipdr_cdr()
+    all_correlations = engine.correlate_all()
+
+    # Keep results for later stages and save them to the output directory
+    for key, df in engine.correlation_results.items():
+        session.put(f'{key}_correlation.csv', df, store=True)
+
+    logging.info("Cross-data correlation complete. Results saved.")
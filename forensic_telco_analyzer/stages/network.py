@@ -0,0 +1,46 @@
+import os
+
+from forensic_telco_analyzer.analysis.incremental_centrality import refresh_centrality
+from forensic_telco_analyzer.analysis.network_analysis import NetworkAnalyzer
+
+
+def process_network_analysis(session, correlated_name, target=None, hops=2, prefix=''):
+    """Perform network analysis on a correlated call artifact of the session.
+
+    With a target number, visualization and centrality cover only the
+    target's ego network (everything within `hops` hops). Output file names
+    start with prefix, so analyses of different call files do not overwrite
+    each other. Errors are raised, so the pipeline records the stage as
+    failed and blocks its dependents.
+    """
+    output_dir = session.output_dir
+    correlated_file = session.artifact_path(correlated_name)
+    # Built from the frame when an earlier stage produced it in this run; otherwise
+    # the graph index is cached next to the correlated file, so reruns skip CSV parsing
+    index = session.graph_index(correlated_name)
+    analyzer = NetworkAnalyzer.from_index(index)
+    graph_output = os.path.join(output_dir, f"{prefix}network_graph.png")
+    
+    if target:
+        if target not in index:
+            raise ValueError(f"Number {target} not found in {correlated_file}")
+        
+        # Build and visualize the ego graph, then rank its members
+        ego = analyzer.ego_network(target, radius=hops)
+        ego.visualize_graph(output_file=graph_output, highlight=target)
+        session.put(f"{prefix}centrality_measures.csv", ego.calculate_centrality())
+        session.put(f"{prefix}ego_contacts.csv", index.k_hop(target, hops))
+        print(f"Ego network of {target}: {len(ego.nodes)} numbers within {hops} hops.")
+    else:
+        # Build and visualize the graph
+        analyzer.visualize_graph(output_file=graph_output)
+        
+        # Fold only rows appended since the last run into the saved centrality state
+        centrality_df = refresh_centrality(correlated_file, data=session.in_memory(correlated_name))
+        session.put(f"{prefix}centrality_measures.csv", centrality_df)
+    
+    # Detect communities on the sparse adjacency and save labels and summaries
+    labels_df, summary_df = analyzer.detect_communities()
+    session.put(f"{prefix}community_labels.csv", labels_df)
+    session.put(f"{prefix}community_summary.csv", summary_df)
+    print(f"Detected {len(summary_df)} communities; results saved to {output_dir}.")
@@ -0,0 +1,96 @@
+import logging
+import os
+
+import pandas as pd
+
+from forensic_telco_analyzer.osint.phone_lookup import PhoneLookup
+
+
+def process_osint(session, api_key):
+    """Perform OSINT lookups for phone numbers in the session's CDR data."""
+    logging.info("Starting OSINT lookups...")
+
+    # Numbers come from the CDR frame the session already parsed
+    cdr_data = session.cdr
+    if cdr_data is None or 'source_number' not in cdr_data.columns:
+        logging.error(f"Failed to load CDR file: {session.cdr_file}. No source_number column available.")
+        return
+    unique_numbers = cdr_data['source_number'].dropna().unique()
+    logging.info(f"Processing {len(unique_numbers)} unique phone numbers for OSINT lookup...")
+
+    # Initialize the lookup service
+    lookup_service = PhoneLookup(api_key)
+    results = []
+
+    # Perform lookups for the first 50 numbers (for demonstration purposes)
+    for number in unique_numbers[:50]:
+        try:
+            result = lookup_service.lookup_number(number)
+            results.append(result)
+            logging.info(f"Lookup successful for number: {number}")
+        except Exception as e:
+            logging.error(f"Failed to perform lookup for number: {number}. Error: {str(e)}")
+
+    # Keep the results for the correlation stage and save them to a CSV file
+    try:
+        output_file = session.put("osint_results.csv", pd.DataFrame(results))
+        logging.info(f"OSINT lookups complete. Results saved to {output_file}.")
+    except Exception as e:
+        logging.error(f"Failed to save OSINT results to {session.output_dir}. Error: {str(e)}")
+
+
+def correlate_osint_with_cdr(osint_data, cdr_data):
+    """Correlate OSINT results with CDR data (both already loaded)."""
+    print("Correlating OSINT results with CDR data...")
+    
+    # Merge OSINT results with CDR data on phone numbers
+    merged_data = pd.merge(
+        cdr_data,
+        osint_data,
+        left_on='source_number',
+        right_on='Phone Number',
+        how='left'
+    )
+    
+    # Check if 'Carrier' exists in merged data
+    if 'Carrier' in merged_data.columns:
+        merged_data['Anomaly'] = merged_data['Carrier'].isnull()
+    else:
+        print("Warning: 'Carrier' column not found in OSINT results.")
+        merged_data['Anomaly'] = True  # Flag all rows as anomalies if 'Carrier' is missing
+        merged_data['Carrier'] = "Unknown"  # Add 'Carrier' column with default value
+        print("Added 'Carrier' column with default value 'Unknown'.")
+        print("Added 'Anomaly' column with default value True.")
+        print("Correlation complete. Found anomalies.")
+        return merged_data
+    
+    # Add flags for potential anomalies (e.g., unknown carriers)
+    merged_data['Anomaly'] = merged_data['Carrier'].isnull()
+    
+    print(f"Correlation complete. Found {merged_data['Anomaly'].sum()} anomalies.")
+    return merged_data
+
+
+def save_correlated_data(data, output_dir):
+    """Save correlated data to a CSV file."""
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, "correlated_osint_cdr.csv")
+    data.to_csv(output_file, index=False)
+    print(f"Correlated data saved to {output_file}.")
+
+
+def process_osint_correlation(session):
+    """Perform correlation between OSINT results and CDR data."""
+    osint_data = session.get("osint_results.csv")
+    if osint_data is None or session.cdr is None:
+        print("No correlated data to save.")
+        return None
+    
+    correlated_data = correlate_osint_with_cdr(osint_data, session.cdr)
+    
+    if correlated_data is not None:
+        output_file = session.put("correlated_osint_cdr.csv", correlated_data, store=True)
+        print(f"Correlated data saved to {output_file}.")
+    else:
+        print("No correlated data to save.")
+    return correlated_data
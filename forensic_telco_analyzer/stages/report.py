@@ -0,0 +1,54 @@
+import logging
+import os
+
+from fpdf import FPDF
+
+
+def generate_pdf_report(session):
+    """Generate a PDF report summarizing findings."""
+    output_dir = session.output_dir
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+
+    # Title Page
+    pdf.add_page()
+    pdf.set_font("Arial", size=16)
+    pdf.cell(200, 10, txt="Forensic Telecommunications Analysis Report", ln=True, align='C')
+
+    # Add Centrality Measures
+    centrality_data = session.get("centrality_measures.csv")
+    if centrality_data is not None:
+        pdf.add_page()
+        pdf.set_font("Arial", size=12)
+        pdf.cell(200, 10, txt="Centrality Measures", ln=True)
+        
+        for _, row in centrality_data.iterrows():
+            pdf.cell(200, 10, txt=f"Node: {row['Node']}, Degree: {row['Degree Centrality']:.2f}, "
+                                  f"Betweenness: {row['Betweenness Centrality']:.2f}, PageRank: {row['PageRank']:.2f}",
+                     ln=True)
+
+    # Add Communities (largest first)
+    community_data = session.get("community_summary.csv")
+    if community_data is not None:
+        pdf.add_page()
+        pdf.set_font("Arial", size=12)
+        pdf.cell(200, 10, txt="Communities", ln=True)
+        
+        community_data = community_data.head(20)
+        for _, row in community_data.iterrows():
+            pdf.multi_cell(0, 10, txt=f"Community {row['Community']}: {row['Size']} members, "
+                                      f"{row['Internal Calls']} internal calls, {row['External Calls']} external calls. "
+                                      f"Top members: {row['Top Members']}")
+
+    # Add Network Graph
+    graph_file = os.path.join(output_dir, "network_graph.png")
+    if os.path.exists(graph_file):
+        pdf.add_page()
+        pdf.set_font("Arial", size=12)
+        pdf.cell(200, 10, txt="Network Graph", ln=True)
+        pdf.image(graph_file, x=10, y=30, w=180)
+
+    # Save PDF
+    report_path = os.path.join(output_dir, "analysis_report.pdf")
+    pdf.output(report_path)
+    logging.info(f"PDF report generated at {report_path}")
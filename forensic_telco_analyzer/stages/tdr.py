@@ -0,0 +1,94 @@
+import logging
+import os
+
+from forensic_telco_analyzer.tdr.analyzer import TDRAnalyzer
+from forensic_telco_analyzer.tdr.batch_maps import record_map, render_movement_maps
+from forensic_telco_analyzer.tdr.geo_mapper import GeoMapper
+from forensic_telco_analyzer.tdr.heatmap_tiles import build_heatmap_tiles
+
+
+def process_tdr(session, tower_locations_file, map_imsis=None, map_workers=None):
+    """Analyze the session's Tower Dump Records and save the results"""
+    logging.info(f"Processing TDR file: {session.tdr_file}")
+    output_dir = session.output_dir
+    tdr_data = session.tdr
+    
+    if tdr_data is not None:
+        # Analyze TDR data
+        analyzer = TDRAnalyzer(tdr_data)
+        
+        # Set up geo mapping if tower locations provided
+        if tower_locations_file:
+            geo_mapper = GeoMapper(tdr_data)
+            if geo_mapper.load_tower_locations(tower_locations_file):
+                # Print diagnostic information
+                registry = geo_mapper.registry
+                logging.info(f"Successfully loaded {len(registry)} tower locations")
+                logging.info(f"First 3 tower locations: {list(zip(registry.cell_ids[:3], registry.latitudes[:3], registry.longitudes[:3]))}")
+                logging.info(f"Number of unique IMSIs in data: {len(tdr_data['imsi'].unique())}")
+                logging.info(f"Number of records in TDR data: {len(tdr_data)}")
+                
+                # Get unique IMSIs
+                imsis = tdr_data['imsi'].unique()
+                
+                # Create movement maps for every IMSI (or the requested ones) in parallel
+                if output_dir:
+                    # Saved so the dashboard can render further maps on demand
+                    registry.save_cache(os.path.join(output_dir, 'tower_registry.npz'))
+                    
+                    if map_imsis is not None:
+                        # IMSIs given on the command line are strings; match the data's dtype
+                        wanted = set(map_imsis)
+                        map_imsis = [imsi for imsi in imsis if str(imsi) in wanted]
+                    logging.info(f"Creating movement maps for {len(map_imsis) if map_imsis is not None else len(imsis)} IMSIs...")
+                    render_movement_maps(tdr_data, tower_locations_file, output_dir,
+                                         imsis=map_imsis, workers=map_workers)
+                
+                # Create a heatmap of tower activity
+                logging.info("Creating tower activity heatmap...")
+                if output_dir:
+                    # Pre-aggregate activity into multi-resolution grid tiles; the heatmap
+                    # loads only the aggregates of its zoom level
+                    tiles_path = os.path.join(output_dir, 'heatmap_tiles.npz')
+                    with build_heatmap_tiles(tdr_data, geo_mapper.registry, tiles_path) as tiles:
+                        logging.info(f"Heatmap tiles saved to {tiles_path}")
+                        heatmap = geo_mapper.create_heatmap(output_dir, tiles=tiles)
+                    record_map(output_dir, 'heatmap', 'tower_activity_heatmap.html',
+                               'Tower activity heatmap', 'heatmap')
+                else:
+                    heatmap = geo_mapper.create_heatmap(output_dir)
+                
+                # Create a multi-IMSI comparison map (if we have at least 2 IMSIs)
+                if len(imsis) >= 2:
+                    logging.info("Creating multi-IMSI comparison map...")
+                    multi_map = geo_mapper.create_multi_imsi_map(imsis[:5], output_dir)
+                    if output_dir:
+                        record_map(output_dir, 'multi_imsi', 'multi_imsi_comparison.html',
+                                   'Multi-IMSI comparison', 'comparison')
+                
+                # Calculate movement speeds for each IMSI
+                logging.info("Calculating movement speeds...")
+                for i, imsi in enumerate(imsis[:5]):
+                    speeds = geo_mapper.calculate_movement_speed(imsi)
+                    if not speeds.empty and output_dir:
+                        session.put(f'movement_speed_{imsi}.csv', speeds)
+                        logging.info(f"  Movement speeds for IMSI {imsi} saved to {output_dir}")
+        
+        # Save analysis results
+        if output_dir:
+            # Save basic TDR analysis; its rows are already in the case store's 'tdr' table,
+            # which is only rewritten when the TDR file changes
+            session.put('processed_tdr.csv', tdr_data)
+            
+            # If we have at least two IMSIs, find co-location
+            imsis = tdr_data['imsi'].unique()
+            if len(imsis) >= 2:
+                logging.info("Analyzing co-location patterns...")
+                co_location = analyzer.find_co_location(imsis[0], imsis[1])
+                if not co_location.empty:
+                    session.put('co_location_analysis.csv', co_location)
+                    logging.info(f"Co-location analysis saved to {output_dir}")
+            
+            logging.info(f"TDR analysis complete. Results saved to {output_dir}")
+    else:
+        logging.error("Failed to parse TDR file.")
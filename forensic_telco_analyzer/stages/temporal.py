@@ -0,0 +1,20 @@
+import os
+
+from forensic_telco_analyzer.analysis.temporal_graph import TemporalGraph
+
+
+def process_temporal_analysis(session, correlated_name, slice_freq='W', window=4):
+    """Track how the call network changes over rolling time windows; errors are raised to the pipeline."""
+    output_dir = session.output_dir
+    data = session.get(correlated_name)
+    if data is None:
+        raise FileNotFoundError(f"File not found: {session.artifact_path(correlated_name) or correlated_name}")
+    
+    temporal = TemporalGraph(data, slice_freq=slice_freq)
+    summary_df, rankings_df = temporal.rolling_centrality(window=window)
+    
+    os.makedirs(output_dir, exist_ok=True)
+    summary_df.to_csv(os.path.join(output_dir, "temporal_windows.csv"), index=False)
+    rankings_df.to_csv(os.path.join(output_dir, "temporal_rankings.csv"), index=False)
+    temporal.new_contacts().to_csv(os.path.join(output_dir, "new_contacts.csv"), index=False)
+    print(f"Temporal analysis of {len(summary_df)} windows saved to {output_dir}.")
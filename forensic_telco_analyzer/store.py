@@ -0,0 +1,331 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+CASE_DB = 'case.sqlite'
+
+# Columns looked up by equality (subscriber, IMSI, cell, IP); each gets an index,
+# combined with the time column when the table has one
+INDEXED_COLUMNS = ('source_number', 'destination_number', 'phone_number', 'called_number',
+                   'imsi', 'cell_id', 'src_ip', 'dst_ip')
+TIME_COLUMNS = ('timestamp', 'call_timestamp')
+
+# Filter operators that translate to SQL
+OPERATORS = ('=', '!=', '<', '<=', '>', '>=', 'in', 'contains', 'startswith')
+
+INSERT_CHUNK_ROWS = 50000
+
+_NAT = np.iinfo(np.int64).min
+
+
+@contextmanager
+def _connect(db_path):
+    """Connection that commits on success and is always closed"""
+    connection = sqlite3.connect(db_path, timeout=60)
+    try:
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def table_name(name):
+    """Table holding an artifact, e.g. 'processed_tdr.csv' -> 'processed_tdr'"""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return re.sub(r'\W', '_', stem)
+
+
+def _kind(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(series):
+        return 'int'
+    if pd.api.types.is_float_dtype(series):
+        return 'float'
+    return 'text'
+
+
+SQL_TYPES = {'datetime': 'INTEGER', 'bool': 'INTEGER', 'int': 'INTEGER', 'float': 'REAL', 'text': 'TEXT'}
+
+
+def _to_sql_values(series, kind):
+    """Python values of a column as stored: datetimes as epoch nanoseconds, missing values as None"""
+    missing = series.isna().to_numpy()
+    if kind == 'datetime':
+        values = series.dt.tz_localize(None) if getattr(series.dt, 'tz', None) is not None else series
+        values = pd.Series(values.to_numpy('datetime64[ns]').view(np.int64)).astype(object)
+    elif kind == 'bool':
+        values = series.astype(object).map(lambda v: int(v) if v is not None and v == v else None)
+    elif kind == 'text':
+        values = series.astype(object).map(lambda v: v if isinstance(v, str) or v is None else str(v))
+    else:
+        values = series.astype(object)
+    values = np.array(values, dtype=object)
+    values[missing] = None
+    return values
+
+
+def _from_sql_values(values, kind):
+    if kind == 'datetime':
+        ints = np.array([_NAT if v is None else v for v in values], dtype=np.int64)
+        return pd.Series(ints.view('datetime64[ns]'))
+    if kind == 'bool':
+        series = pd.Series(list(values), dtype=object)
+        return series.astype(bool) if series.notna().all() else series.map(lambda v: None if v is None else bool(v))
+    if kind == 'int':
+        # Missing values need the nullable integer dtype, or the column would come back as float
+        if any(v is None for v in values):
+            return pd.Series(pd.array(list(values), dtype='Int64'))
+        return pd.Series(list(values), dtype=np.int64)
+    if kind == 'float':
+        return pd.Series([np.nan if v is None else v for v in values], dtype=float)
+    if kind == 'text':
+        return pd.Series(list(values), dtype=object)
+    return pd.Series(list(values), dtype=None if len(values) else object)
+
+
+def _frame(columns, rows, kinds):
+    """Frame of fetched rows, converting columns with a known stored kind back to their dtype"""
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    return pd.DataFrame({column: _from_sql_values(column_values, kinds.get(column))
+                         for column, column_values in zip(columns, values)}, columns=columns)
+
+
+class CaseStore:
+    """Embedded SQLite store of a case's parsed inputs and derived tables
+
+    Each table is written whole and atomically, with indexes on the
+    subscriber, IMSI, cell and IP columns it has (paired with its time
+    column) and on the time column itself. Datetimes are stored as epoch
+    nanoseconds so time windows are integer range scans. A catalog records
+    each table's column types and the CSV it was written from, so readers
+    can tell whether the table still matches the file.
+
+    Readers select only the columns they need and push filters, ordering
+    and limits down to SQLite instead of scanning CSVs.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._ready = False
+
+    def _init_db(self):
+        if self._ready:
+            return
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        with _connect(self.db_path) as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS _tables (
+                    name TEXT PRIMARY KEY,
+                    columns TEXT NOT NULL,
+                    rows INTEGER NOT NULL,
+                    source TEXT,
+                    source_mtime_ns INTEGER,
+                    source_size INTEGER,
+                    written_at REAL NOT NULL,
+                    source_tag TEXT
+                )''')
+            # Catalogs written before source_tag existed
+            catalog_columns = [row[1] for row in connection.execute('PRAGMA table_info(_tables)')]
+            if 'source_tag' not in catalog_columns:
+                connection.execute('ALTER TABLE _tables ADD COLUMN source_tag TEXT')
+        self._ready = True
+
+    def write(self, name, frame, source=None, tag=None):
+        """
+        Replace a table with the contents of a frame.
+        Args:
+            name (str): Table name, or the artifact file name it is derived from.
+            frame (DataFrame): Rows to store.
+            source (str): CSV the frame was parsed from or written to; its mtime and size are recorded.
+            tag (str): How the frame was derived from source (e.g. the time window it was limited to).
+        Returns:
+            str: The table name.
+        """
+        self._init_db()
+        table = table_name(name)
+        kinds = [(str(column), _kind(frame[column])) for column in frame.columns]
+        staging = f'{table}__staging'
+        stat = os.stat(source) if source and os.path.exists(source) else None
+        start = time.time()
+
+        with _connect(self.db_path) as connection:
+            connection.execute(f'DROP TABLE IF EXISTS {_quote(staging)}')
+            definition = ', '.join(f'{_quote(column)} {SQL_TYPES[kind]}' for column, kind in kinds)
+            connection.execute(f'CREATE TABLE {_quote(staging)} ({definition})')
+
+            insert = f'INSERT INTO {_quote(staging)} VALUES ({", ".join("?" * len(kinds))})'
+            for offset in range(0, len(frame), INSERT_CHUNK_ROWS):
+                chunk = frame.iloc[offset:offset + INSERT_CHUNK_ROWS]
+                columns = [_to_sql_values(chunk.iloc[:, i], kind) for i, (_, kind) in enumerate(kinds)]
+                connection.executemany(insert, zip(*columns))
+
+            # Swap the new table in within the same transaction, so readers see old or new rows, never a mix
+            connection.execute(f'DROP TABLE IF EXISTS {_quote(table)}')
+            connection.execute(f'ALTER TABLE {_quote(staging)} RENAME TO {_quote(table)}')
+            names = [column for column, _ in kinds]
+            time_column = next((column for column in TIME_COLUMNS if column in names), None)
+            for column in names:
+                if column in INDEXED_COLUMNS:
+                    indexed = [column, time_column] if time_column else [column]
+                    connection.execute(f'CREATE INDEX {_quote(f"ix_{table}_{column}")} ON {_quote(table)} '
+                                       f'({", ".join(map(_quote, indexed))})')
+            if time_column:
+                connection.execute(f'CREATE INDEX {_quote(f"ix_{table}_{time_column}")} ON {_quote(table)} '
+                                   f'({_quote(time_column)})')
+            connection.execute(
+                'INSERT OR REPLACE INTO _tables (name, columns, rows, source, source_mtime_ns, source_size, written_at, '
+                'source_tag) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (table, json.dumps(kinds), len(frame), os.path.abspath(source) if source else None,
+                 stat.st_mtime_ns if stat else None, stat.st_size if stat else None, time.time(), tag)
+            )
+        logging.info(f"Stored {len(frame)} rows in case table {table} ({time.time() - start:.1f}s)")
+        return table
+
+    def info(self, name):
+        """Catalog entry of a table (columns, rows, source), or None if it does not exist"""
+        if not os.path.exists(self.db_path):
+            return None
+        self._init_db()
+        with _connect(self.db_path) as connection:
+            row = connection.execute('SELECT columns, rows, source, source_mtime_ns, source_size, source_tag '
+                                     'FROM _tables WHERE name = ?', (table_name(name),)).fetchone()
+        if row is None:
+            return None
+        return {'columns': dict(json.loads(row[0])), 'order': [c for c, _ in json.loads(row[0])],
+                'rows': row[1], 'source': row[2], 'source_mtime_ns': row[3], 'source_size': row[4], 'tag': row[5]}
+
+    def is_fresh(self, name, source, tag=None):
+        """Whether a table exists and was written from the current contents of a CSV (derived as tag says)"""
+        info = self.info(name)
+        if info is None:
+            return False
+        try:
+            stat = os.stat(source)
+        except FileNotFoundError:
+            return False
+        return (info['source'] == os.path.abspath(source) and info['tag'] == tag and
+                info['source_mtime_ns'] == stat.st_mtime_ns and info['source_size'] == stat.st_size)
+
+    def _where(self, kinds, filters):
+        clauses, params = [], []
+        for column, operator, value in filters:
+            if column not in kinds:
+                raise KeyError(f"Unknown column: {column}")
+            if operator not in OPERATORS:
+                raise ValueError(f"Unsupported operator: {operator}")
+            kind = kinds[column]
+            quoted = _quote(column)
+            if operator in ('contains', 'startswith'):
+                if kind == 'datetime':
+                    raise ValueError(f"Text matching is not supported on datetime column {column}")
+                if operator == 'contains':
+                    clauses.append(f'instr(CAST({quoted} AS TEXT), ?) > 0')
+                    params.append(str(value))
+                else:
+                    clauses.append(f'substr(CAST({quoted} AS TEXT), 1, ?) = ?')
+                    params.extend([len(str(value)), str(value)])
+            elif operator == 'in':
+                values = [self._coerce(kind, v) for v in value]
+                clauses.append(f'{quoted} IN ({", ".join("?" * len(values))})' if values else '0')
+                params.extend(values)
+            elif operator == '!=':
+                # Missing values differ from everything, as in pandas
+                clauses.append(f'({quoted} != ? OR {quoted} IS NULL)')
+                params.append(self._coerce(kind, value))
+            else:
+                clauses.append(f'{quoted} {operator} ?')
+                params.append(self._coerce(kind, value))
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    @staticmethod
+    def _coerce(kind, value):
+        """Filter value in the stored representation of a column; None (matches nothing) if it does not convert"""
+        if value is None:
+            return None
+        try:
+            if kind == 'datetime':
+                value = pd.Timestamp(value)
+                return None if pd.isna(value) else value.tz_localize(None).value if value.tz else value.value
+            if kind == 'bool':
+                return int(str(value).lower() == 'true') if isinstance(value, str) else int(bool(value))
+            if kind in ('int', 'float'):
+                number = pd.to_numeric(value, errors='coerce')
+                return None if pd.isna(number) else number.item() if hasattr(number, 'item') else number
+        except (TypeError, ValueError):
+            return None
+        return value if isinstance(value, str) else str(value)
+
+    def query(self, name, columns=None, filters=(), order_by=(), limit=None, offset=0):
+        """
+        Rows of a table, with projection, filters, ordering and paging done by SQLite.
+        Args:
+            name (str): Table name or artifact file name.
+            columns (list): Columns to return (default: all).
+            filters (list): (column, operator, value) triples joined with AND; operators are
+                =, !=, <, <=, >, >=, in, contains and startswith.
+            order_by (list): (column, ascending) pairs; missing values sort last, ties keep stored order.
+            limit (int): Maximum rows to return.
+            offset (int): Rows to skip.
+        Returns:
+            DataFrame: The matching rows with their original dtypes, or None if the table does not exist.
+        """
+        info = self.info(name)
+        if info is None:
+            return None
+        kinds = info['columns']
+        columns = list(columns) if columns is not None else info['order']
+        for column in columns:
+            if column not in kinds:
+                raise KeyError(f"Unknown column: {column}")
+
+        where, params = self._where(kinds, filters)
+        order = [f'{_quote(column)} IS NULL, {_quote(column)} {"ASC" if ascending else "DESC"}'
+                 for column, ascending in order_by]
+        sql = (f'SELECT {", ".join(map(_quote, columns)) if columns else "1"} FROM {_quote(table_name(name))}{where}'
+               f' ORDER BY {", ".join(order + ["rowid"])}')
+        if limit is not None or offset:
+            sql += ' LIMIT ? OFFSET ?'
+            params.extend([-1 if limit is None else int(limit), int(offset)])
+
+        with _connect(self.db_path) as connection:
+            rows = connection.execute(sql, params).fetchall()
+        return _frame(columns, rows, kinds)
+
+    def count(self, name, filters=()):
+        """Number of rows of a table matching filters, or None if the table does not exist"""
+        info = self.info(name)
+        if info is None:
+            return None
+        where, params = self._where(info['columns'], filters)
+        with _connect(self.db_path) as connection:
+            return connection.execute(f'SELECT COUNT(*) FROM {_quote(table_name(name))}{where}', params).fetchone()[0]
+
+    def select(self, sql, params=(), kinds=None):
+        """
+        Result of a read-only SQL statement over the store's tables.
+        Args:
+            sql (str): SELECT statement; table names as returned by table_name().
+            params (tuple): Statement parameters.
+            kinds (dict): Stored kind ('datetime', 'int', ...) of result columns to convert back.
+        """
+        self._init_db()
+        with _connect(self.db_path) as connection:
+            cursor = connection.execute(sql, params)
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+        return _frame(columns, rows, kinds or {})
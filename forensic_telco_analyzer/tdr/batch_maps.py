@@ -0,0 +1,179 @@
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+from forensic_telco_analyzer.tdr.geo_mapper import GeoMapper
+from forensic_telco_analyzer.tdr.tower_registry import TowerRegistry
+from forensic_telco_analyzer.utils.processes import pool_context
+
+MANIFEST_FILE = 'maps_manifest.json'
+MANIFEST_VERSION = 1
+
+# Tower registry loaded once per worker process by init_render_worker
+_worker_registry = None
+
+
+def load_manifest(output_dir):
+    """Load the map manifest of an output directory (empty if missing)"""
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION:
+                return manifest
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable map manifest {manifest_path}: {e}")
+    return {'version': MANIFEST_VERSION, 'maps': {}}
+
+
+def save_manifest(output_dir, manifest):
+    """Atomically write the map manifest of an output directory"""
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def record_map(output_dir, key, file_name, label, kind, **details):
+    """Add or replace a single map entry in the manifest"""
+    manifest = load_manifest(output_dir)
+    manifest['maps'][key] = {
+        'file': file_name,
+        'label': label,
+        'kind': kind,
+        'rendered_at': datetime.now().isoformat(timespec='seconds'),
+        **details
+    }
+    save_manifest(output_dir, manifest)
+
+
+def imsi_data_hash(imsi_data, mode, tower_location_file):
+    """Content hash of one IMSI's pings plus everything else that shapes its map"""
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(imsi_data, index=False).to_numpy().tobytes())
+    digest.update(','.join(map(str, imsi_data.columns)).encode())
+    digest.update(str(mode).encode())
+    stat = os.stat(tower_location_file)
+    digest.update(f"{stat.st_mtime_ns}:{stat.st_size}".encode())
+    return digest.hexdigest()
+
+
+def movement_map_file(imsi):
+    return f'movement_map_{imsi}.html'
+
+
+def load_registry(registry_file):
+    """Load a tower registry from a location CSV or a saved registry .npz"""
+    if registry_file.endswith('.npz'):
+        registry = TowerRegistry.load_cache(registry_file)
+        if registry is None:
+            raise ValueError(f"Unreadable tower registry: {registry_file}")
+        return registry
+    return TowerRegistry.load(registry_file)
+
+
+def init_render_worker(registry_file):
+    global _worker_registry
+    _worker_registry = load_registry(registry_file)
+
+
+def render_imsi_html(imsi, imsi_data, mode='auto', registry=None):
+    """Render one IMSI's movement map to an HTML string; runs inside a worker process"""
+    geo_mapper = GeoMapper(imsi_data, registry if registry is not None else _worker_registry)
+    movement_map = geo_mapper.create_movement_map(imsi, mode=mode)
+    return movement_map.get_root().render()
+
+
+def render_imsi_map(imsi, imsi_data, map_path, mode='auto', registry=None):
+    """Render and save one IMSI's movement map; runs inside a worker process"""
+    with open(map_path, 'w', encoding='utf-8') as f:
+        f.write(render_imsi_html(imsi, imsi_data, mode, registry))
+    return map_path
+
+
+def render_movement_maps(tdr_data, tower_location_file, output_dir, imsis=None, workers=None,
+                         mode='auto', force=False):
+    """Render movement maps for every IMSI (or the given list) across a process pool
+
+    Each worker receives only its IMSI's slice of the data. Maps whose
+    input hash matches the manifest entry are skipped unless force=True.
+    Returns the updated manifest.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+
+    # Build (or refresh) the binary registry cache once so workers load it quickly
+    registry = load_registry(tower_location_file)
+
+    groups = tdr_data.groupby('imsi', sort=False).indices
+    if imsis is None:
+        imsis = list(groups.keys())
+
+    jobs = []
+    skipped = 0
+    for imsi in imsis:
+        if imsi not in groups:
+            logging.warning(f"No TDR records for IMSI {imsi}; skipping map")
+            continue
+
+        imsi_data = tdr_data.iloc[groups[imsi]]
+        digest = imsi_data_hash(imsi_data, mode, tower_location_file)
+        key = f'movement:{imsi}'
+        file_name = movement_map_file(imsi)
+        entry = manifest['maps'].get(key)
+
+        if (not force and entry and entry.get('hash') == digest and
+                os.path.exists(os.path.join(output_dir, file_name))):
+            skipped += 1
+            continue
+
+        jobs.append((imsi, imsi_data, key, file_name, digest))
+
+    logging.info(f"Rendering {len(jobs)} movement maps ({skipped} unchanged, skipped)")
+
+    def record(imsi, imsi_data, key, file_name, digest):
+        manifest['maps'][key] = {
+            'file': file_name,
+            'label': f'Movement map - IMSI {imsi}',
+            'kind': 'movement',
+            'imsi': str(imsi),
+            'hash': digest,
+            'pings': int(len(imsi_data)),
+            'rendered_at': datetime.now().isoformat(timespec='seconds')
+        }
+
+    try:
+        if workers == 1 or len(jobs) <= 1:
+            for imsi, imsi_data, key, file_name, digest in jobs:
+                try:
+                    render_imsi_map(imsi, imsi_data, os.path.join(output_dir, file_name), mode, registry)
+                    record(imsi, imsi_data, key, file_name, digest)
+                except Exception as e:
+                    logging.error(f"Failed to render movement map for IMSI {imsi}: {e}")
+        else:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context(),
+                                     initializer=init_render_worker, initargs=(tower_location_file,)) as pool:
+                futures = {}
+                for job in jobs:
+                    imsi, imsi_data, key, file_name, digest = job
+                    map_path = os.path.join(output_dir, file_name)
+                    futures[pool.submit(render_imsi_map, imsi, imsi_data, map_path, mode)] = job
+                for future in as_completed(futures):
+                    imsi = futures[future][0]
+                    try:
+                        future.result()
+                        record(*futures[future])
+                    except Exception as e:
+                        logging.error(f"Failed to render movement map for IMSI {imsi}: {e}")
+    finally:
+        # Keep whatever finished, even if the run was interrupted
+        save_manifest(output_dir, manifest)
+
+    return manifest
@@ -5,34 +5,54 @@ import os
 from folium.plugins import HeatMap, MarkerCluster, TimestampedGeoJson
 from datetime import datetime, timedelta
 import json
+import numpy as np
+from forensic_telco_analyzer.tdr.tower_registry import TowerRegistry, TowerLocationView
 
 class GeoMapper:
-    def __init__(self, tower_data):
+    # Above this many pings, mode='auto' movement maps switch to compact rendering
+    COMPACT_PING_THRESHOLD = 1000
+    # Upper bounds that keep compact maps small regardless of ping count
+    MAX_PATH_POINTS = 2000
+    MAX_TOWER_FEATURES = 5000
+    
+    def __init__(self, tower_data, registry=None):
         self.tower_data = tower_data
-        self.tower_locations = {}
+        self.registry = registry
+        # (tower_data frame, ping count per tower) of the last tower_activity call
+        self._tower_activity = None
         self.colors = ['blue', 'red', 'green', 'purple', 'orange', 'darkred', 'lightred', 'beige', 'darkblue', 'darkgreen']
     
-    def load_tower_locations(self, tower_location_file):
-        """Load tower location data from CSV"""
+    @property
+    def tower_locations(self):
+        """Read-only cell_id -> (lat, lon) mapping over the tower registry"""
+        if self.registry is None:
+            return {}
+        return TowerLocationView(self.registry)
+    
+    def load_tower_locations(self, tower_location_file, use_cache=True):
+        """Load tower location data from CSV (or its cached binary form)"""
         try:
             # Check if file exists
             if not os.path.exists(tower_location_file):
                 print(f"Error: Tower location file '{tower_location_file}' not found")
                 return False
                 
-            locations = pd.read_csv(tower_location_file)
-            
-            # Create dictionary of tower_id -> (lat, lon)
-            for _, row in locations.iterrows():
-                self.tower_locations[row['cell_id']] = (row['latitude'], row['longitude'])
+            self.registry = TowerRegistry.load(tower_location_file, use_cache=use_cache)
             
             return True
         except Exception as e:
             print(f"Error loading tower locations: {e}")
             return False
     
-    def create_movement_map(self, imsi, start_time=None, end_time=None):
-        """Create a map showing movement of a specific IMSI"""
+    def _locate(self, data):
+        """Latitude/longitude arrays for the cell_id column of a frame"""
+        if self.registry is None:
+            nan = np.full(len(data), np.nan)
+            return nan, nan.copy()
+        return self.registry.locate(data['cell_id'].to_numpy())
+    
+    def _imsi_pings(self, imsi, start_time=None, end_time=None):
+        """Time-sorted pings of one IMSI, optionally limited to a time window"""
         # Filter data for the specific IMSI
         imsi_data = self.tower_data[self.tower_data['imsi'] == imsi]
         
@@ -43,7 +63,20 @@ class GeoMapper:
             imsi_data = imsi_data[imsi_data['timestamp'] <= end_time]
         
         # Sort by timestamp
-        imsi_data = imsi_data.sort_values('timestamp')
+        return imsi_data.sort_values('timestamp')
+    
+    def create_movement_map(self, imsi, start_time=None, end_time=None, mode='auto'):
+        """Create a map showing movement of a specific IMSI
+        
+        mode='detailed' draws one marker per ping plus a time slider,
+        mode='compact' draws one feature per visited tower (see
+        create_compact_movement_map), and mode='auto' picks compact once the
+        IMSI has more than COMPACT_PING_THRESHOLD pings.
+        """
+        imsi_data = self._imsi_pings(imsi, start_time, end_time)
+        
+        if mode == 'compact' or (mode == 'auto' and len(imsi_data) > self.COMPACT_PING_THRESHOLD):
+            return self._render_compact_movement_map(imsi, imsi_data)
         
         # Check if we have any data
         if len(imsi_data) == 0:
@@ -51,10 +84,12 @@ class GeoMapper:
             # Return a default map centered on India
             return folium.Map(location=[20.5937, 78.9629], zoom_start=5)
         
+        # Look up every ping's tower in one vectorized pass
+        lats, lons = self._locate(imsi_data)
+        
         # Create map centered on first tower
-        first_tower = imsi_data.iloc[0]['cell_id']
-        if first_tower in self.tower_locations:
-            center_lat, center_lon = self.tower_locations[first_tower]
+        if not np.isnan(lats[0]):
+            center_lat, center_lon = lats[0], lons[0]
         else:
             # Default center if tower location unknown
             center_lat, center_lon = 20.5937, 78.9629  # India coordinates
@@ -70,10 +105,9 @@ class GeoMapper:
         # Add markers for each tower ping
         points = []
         timestamps = []
-        for _, row in imsi_data.iterrows():
+        for (_, row), lat, lon in zip(imsi_data.iterrows(), lats, lons):
             tower_id = row['cell_id']
-            if tower_id in self.tower_locations:
-                lat, lon = self.tower_locations[tower_id]
+            if not np.isnan(lat):
                 timestamp = row['timestamp']
                 timestamps.append(timestamp)
                 
@@ -116,21 +150,17 @@ class GeoMapper:
         
         # Add time slider if we have timestamps
         if len(points) > 1 and all(timestamps):
-            self._add_timestamped_geojson(m, imsi_data, imsi)
+            self._add_timestamped_geojson(m, imsi_data, imsi, lats, lons)
         
         return m
     
-    def _add_timestamped_geojson(self, map_obj, imsi_data, imsi):
+    def _add_timestamped_geojson(self, map_obj, imsi_data, imsi, lats, lons):
         """Add a time slider to visualize movement over time"""
         features = []
         
-        for _, row in imsi_data.iterrows():
-            tower_id = row['cell_id']
-            if tower_id not in self.tower_locations:
+        for tower_id, timestamp, lat, lon in zip(imsi_data['cell_id'], imsi_data['timestamp'], lats, lons):
+            if np.isnan(lat):
                 continue
-                
-            lat, lon = self.tower_locations[tower_id]
-            timestamp = row['timestamp']
             
             # Convert timestamp to string format required by TimestampedGeoJson
             time_str = timestamp.strftime('%Y-%m-%d %H:%M:%S')
@@ -173,26 +203,138 @@ class GeoMapper:
             time_slider_drag_update=True,
         ).add_to(map_obj)
     
-    def create_heatmap(self, output_dir=None):
-        """Create a heatmap of all tower activity"""
-        # Check if we have tower locations
-        if not self.tower_locations:
-            print("Error: No tower locations loaded")
-            return None
+    def summarize_visits(self, imsi, start_time=None, end_time=None):
+        """Collapse consecutive pings on the same tower into visits"""
+        imsi_data = self._imsi_pings(imsi, start_time, end_time)
+        return self._collapse_visits(imsi_data)
+    
+    def _collapse_visits(self, imsi_data):
+        columns = ['cell_id', 'latitude', 'longitude', 'first_seen', 'last_seen', 'pings']
+        lats, lons = self._locate(imsi_data)
+        known = ~np.isnan(lats)
+        if not known.any():
+            return pd.DataFrame(columns=columns)
+        
+        # Pings on unknown towers cannot be placed, so they do not split visits
+        towers = imsi_data['cell_id'].to_numpy()[known]
+        timestamps = imsi_data['timestamp'].to_numpy()[known]
+        lats, lons = lats[known], lons[known]
+        
+        # A new visit starts wherever the tower differs from the previous ping
+        starts = np.flatnonzero(np.r_[True, towers[1:] != towers[:-1]])
+        ends = np.r_[starts[1:], len(towers)] - 1
+        
+        return pd.DataFrame({
+            'cell_id': towers[starts],
+            'latitude': lats[starts],
+            'longitude': lons[starts],
+            'first_seen': timestamps[starts],
+            'last_seen': timestamps[ends],
+            'pings': ends - starts + 1
+        }, columns=columns)
+    
+    def create_compact_movement_map(self, imsi, start_time=None, end_time=None):
+        """Create a movement map whose size is bounded regardless of ping count"""
+        imsi_data = self._imsi_pings(imsi, start_time, end_time)
+        return self._render_compact_movement_map(imsi, imsi_data)
+    
+    def _render_compact_movement_map(self, imsi, imsi_data):
+        """Render visits as one GeoJSON layer plus a simplified path"""
+        visits = self._collapse_visits(imsi_data)
+        
+        if visits.empty:
+            print(f"No located data found for IMSI {imsi}")
+            return folium.Map(location=[20.5937, 78.9629], zoom_start=5)
+        
+        m = folium.Map(location=[visits['latitude'].iloc[0], visits['longitude'].iloc[0]], zoom_start=12)
         
-        # Count activity at each tower
-        tower_activity = self.tower_data['cell_id'].value_counts()
+        # One feature per tower, carrying its visit statistics for the popup
+        towers = visits.groupby('cell_id', sort=False).agg(
+            latitude=('latitude', 'first'),
+            longitude=('longitude', 'first'),
+            visits=('pings', 'size'),
+            pings=('pings', 'sum'),
+            first_seen=('first_seen', 'min'),
+            last_seen=('last_seen', 'max')
+        ).reset_index()
+        towers = towers.nlargest(self.MAX_TOWER_FEATURES, 'pings')
         
-        # Create data for heatmap
-        heat_data = []
-        for tower_id, count in tower_activity.items():
-            if tower_id in self.tower_locations:
-                lat, lon = self.tower_locations[tower_id]
-                # Add weight based on activity count
-                heat_data.append([lat, lon, count])
+        features = [
+            {
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+                'properties': {
+                    'cell_id': str(cell_id),
+                    'visits': int(n_visits),
+                    'pings': int(n_pings),
+                    'first_seen': str(first_seen),
+                    'last_seen': str(last_seen)
+                }
+            }
+            for cell_id, lat, lon, n_visits, n_pings, first_seen, last_seen in zip(
+                towers['cell_id'], towers['latitude'], towers['longitude'], towers['visits'],
+                towers['pings'], towers['first_seen'], towers['last_seen']
+            )
+        ]
+        
+        folium.GeoJson(
+            {'type': 'FeatureCollection', 'features': features},
+            name=f"Cell Towers - {imsi}",
+            popup=folium.GeoJsonPopup(
+                fields=['cell_id', 'visits', 'pings', 'first_seen', 'last_seen'],
+                aliases=['Tower ID', 'Visits', 'Pings', 'First Seen', 'Last Seen']
+            ),
+            tooltip=folium.GeoJsonTooltip(fields=['cell_id'], aliases=['Tower'])
+        ).add_to(m)
+        
+        # Movement path over visits, simplified and capped in length
+        path = simplify_path(visits[['latitude', 'longitude']].to_numpy(), max_points=self.MAX_PATH_POINTS)
+        if len(path) > 1:
+            folium.PolyLine(
+                path.tolist(),
+                color="red",
+                weight=3,
+                opacity=0.7,
+                tooltip=f"Movement path of IMSI: {imsi} ({len(imsi_data)} pings, {len(visits)} visits)",
+                name=f"Movement Path - {imsi}"
+            ).add_to(m)
+        
+        folium.LayerControl().add_to(m)
+        
+        return m
+    
+    def tower_activity(self):
+        """Ping count per tower, computed once per tower_data frame"""
+        if self._tower_activity is None or self._tower_activity[0] is not self.tower_data:
+            self._tower_activity = (self.tower_data, self.tower_data['cell_id'].value_counts())
+        return self._tower_activity[1]
+    
+    def create_heatmap(self, output_dir=None, tiles=None, zoom=5, hour=None, day=None):
+        """Create a heatmap of all tower activity
+        
+        With tiles (a HeatmapTiles instance from build_heatmap_tiles), only the
+        pre-aggregated grid for the requested zoom level is loaded, optionally
+        restricted to an hour of day or a single day.
+        """
+        if tiles is not None:
+            points = tiles.query(zoom, hour=hour, day=day)
+            heat_data = points[['latitude', 'longitude', 'count']].to_numpy().tolist()
+        else:
+            # Check if we have tower locations
+            if not self.registry:
+                print("Error: No tower locations loaded")
+                return None
+            
+            # Count activity at each tower
+            tower_activity = self.tower_activity()
+            
+            # Create data for heatmap, weighted by activity count
+            lats, lons = self.registry.locate(tower_activity.index.to_numpy())
+            known = ~np.isnan(lats)
+            heat_data = np.column_stack([lats[known], lons[known], tower_activity.to_numpy()[known]]).tolist()
         
         # Create map centered on India
-        m = folium.Map(location=[20.5937, 78.9629], zoom_start=5)
+        m = folium.Map(location=[20.5937, 78.9629], zoom_start=zoom)
         
         # Add heatmap layer
         HeatMap(heat_data, name="Tower Activity Heatmap").add_to(m)
@@ -211,7 +353,7 @@ class GeoMapper:
     def create_multi_imsi_map(self, imsis, output_dir=None):
         """Create a map showing multiple IMSIs for comparison"""
         # Check if we have tower locations
-        if not self.tower_locations:
+        if not self.registry:
             print("Error: No tower locations loaded")
             return None
         
@@ -236,13 +378,10 @@ class GeoMapper:
             fg = folium.FeatureGroup(name=f"IMSI: {imsi}")
             
             # Add markers for each tower ping
+            lats, lons = self._locate(imsi_data)
             points = []
-            for _, row in imsi_data.iterrows():
-                tower_id = row['cell_id']
-                if tower_id in self.tower_locations:
-                    lat, lon = self.tower_locations[tower_id]
-                    timestamp = row['timestamp']
-                    
+            for tower_id, timestamp, lat, lon in zip(imsi_data['cell_id'], imsi_data['timestamp'], lats, lons):
+                if not np.isnan(lat):
                     folium.Marker(
                         location=[lat, lon],
                         popup=f"IMSI: {imsi}<br>Time: {timestamp}<br>Tower: {tower_id}",
@@ -281,37 +420,86 @@ class GeoMapper:
         # Filter data for the specific IMSI
         imsi_data = self.tower_data[self.tower_data['imsi'] == imsi].sort_values('timestamp')
         
-        speeds = []
-        for i in range(len(imsi_data) - 1):
-            current = imsi_data.iloc[i]
-            next_row = imsi_data.iloc[i + 1]
-            
-            current_tower = current['cell_id']
-            next_tower = next_row['cell_id']
-            
-            # Skip if tower locations unknown
-            if current_tower not in self.tower_locations or next_tower not in self.tower_locations:
-                continue
-            
-            # Calculate distance in kilometers
-            distance = geodesic(
-                self.tower_locations[current_tower],
-                self.tower_locations[next_tower]
-            ).kilometers
-            
-            # Calculate time difference in hours
-            time_diff = (next_row['timestamp'] - current['timestamp']).total_seconds() / 3600
-            
-            # Calculate speed in km/h
-            if time_diff > 0:
-                speed = distance / time_diff
-                speeds.append({
-                    'from_tower': current_tower,
-                    'to_tower': next_tower,
-                    'timestamp': current['timestamp'],
-                    'distance_km': distance,
-                    'time_hours': time_diff,
-                    'speed_kmh': speed
-                })
-        
-        return pd.DataFrame(speeds)
+        columns = ['from_tower', 'to_tower', 'timestamp', 'distance_km', 'time_hours', 'speed_kmh']
+        if len(imsi_data) < 2 or self.registry is None:
+            return pd.DataFrame(columns=columns)
+        
+        codes = self.registry.codes(imsi_data['cell_id'].to_numpy())
+        towers = imsi_data['cell_id'].to_numpy()
+        timestamps = imsi_data['timestamp'].to_numpy()
+        
+        # Consecutive ping pairs; skip pairs where either tower location is unknown
+        from_codes, to_codes = codes[:-1], codes[1:]
+        time_hours = (timestamps[1:] - timestamps[:-1]) / np.timedelta64(1, 'h')
+        valid = (from_codes >= 0) & (to_codes >= 0) & (time_hours > 0)
+        
+        from_codes, to_codes = from_codes[valid], to_codes[valid]
+        distances = self._pair_distances_km(from_codes, to_codes)
+        
+        return pd.DataFrame({
+            'from_tower': towers[:-1][valid],
+            'to_tower': towers[1:][valid],
+            'timestamp': timestamps[:-1][valid],
+            'distance_km': distances,
+            'time_hours': time_hours[valid],
+            'speed_kmh': distances / time_hours[valid]
+        }, columns=columns)
+    
+    def _pair_distances_km(self, from_codes, to_codes):
+        """Geodesic distance for tower code pairs, computed once per distinct pair"""
+        distances = np.zeros(len(from_codes))
+        if len(from_codes) == 0:
+            return distances
+        
+        pairs, inverse = np.unique(np.column_stack([from_codes, to_codes]), axis=0, return_inverse=True)
+        pair_distances = np.zeros(len(pairs))
+        for i, (a, b) in enumerate(pairs):
+            if a != b:
+                pair_distances[i] = geodesic(
+                    (self.registry.latitudes[a], self.registry.longitudes[a]),
+                    (self.registry.latitudes[b], self.registry.longitudes[b])
+                ).kilometers
+        
+        return pair_distances[inverse.ravel()]
+
+
+def simplify_path(points, tolerance=0.001, max_points=None):
+    """Simplify a (lat, lon) polyline with the Ramer-Douglas-Peucker algorithm
+    
+    tolerance is in degrees (0.001 is roughly 100 m). If the simplified path
+    still has more than max_points vertices it is evenly decimated.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 3:
+        return points
+    
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(segment[0], segment[1])
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    
+    simplified = points[keep]
+    if max_points and len(simplified) > max_points:
+        idx = np.unique(np.linspace(0, len(simplified) - 1, max_points).round().astype(int))
+        simplified = simplified[idx]
+    
+    return simplified
@@ -0,0 +1,173 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Map zoom levels that get their own pre-aggregated grid
+ZOOM_LEVELS = (4, 6, 8, 10, 12)
+
+# Each web-mercator tile at zoom z is split into 2**CELL_BITS x 2**CELL_BITS
+# cells, i.e. cells are the quadkey tiles of level z + CELL_BITS
+CELL_BITS = 3
+
+TILES_VERSION = 1
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def lat_lon_to_cell(lats, lons, level):
+    """Web-mercator (quadkey) tile x/y at the given level for coordinates"""
+    scale = 2 ** level
+    lats = np.clip(lats, -85.05112878, 85.05112878)
+    x = (lons + 180.0) / 360.0 * scale
+    lat_rad = np.radians(lats)
+    y = (1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / np.pi) / 2.0 * scale
+    return (np.clip(x, 0, scale - 1).astype(np.uint32),
+            np.clip(y, 0, scale - 1).astype(np.uint32))
+
+
+def cell_to_lat_lon(x, y, level):
+    """Center coordinates of web-mercator tiles at the given level"""
+    scale = 2 ** level
+    lons = (np.asarray(x) + 0.5) / scale * 360.0 - 180.0
+    n = np.pi * (1.0 - 2.0 * (np.asarray(y) + 0.5) / scale)
+    lats = np.degrees(np.arctan(np.sinh(n)))
+    return lats, lons
+
+
+def _tower_activity(chunks, registry):
+    """Ping counts per (tower code, day, hour), accumulated chunk by chunk"""
+    partials = []
+    for chunk in chunks:
+        codes = registry.codes(chunk['cell_id'].to_numpy())
+        timestamps = chunk['timestamp']
+        if not pd.api.types.is_datetime64_any_dtype(timestamps):
+            timestamps = pd.to_datetime(timestamps, errors='coerce')
+
+        valid = (codes >= 0) & timestamps.notna().to_numpy()
+        stamps = timestamps.to_numpy()[valid].astype('datetime64[s]')
+        days = (stamps.astype('datetime64[D]') - _EPOCH).astype(np.int32)
+        hours = ((stamps - stamps.astype('datetime64[D]')) // np.timedelta64(1, 'h')).astype(np.uint8)
+
+        partial = pd.DataFrame({'code': codes[valid], 'day': days, 'hour': hours})
+        partials.append(partial.groupby(['code', 'day', 'hour']).size())
+
+    if not partials:
+        return pd.Series(dtype=np.int64)
+
+    # Per-chunk results are already small; summing them keeps memory flat
+    return pd.concat(partials).groupby(level=[0, 1, 2]).sum()
+
+
+def build_heatmap_tiles(source, registry, output_file, zoom_levels=ZOOM_LEVELS):
+    """Pre-aggregate tower activity into multi-resolution heatmap tiles
+
+    source is a TDR DataFrame or an iterable of DataFrame chunks (e.g.
+    pd.read_csv(..., chunksize=1_000_000)). Pings are first counted per
+    tower, day and hour of day, then binned into a quadkey grid for each
+    zoom level. The result is written to output_file as an uncompressed
+    .npz so a single level can be loaded on its own.
+    """
+    chunks = [source] if isinstance(source, pd.DataFrame) else source
+    activity = _tower_activity(chunks, registry)
+
+    codes = activity.index.get_level_values(0).to_numpy()
+    days = activity.index.get_level_values(1).to_numpy().astype(np.int32)
+    hours = activity.index.get_level_values(2).to_numpy().astype(np.uint8)
+    counts = activity.to_numpy().astype(np.uint64)
+    lats, lons = registry.coordinates(codes)
+
+    # Towers with a coordinate that could not be parsed have no tile
+    located = ~(np.isnan(lats) | np.isnan(lons))
+    days, hours, counts = days[located], hours[located], counts[located]
+    lats, lons = lats[located], lons[located]
+
+    arrays = {
+        'version': np.array(TILES_VERSION),
+        'zoom_levels': np.array(zoom_levels, dtype=np.int32),
+        'cell_bits': np.array(CELL_BITS),
+        'total_pings': np.array(counts.sum(), dtype=np.uint64),
+    }
+
+    for zoom in zoom_levels:
+        level = zoom + CELL_BITS
+        x, y = lat_lon_to_cell(lats, lons, level)
+        binned = pd.DataFrame({'x': x, 'y': y, 'day': days, 'hour': hours, 'count': counts})
+        binned = binned.groupby(['x', 'y', 'day', 'hour'], sort=True)['count'].sum().reset_index()
+
+        arrays[f'z{zoom}_x'] = binned['x'].to_numpy(np.uint32)
+        arrays[f'z{zoom}_y'] = binned['y'].to_numpy(np.uint32)
+        arrays[f'z{zoom}_day'] = binned['day'].to_numpy(np.int32)
+        arrays[f'z{zoom}_hour'] = binned['hour'].to_numpy(np.uint8)
+        arrays[f'z{zoom}_count'] = binned['count'].to_numpy(np.uint64)
+
+    tmp_file = f"{output_file}.tmp.npz"
+    np.savez(tmp_file, **arrays)
+    os.replace(tmp_file, output_file)
+
+    return HeatmapTiles(output_file)
+
+
+class HeatmapTiles:
+    """Read access to heatmap tiles written by build_heatmap_tiles
+
+    Holds the .npz open until close(); use it as a context manager.
+    """
+
+    def __init__(self, tiles_file):
+        self.tiles_file = tiles_file
+        # np.load on an .npz is lazy: arrays are read only when accessed
+        self._archive = np.load(tiles_file, allow_pickle=False)
+        if int(self._archive['version']) != TILES_VERSION:
+            raise ValueError(f"Unsupported heatmap tiles version in {tiles_file}")
+        self.zoom_levels = [int(z) for z in self._archive['zoom_levels']]
+        self.cell_bits = int(self._archive['cell_bits'])
+        self.total_pings = int(self._archive['total_pings'])
+
+    def close(self):
+        self._archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def nearest_level(self, zoom):
+        """Highest stored zoom level not finer than the requested zoom"""
+        coarser = [z for z in self.zoom_levels if z <= zoom]
+        return max(coarser) if coarser else min(self.zoom_levels)
+
+    def query(self, zoom, hour=None, day=None, bounds=None):
+        """Aggregated heat points for one zoom level
+
+        hour filters to an hour of day (0-23) or a list of hours, day to a
+        date (anything pd.Timestamp accepts) and bounds to
+        ((south, west), (north, east)). Returns a DataFrame with
+        latitude, longitude and count columns.
+        """
+        level_zoom = self.nearest_level(zoom)
+        prefix = f'z{level_zoom}_'
+        x = self._archive[prefix + 'x']
+        y = self._archive[prefix + 'y']
+        counts = self._archive[prefix + 'count']
+
+        mask = np.ones(len(x), dtype=bool)
+        if hour is not None:
+            mask &= np.isin(self._archive[prefix + 'hour'], np.atleast_1d(hour))
+        if day is not None:
+            day_number = (np.datetime64(pd.Timestamp(day).date(), 'D') - _EPOCH).astype(np.int32)
+            mask &= self._archive[prefix + 'day'] == day_number
+
+        level = level_zoom + self.cell_bits
+        if bounds is not None:
+            (south, west), (north, east) = bounds
+            x_min, y_max = lat_lon_to_cell(np.array([south]), np.array([west]), level)
+            x_max, y_min = lat_lon_to_cell(np.array([north]), np.array([east]), level)
+            mask &= (x >= x_min[0]) & (x <= x_max[0]) & (y >= y_min[0]) & (y <= y_max[0])
+
+        # Collapse the time dimension; rows are stored sorted by cell
+        cells = pd.DataFrame({'x': x[mask], 'y': y[mask], 'count': counts[mask]})
+        cells = cells.groupby(['x', 'y'], sort=False)['count'].sum().reset_index()
+
+        lats, lons = cell_to_lat_lon(cells['x'].to_numpy(), cells['y'].to_numpy(), level)
+        return pd.DataFrame({'latitude': lats, 'longitude': lons, 'count': cells['count'].to_numpy()})
@@ -3,8 +3,10 @@ import os
 from forensic_telco_analyzer.utils.parser_base import BaseParser
 
 class TDRParser(BaseParser):
-    def __init__(self, file_path):
-        super().__init__(file_path)
+    subscriber_columns = ('source_number', 'imsi')
+
+    def __init__(self, file_path, **limits):
+        super().__init__(file_path, **limits)
     
     def parse(self):
         """Parse Tower Dump Records"""
@@ -14,11 +16,8 @@ class TDRParser(BaseParser):
                 print(f"Error: File '{self.file_path}' not found")
                 return None
                 
-            # Read CSV file
-            self.data = pd.read_csv(self.file_path)
-            
-            # Normalize column names
-            self.data.columns = [col.lower().replace(' ', '_') for col in self.data.columns]
+            # Read only the requested columns and rows, with normalized column names
+            self.data = self.read_csv()
             
             # Convert timestamp to datetime if exists
             if 'timestamp' in self.data.columns:
@@ -0,0 +1,202 @@
+import os
+from collections.abc import Mapping
+import numpy as np
+import pandas as pd
+
+# Bump whenever the layout of the cached .npz file changes
+CACHE_VERSION = 1
+
+# Tower metadata columns kept as categoricals (low cardinality)
+CATEGORICAL_COLUMNS = ['operator', 'tower_type', 'technology', 'city', 'state']
+
+
+class TowerRegistry:
+    """Array-backed lookup of cell tower locations and metadata.
+
+    Every known ``cell_id`` is mapped to a dense integer code. Coordinates live
+    in contiguous float64 arrays indexed by that code, so locating a whole
+    frame of pings is a single vectorized ``take``.
+    """
+
+    def __init__(self, cell_ids, latitudes, longitudes, metadata=None):
+        self.cell_ids = np.asarray(cell_ids)
+        self.latitudes = np.ascontiguousarray(latitudes, dtype=np.float64)
+        self.longitudes = np.ascontiguousarray(longitudes, dtype=np.float64)
+        self.metadata = metadata if metadata is not None else {}
+        self._index = pd.Index(self.cell_ids)
+        self._keys_are_strings = self.cell_ids.dtype.kind in ('U', 'S', 'O')
+
+    @classmethod
+    def from_frame(cls, locations):
+        """Build a registry from a tower location DataFrame"""
+        # Later rows win for duplicated cell IDs, as they did with the old dict
+        locations = locations.drop_duplicates(subset='cell_id', keep='last')
+        cell_ids = locations['cell_id'].to_numpy()
+        if cell_ids.dtype.kind not in ('i', 'u'):
+            # Fixed-width strings keep the binary cache free of pickled objects
+            cell_ids = cell_ids.astype(str)
+
+        metadata = {}
+        for col in CATEGORICAL_COLUMNS:
+            if col in locations.columns:
+                metadata[col] = pd.Categorical(locations[col])
+
+        return cls(
+            cell_ids,
+            pd.to_numeric(locations['latitude'], errors='coerce').to_numpy(),
+            pd.to_numeric(locations['longitude'], errors='coerce').to_numpy(),
+            metadata
+        )
+
+    @classmethod
+    def load(cls, tower_location_file, use_cache=True):
+        """Load a registry from CSV, reusing the binary cache when it is fresh"""
+        cache_file = cls.cache_path(tower_location_file)
+        stat = os.stat(tower_location_file)
+
+        if use_cache and os.path.exists(cache_file):
+            registry = cls.load_cache(cache_file, expected_stat=stat)
+            if registry is not None:
+                return registry
+
+        registry = cls.from_frame(pd.read_csv(tower_location_file))
+
+        if use_cache:
+            try:
+                registry.save_cache(cache_file, source_stat=stat)
+            except OSError as e:
+                print(f"Warning: Could not write tower registry cache '{cache_file}': {e}")
+
+        return registry
+
+    @staticmethod
+    def cache_path(tower_location_file):
+        """Path of the binary cache kept next to a tower location CSV"""
+        return f"{tower_location_file}.registry.npz"
+
+    def save_cache(self, cache_file, source_stat=None):
+        """Write the registry to an uncompressed .npz file"""
+        arrays = {
+            'version': np.array(CACHE_VERSION),
+            'cell_ids': self.cell_ids,
+            'latitude': self.latitudes,
+            'longitude': self.longitudes,
+            'metadata_columns': np.array(list(self.metadata.keys()), dtype=str),
+        }
+        if source_stat is not None:
+            arrays['source_mtime_ns'] = np.array(source_stat.st_mtime_ns)
+            arrays['source_size'] = np.array(source_stat.st_size)
+
+        for col, values in self.metadata.items():
+            arrays[f'{col}_codes'] = values.codes
+            arrays[f'{col}_categories'] = np.asarray(values.categories, dtype=str)
+
+        # Write to a temporary file first so readers never see a partial cache
+        tmp_file = f"{cache_file}.tmp.npz"
+        np.savez(tmp_file, **arrays)
+        os.replace(tmp_file, cache_file)
+
+    @classmethod
+    def load_cache(cls, cache_file, expected_stat=None):
+        """Load a registry from its binary cache, or None if it is stale"""
+        try:
+            with np.load(cache_file, allow_pickle=False) as cache:
+                if int(cache['version']) != CACHE_VERSION:
+                    return None
+                if expected_stat is not None:
+                    if 'source_mtime_ns' not in cache.files:
+                        return None
+                    if (int(cache['source_mtime_ns']) != expected_stat.st_mtime_ns or
+                            int(cache['source_size']) != expected_stat.st_size):
+                        return None
+
+                metadata = {}
+                for col in cache['metadata_columns']:
+                    metadata[str(col)] = pd.Categorical.from_codes(
+                        cache[f'{col}_codes'], cache[f'{col}_categories']
+                    )
+
+                return cls(cache['cell_ids'], cache['latitude'], cache['longitude'], metadata)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable tower registry cache '{cache_file}': {e}")
+            return None
+
+    def __len__(self):
+        return len(self.cell_ids)
+
+    def __contains__(self, cell_id):
+        return self.codes([cell_id])[0] >= 0
+
+    def _normalize_keys(self, cell_ids):
+        values = np.asarray(cell_ids)
+        if self._keys_are_strings and values.dtype.kind not in ('U', 'S'):
+            # Numeric cell IDs in a dump still match string IDs in the registry
+            values = np.where(pd.isna(values), None, values.astype(str))
+        return values
+
+    def codes(self, cell_ids):
+        """Dense integer code for each cell ID, -1 where the tower is unknown"""
+        return self._index.get_indexer(self._normalize_keys(cell_ids))
+
+    def locate(self, cell_ids):
+        """Latitude and longitude arrays for cell IDs, NaN where unknown"""
+        codes = self.codes(cell_ids)
+        return self.coordinates(codes)
+
+    def coordinates(self, codes):
+        """Latitude and longitude arrays for registry codes, NaN for -1"""
+        codes = np.asarray(codes)
+        known = codes >= 0
+        safe = np.where(known, codes, 0)
+        lats = np.where(known, self.latitudes.take(safe), np.nan)
+        lons = np.where(known, self.longitudes.take(safe), np.nan)
+        return lats, lons
+
+    def get(self, cell_id, default=None):
+        """(lat, lon) tuple for a single cell ID"""
+        code = self.codes([cell_id])[0]
+        if code < 0:
+            return default
+        return (self.latitudes[code], self.longitudes[code])
+
+    def enrich(self, data, cell_column='cell_id', metadata=True):
+        """Return a copy of a TDR or CDR frame with tower location columns added"""
+        codes = self.codes(data[cell_column].to_numpy())
+        lats, lons = self.coordinates(codes)
+
+        enriched = data.copy()
+        enriched['tower_latitude'] = lats
+        enriched['tower_longitude'] = lons
+
+        if metadata:
+            for col, values in self.metadata.items():
+                # Categorical.take maps -1 to NaN, matching unknown towers
+                enriched[f'tower_{col}'] = values.take(codes, allow_fill=True)
+
+        return enriched
+
+    def to_dict(self):
+        """Materialize the registry as a cell_id -> (lat, lon) dictionary"""
+        return dict(zip(self.cell_ids.tolist(), zip(self.latitudes.tolist(), self.longitudes.tolist())))
+
+
+class TowerLocationView(Mapping):
+    """Read-only cell_id -> (lat, lon) mapping backed by a TowerRegistry"""
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    def __getitem__(self, cell_id):
+        location = self.registry.get(cell_id)
+        if location is None:
+            raise KeyError(cell_id)
+        return location
+
+    def __contains__(self, cell_id):
+        return cell_id in self.registry
+
+    def __iter__(self):
+        return iter(self.registry.cell_ids.tolist())
+
+    def __len__(self):
+        return len(self.registry)
@@ -1,12 +1,265 @@
+import hashlib
+import logging
+import os
+
+import pandas as pd
+
+# Rows parsed at a time when a CSV is filtered while it is read
+CHUNK_ROWS = 200000
+
+# Rows per row group of the columnar cache; the groups outside a time window are never read
+ROW_GROUP_ROWS = 100000
+
+# Bump whenever the layout of the columnar cache changes
+COLUMNAR_VERSION = 1
+
+# Parsed time of each row as epoch nanoseconds, kept in the columnar cache for its row-group statistics
+TIME_KEY = '__time_ns'
+
+
+def normalize_column(name):
+    """Normalized column name, e.g. 'Source Number' -> 'source_number'"""
+    return name.lower().replace(' ', '_')
+
+
+def _bound(value):
+    if value is None:
+        return None
+    value = pd.Timestamp(value)
+    return value.tz_convert(None) if value.tz is not None else value
+
+
+def _times(series):
+    """Column parsed as naive datetimes (UTC for timezone-aware values)"""
+    times = pd.to_datetime(series, errors='coerce')
+    if getattr(times.dt, 'tz', None) is not None:
+        times = times.dt.tz_convert(None)
+    return times
+
+
+def _as_text(series):
+    # Whole numbers read as floats (because of missing values) compare without their '.0'
+    if pd.api.types.is_float_dtype(series):
+        try:
+            series = series.astype('Int64')
+        except (TypeError, ValueError):
+            pass
+    return series.astype(str)
+
+
 class BaseParser:
-    def __init__(self, file_path):
+    """Base of the record parsers
+
+    Parsers can be limited to the columns a caller needs, to a time window
+    [start, end) and to the rows of some subscribers. Those limits are
+    pushed into the read: only the needed columns are parsed, and rows are
+    filtered chunk by chunk so the full file is never held in memory. With
+    a cache_dir (and pyarrow installed), a CSV is also kept as a Parquet
+    file whose row groups carry time statistics, so a window of a large,
+    time-ordered archive only reads the row groups it overlaps.
+    """
+
+    # Normalized names of the time column and of the columns a subscriber filter matches
+    time_column = 'timestamp'
+    subscriber_columns = ()
+
+    def __init__(self, file_path, columns=None, start=None, end=None, subscribers=None, cache_dir=None):
+        """
+        Args:
+            file_path (str): File to parse.
+            columns (list): Normalized names of the columns to return (default: all).
+            start: First time to keep (anything pd.Timestamp accepts).
+            end: Time from which rows are dropped.
+            subscribers (list): Keep only rows where one of the subscriber columns has one of these values.
+            cache_dir (str): Directory of the columnar cache; no cache without it.
+        """
         self.file_path = file_path
         self.data = None
-    
+        self.columns = list(columns) if columns is not None else None
+        self.start = _bound(start)
+        self.end = _bound(end)
+        self.subscribers = {str(s) for s in subscribers} if subscribers else None
+        self.cache_dir = cache_dir
+
     def parse(self):
         """Parse the input file and return the data"""
         raise NotImplementedError("Each parser must implement this method")
-    
+
     def validate(self):
         """Validate the parsed data"""
         raise NotImplementedError("Each parser must implement this method")
+
+    def normalize_columns(self, columns):
+        """Normalized names of a file's columns, in order"""
+        return [normalize_column(column) for column in columns]
+
+    @property
+    def filtered(self):
+        """Whether rows are limited to a time window or to subscribers"""
+        return self.start is not None or self.end is not None or self.subscribers is not None
+
+    def read_csv(self):
+        """
+        Read the CSV with normalized column names, parsing only the needed
+        columns and keeping only the rows inside the limits.
+        """
+        if self.columns is None and not self.filtered:
+            data = pd.read_csv(self.file_path)
+            data.columns = self.normalize_columns(list(data.columns))
+            return data
+
+        header = list(pd.read_csv(self.file_path, nrows=0).columns)
+        names = dict(zip(header, self.normalize_columns(header)))
+        usecols = None
+        if self.columns is not None:
+            wanted = set(self.columns) | self._filter_columns(names.values())
+            usecols = [raw for raw, name in names.items() if name in wanted]
+
+        data = None
+        if self.cache_dir:
+            data = self._read_columnar(usecols, names)
+        if data is None:
+            data = self._read_chunks(usecols, names)
+        return self.project(data)
+
+    def _filter_columns(self, names):
+        names = set(names)
+        columns = set()
+        if self.start is not None or self.end is not None:
+            if self.time_column in names:
+                columns.add(self.time_column)
+            else:
+                logging.warning(f"No {self.time_column} column in {self.file_path}; time window not applied")
+        if self.subscribers is not None:
+            columns |= names & set(self.subscriber_columns)
+        return columns
+
+    def mask(self, data):
+        """Boolean mask of the rows of a frame (with normalized columns) inside the limits"""
+        mask = pd.Series(True, index=data.index)
+        if (self.start is not None or self.end is not None) and self.time_column in data.columns:
+            times = _times(data[self.time_column])
+            if self.start is not None:
+                mask &= times >= self.start
+            if self.end is not None:
+                mask &= times < self.end
+        if self.subscribers is not None:
+            present = [column for column in self.subscriber_columns if column in data.columns]
+            if present:
+                matched = pd.Series(False, index=data.index)
+                for column in present:
+                    matched |= _as_text(data[column]).isin(self.subscribers)
+                mask &= matched
+        return mask.to_numpy()
+
+    def project(self, data):
+        """Only the requested columns of a frame with normalized columns"""
+        if self.columns is None:
+            return data
+        return data[[column for column in data.columns if column in self.columns]]
+
+    def apply_limits(self, data):
+        """Rows inside the limits and requested columns of a frame parsed in full (e.g. from a capture)"""
+        if self.filtered:
+            data = data[self.mask(data)].reset_index(drop=True)
+        return self.project(data)
+
+    def _read_chunks(self, usecols, names):
+        if not self.filtered:
+            data = pd.read_csv(self.file_path, usecols=usecols)
+            data.columns = [names[column] for column in data.columns]
+            return data
+        kept = []
+        for chunk in pd.read_csv(self.file_path, usecols=usecols, chunksize=CHUNK_ROWS):
+            chunk.columns = [names[column] for column in chunk.columns]
+            kept.append(chunk[self.mask(chunk)])
+        if not kept:
+            data = pd.read_csv(self.file_path, usecols=usecols, nrows=0)
+            data.columns = [names[column] for column in data.columns]
+            return data
+        return pd.concat(kept, ignore_index=True)
+
+    def _cache_path(self):
+        digest = hashlib.sha1(repr(os.path.abspath(self.file_path)).encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f'{os.path.basename(self.file_path)}.{digest}.parquet')
+
+    def _read_columnar(self, usecols, names):
+        """Rows read from the Parquet copy of the CSV, written first if missing or stale; None without pyarrow"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            return None
+
+        stat = os.stat(self.file_path)
+        signature = f'{COLUMNAR_VERSION}:{stat.st_mtime_ns}:{stat.st_size}'.encode()
+        cache_path = self._cache_path()
+        try:
+            schema = pq.read_schema(cache_path) if os.path.exists(cache_path) else None
+            if schema is None or (schema.metadata or {}).get(b'source') != signature:
+                schema = self._write_columnar(cache_path, signature, names)
+                if schema is None:
+                    return None
+
+            filters = []
+            if TIME_KEY in schema.names:
+                # Row groups whose time statistics miss the window are skipped without being read
+                if self.start is not None:
+                    filters.append((TIME_KEY, '>=', self.start.value))
+                if self.end is not None:
+                    filters.append((TIME_KEY, '<', self.end.value))
+            columns = usecols if usecols is not None else [name for name in schema.names if name != TIME_KEY]
+            data = pq.read_table(cache_path, columns=columns, filters=filters or None).to_pandas()
+        except (OSError, ValueError, pa.ArrowException) as e:
+            logging.warning(f"Ignoring columnar cache of {self.file_path}: {e}")
+            return None
+
+        data.columns = [names[column] for column in data.columns]
+        if self.subscribers is not None:
+            data = data[self.mask(data)].reset_index(drop=True)
+        return data
+
+    def _write_columnar(self, cache_path, signature, names):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        logging.info(f"Writing columnar cache of {self.file_path}")
+        raw_time = next((raw for raw, name in names.items() if name == self.time_column), None)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial cache
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        writer = None
+        try:
+            # Converted chunk by chunk, so the full file is never held in memory
+            for chunk in pd.read_csv(self.file_path, chunksize=CHUNK_ROWS):
+                table = self._columnar_table(chunk, raw_time)
+                if writer is None:
+                    # The first chunk fixes the column types; later chunks are cast to them
+                    schema = table.schema.with_metadata({'source': signature})
+                    writer = pq.ParquetWriter(tmp_path, schema)
+                writer.write_table(table.cast(schema), row_group_size=ROW_GROUP_ROWS)
+            if writer is None:
+                table = self._columnar_table(pd.read_csv(self.file_path, nrows=0), raw_time)
+                schema = table.schema.with_metadata({'source': signature})
+                writer = pq.ParquetWriter(tmp_path, schema)
+                writer.write_table(table.cast(schema))
+            writer.close()
+            os.replace(tmp_path, cache_path)
+            return schema
+        except (OSError, TypeError, ValueError, pa.ArrowException) as e:
+            logging.warning(f"Could not write columnar cache of {self.file_path}: {e}")
+            if writer is not None:
+                writer.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+
+    def _columnar_table(self, chunk, raw_time):
+        """Arrow table of a CSV chunk, plus its parsed times when the file has a time column"""
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if raw_time is not None:
+            times = _times(chunk[raw_time]).to_numpy('datetime64[ns]').view('int64')
+            table = table.append_column(TIME_KEY, pa.array(times, type=pa.int64(), mask=times == pd.NaT.value))
+        return table
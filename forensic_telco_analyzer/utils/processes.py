@@ -0,0 +1,13 @@
+import multiprocessing
+
+
+def pool_context():
+    """Multiprocessing context for worker pools started while other threads are running
+
+    Pipeline stages and dashboard requests run on threads. A forked child
+    inherits every lock another thread held at that moment (logging,
+    matplotlib, ...) and can deadlock on it, so workers are started by a
+    fork server where there is one, else spawned.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
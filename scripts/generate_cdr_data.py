@@ -1,52 +1,60 @@
 import os
+import sys
+import numpy as np
 import pandas as pd
-from faker import Faker
 from datetime import datetime, timedelta
-import random
 
-fake = Faker()
+# Add project root to path to enable absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.synthetic import CHUNK_RECORDS, distinct_choice, random_digits, random_timestamps, write_chunks
+
+def generate_cdr_data(num_records=1000, output_file='data/raw/sample_cdr.csv', seed=None,
+                      phone_numbers=None, start_time=None, return_data=True):
+    """Generate synthetic CDR data
+
+    phone_numbers (a pool of numbers) lets CDR and TDR data share subscribers,
+    start_time and seed make the data reproducible, and return_data=False
+    skips holding the records in memory (for large datasets).
+    """
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    rng = np.random.default_rng(seed)
 
-def generate_cdr_data(num_records=1000, output_file='data/raw/sample_cdr.csv'):
-    """Generate synthetic CDR data"""
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    
     # Create a set of phone numbers
-    source_numbers = [f"+91{fake.numerify('#########')}" for _ in range(50)]
-    dest_numbers = [f"+91{fake.numerify('#########')}" for _ in range(100)]
-    
+    if phone_numbers is None:
+        source_numbers = np.char.add('+91', random_digits(rng, 50, 9))
+        dest_numbers = np.char.add('+91', random_digits(rng, 100, 9))
+    else:
+        source_numbers = dest_numbers = np.asarray(phone_numbers)
+
     # Create a set of cell tower IDs
-    cell_towers = [f"TOWER-{fake.numerify('####')}" for _ in range(20)]
-    
-    records = []
-    start_time = datetime.now() - timedelta(days=30)
-    
-    for _ in range(num_records):
-        # Random timestamp within the last month
-        timestamp = fake.date_time_between(start_date=start_time, end_date='now')
-        
-        # Random call duration between 5 seconds and 30 minutes
-        duration = fake.random_int(min=5, max=1800)
-        
-        # Random source and destination numbers
-        source_number = random.choice(source_numbers)
-        destination_number = random.choice(dest_numbers)
-        
-        # Ensure source and destination are different
-        while destination_number == source_number:
-            destination_number = random.choice(dest_numbers)
-        
-        records.append({
-            'source_number': source_number,
-            'destination_number': destination_number,
-            'timestamp': timestamp,
-            'duration': duration,
-            'cell_tower_id': random.choice(cell_towers),
-            'call_type': fake.random_element(elements=('outbound', 'inbound')),
-            'call_status': fake.random_element(elements=('completed', 'missed', 'busy', 'failed'))
-        })
-    
-    df = pd.DataFrame(records)
-    df.to_csv(output_file, index=False)
+    cell_towers = np.char.add('TOWER-', random_digits(rng, 20, 4))
+
+    # Random timestamps within the month before start_time + 30 days (by default, the last month)
+    end_time = start_time + timedelta(days=30) if start_time else datetime.now()
+    start_time = end_time - timedelta(days=30)
+
+    def chunks():
+        for offset in range(0, num_records, CHUNK_RECORDS):
+            size = min(CHUNK_RECORDS, num_records - offset)
+            sources = rng.integers(0, len(source_numbers), size)
+            if dest_numbers is source_numbers:
+                # Ensure source and destination are different
+                destinations = dest_numbers[distinct_choice(rng, dest_numbers, size, sources)]
+            else:
+                destinations = dest_numbers[rng.integers(0, len(dest_numbers), size)]
+            yield pd.DataFrame({
+                'source_number': source_numbers[sources],
+                'destination_number': destinations,
+                'timestamp': random_timestamps(rng, size, start_time, end_time),
+                # Random call duration between 5 seconds and 30 minutes
+                'duration': rng.integers(5, 1801, size),
+                'cell_tower_id': cell_towers[rng.integers(0, len(cell_towers), size)],
+                'call_type': rng.choice(['outbound', 'inbound'], size),
+                'call_status': rng.choice(['completed', 'missed', 'busy', 'failed'], size)
+            })
+
+    df = write_chunks(chunks(), output_file, return_data)
     print(f"Generated {num_records} CDR records and saved to {output_file}")
     return df
 
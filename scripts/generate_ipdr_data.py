@@ -1,40 +1,50 @@
 import os
+import sys
+import numpy as np
 import pandas as pd
-from faker import Faker
 from datetime import datetime, timedelta
-import random
-
-fake = Faker()
-
-def generate_ipdr_data(num_records=200, output_file='data/raw/sample_ipdr.csv'):
-    """Generate synthetic IPDR data similar to WhatsApp calls"""
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    records = []
-    start_time = datetime.now() - timedelta(days=7)
-    
-    for _ in range(num_records):
-        duration_seconds = random.randint(30, 600)
-        call_start = fake.date_time_between(start_date=start_time, end_date='now')
-        call_end = call_start + timedelta(seconds=duration_seconds)
-        src_ip = fake.ipv4()
-        dst_ip = fake.ipv4()
-        source_port = random.randint(10000, 65535)
-        dest_port = 443
-        bytes_sent = random.randint(500, 5000)
-        bytes_received = random.randint(500, 5000)
-        records.append({
-            'timestamp': call_start,
-            'src_ip': src_ip,
-            'dst_ip': dst_ip,
-            'protocol': random.choice(['UDP', 'TCP', 'HTTP', 'HTTPS']),
-            'source_port': source_port,
-            'dest_port': dest_port,
-            'duration': duration_seconds,
-            'bytes_sent': bytes_sent,
-            'bytes_received': bytes_received
-        })
-    df = pd.DataFrame(records)
-    df.to_csv(output_file, index=False)
+
+# Add project root to path to enable absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.synthetic import CHUNK_RECORDS, random_timestamps, write_chunks
+
+def random_ipv4(rng, size):
+    """Random dotted-quad IPv4 addresses"""
+    octets = rng.integers(0, 256, (size, 4)).astype(str)
+    return np.char.add(np.char.add(np.char.add(np.char.add(np.char.add(np.char.add(
+        octets[:, 0], '.'), octets[:, 1]), '.'), octets[:, 2]), '.'), octets[:, 3])
+
+def generate_ipdr_data(num_records=200, output_file='data/raw/sample_ipdr.csv', seed=None,
+                       start_time=None, return_data=True):
+    """Generate synthetic IPDR data similar to WhatsApp calls
+
+    start_time and seed make the data reproducible, and return_data=False
+    skips holding the records in memory (for large datasets).
+    """
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    # Random call starts within the week after start_time (by default, the last week)
+    end_time = start_time + timedelta(days=7) if start_time else datetime.now()
+    start_time = end_time - timedelta(days=7)
+
+    def chunks():
+        for offset in range(0, num_records, CHUNK_RECORDS):
+            size = min(CHUNK_RECORDS, num_records - offset)
+            yield pd.DataFrame({
+                'timestamp': random_timestamps(rng, size, start_time, end_time),
+                'src_ip': random_ipv4(rng, size),
+                'dst_ip': random_ipv4(rng, size),
+                'protocol': rng.choice(['UDP', 'TCP', 'HTTP', 'HTTPS'], size),
+                'source_port': rng.integers(10000, 65536, size),
+                'dest_port': np.full(size, 443),
+                'duration': rng.integers(30, 601, size),
+                'bytes_sent': rng.integers(500, 5001, size),
+                'bytes_received': rng.integers(500, 5001, size)
+            })
+
+    df = write_chunks(chunks(), output_file, return_data)
     print(f"Generated {num_records} IPDR records and saved to {output_file}")
     return df
 
@@ -1,47 +1,55 @@
 import os
+import sys
+import numpy as np
 import pandas as pd
-from faker import Faker
 from datetime import datetime, timedelta
-import random
-
-fake = Faker()
-
-def generate_tdr_data(num_records=500, output_file='data/raw/sample_tdr.csv'):
-    """Generate synthetic Tower Dump Records"""
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    imsis = [f"4{fake.numerify('#############')}" for _ in range(50)]
-    imeis = [f"35{fake.numerify('############')}" for _ in range(70)]
-    cell_ids = [f"CELL-{fake.numerify('####')}" for _ in range(20)]
-    phone_numbers = [f"+91{fake.numerify('#########')}" for _ in range(100)]
-    records = []
-    start_time = datetime.now() - timedelta(days=7)
-    
-    for _ in range(num_records):
-        timestamp = fake.date_time_between(start_date=start_time, end_date='now')
-        duration = random.randint(5, 1800)
-        imsi = random.choice(imsis)
-        imei = random.choice(imeis)
-        cell_id = random.choice(cell_ids)
-        source_number = random.choice(phone_numbers)
-        destination_number = random.choice(phone_numbers)
-        while destination_number == source_number:
-            destination_number = random.choice(phone_numbers)
-        records.append({
-            'timestamp': timestamp,
-            'imsi': imsi,
-            'imei': imei,
-            'cell_id': cell_id,
-            'source_number': source_number,
-            'destination_number': destination_number,
-            'call_type': random.choice(['MOC', 'MTC', 'SMS-MO', 'SMS-MT']),
-            'duration': duration,
-            'location_area_code': fake.numerify('###'),
-            'signal_strength': random.randint(-120, -50)
-        })
-    df = pd.DataFrame(records)
-    df.to_csv(output_file, index=False)
+
+# Add project root to path to enable absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.synthetic import CHUNK_RECORDS, distinct_choice, random_digits, random_timestamps, write_chunks
+
+def generate_tdr_data(num_records=500, output_file='data/raw/sample_tdr.csv', seed=None,
+                      phone_numbers=None, start_time=None, num_imsis=50, num_cells=20, return_data=True):
+    """Generate synthetic Tower Dump Records
+
+    phone_numbers (a pool of numbers) lets CDR and TDR data share subscribers,
+    start_time and seed make the data reproducible, and return_data=False
+    skips holding the records in memory (for large datasets).
+    """
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    rng = np.random.default_rng(seed)
+    imsis = np.char.add('4', random_digits(rng, num_imsis, 13))
+    imeis = np.char.add('35', random_digits(rng, int(num_imsis * 1.4), 12))
+    cell_ids = np.char.add('CELL-', random_digits(rng, num_cells, 4))
+    if phone_numbers is None:
+        phone_numbers = np.char.add('+91', random_digits(rng, 100, 9))
+    phone_numbers = np.asarray(phone_numbers)
+
+    # Random timestamps within the week after start_time (by default, the last week)
+    end_time = start_time + timedelta(days=7) if start_time else datetime.now()
+    start_time = end_time - timedelta(days=7)
+
+    def chunks():
+        for offset in range(0, num_records, CHUNK_RECORDS):
+            size = min(CHUNK_RECORDS, num_records - offset)
+            sources = rng.integers(0, len(phone_numbers), size)
+            yield pd.DataFrame({
+                'timestamp': random_timestamps(rng, size, start_time, end_time),
+                'imsi': imsis[rng.integers(0, len(imsis), size)],
+                'imei': imeis[rng.integers(0, len(imeis), size)],
+                'cell_id': cell_ids[rng.integers(0, len(cell_ids), size)],
+                'source_number': phone_numbers[sources],
+                'destination_number': phone_numbers[distinct_choice(rng, phone_numbers, size, sources)],
+                'call_type': rng.choice(['MOC', 'MTC', 'SMS-MO', 'SMS-MT'], size),
+                'duration': rng.integers(5, 1801, size),
+                'location_area_code': random_digits(rng, size, 3),
+                'signal_strength': rng.integers(-120, -49, size)
+            })
+
+    df = write_chunks(chunks(), output_file, return_data)
     print(f"Generated {num_records} Tower Dump records and saved to {output_file}")
-    return df, cell_ids
+    return df, cell_ids.tolist()
 
 if __name__ == "__main__":
     generate_tdr_data()
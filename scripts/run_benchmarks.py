@@ -0,0 +1,473 @@
+"""Benchmark suite over synthetic CDR, TDR and IPDR datasets
+
+Generates datasets with the scripts/generate_* generators (once per size,
+under data/benchmarks), then times parsing, the analyzers, the correlation
+engine, GeoMapper and NetworkAnalyzer on them. Each benchmark runs in a
+fresh process, so caches and memory left behind by one never affect
+another. Results (seconds, throughput, CPU time, peak memory) are written
+as a JSON baseline that later runs can be compared against:
+
+    python scripts/run_benchmarks.py --sizes 10k,1m --output baseline.json
+    python scripts/run_benchmarks.py --sizes 10k,1m --compare baseline.json --threshold 0.2
+
+With --compare, the exit status is 1 when any benchmark got slower or
+needed more memory than the threshold allows.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Add project root to path to enable absolute imports
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+DATA_DIR = os.path.join('data', 'benchmarks')
+
+# Bump whenever the generated datasets change, so cached ones are regenerated
+DATASET_VERSION = 1
+BASELINE_VERSION = 1
+
+DATA_SEED = 42
+DATA_START = datetime(2024, 1, 1)
+
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_TIMEOUT = 3600
+
+# Changes smaller than these are noise, never regressions
+MIN_SECONDS_DELTA = 0.05
+MIN_MEMORY_DELTA = 16 * 1024 * 1024
+
+# Frame correlation compares every call with every record in its window; larger inputs are capped.
+# The case store path runs indexed queries and always gets the full inputs
+CORRELATION_MAX_ROWS = 10000
+
+
+def _status_kb(field):
+    """A memory field of /proc/self/status in bytes (Linux only), else None"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            match = re.search(rf'^{field}:\s+(\d+) kB', f.read(), re.MULTILINE)
+        return int(match.group(1)) * 1024 if match else None
+    except OSError:
+        return None
+
+
+def _reset_peak_rss():
+    """Reset the process's peak RSS so it measures only what follows (Linux 4.0+)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss():
+    peak = _status_kb('VmHWM')
+    if peak is None:
+        try:
+            import resource
+            # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+        except ImportError:
+            return None
+    return peak
+
+
+def prepare_datasets(label, rows, data_dir=DATA_DIR):
+    """
+    Paths of the CDR, TDR, IPDR and tower location files of one size, generated if missing.
+    CDR and TDR share a pool of phone numbers (one per 100 records), so calls correlate
+    with tower pings and the call graph grows with the data.
+    """
+    from scripts.generate_cdr_data import generate_cdr_data
+    from scripts.generate_ipdr_data import generate_ipdr_data
+    from scripts.generate_tdr_data import generate_tdr_data
+    from scripts.generate_tower_locations import generate_tower_locations
+    from scripts.synthetic import random_digits
+    import numpy as np
+
+    directory = os.path.join(data_dir, label)
+    paths = {name: os.path.join(directory, f'{name}.csv') for name in ('cdr', 'tdr', 'ipdr', 'towers')}
+    manifest_path = os.path.join(directory, 'dataset.json')
+    manifest = {'version': DATASET_VERSION, 'rows': rows, 'seed': DATA_SEED}
+    try:
+        with open(manifest_path, 'r') as f:
+            if json.load(f) == manifest and all(os.path.exists(path) for path in paths.values()):
+                return paths
+    except (OSError, ValueError):
+        pass
+
+    logging.info(f"Generating {label} datasets ({rows} records each) in {directory}")
+    rng = np.random.default_rng(DATA_SEED)
+    phone_numbers = np.char.add('+91', random_digits(rng, max(100, rows // 100), 9))
+    generate_cdr_data(rows, paths['cdr'], seed=DATA_SEED, phone_numbers=phone_numbers,
+                      start_time=DATA_START, return_data=False)
+    _, cell_ids = generate_tdr_data(rows, paths['tdr'], seed=DATA_SEED + 1, phone_numbers=phone_numbers,
+                                    start_time=DATA_START, num_imsis=max(50, rows // 1000),
+                                    num_cells=max(20, rows // 10000), return_data=False)
+    generate_tower_locations(cell_ids, paths['towers'])
+    generate_ipdr_data(rows, paths['ipdr'], seed=DATA_SEED + 2, start_time=DATA_START, return_data=False)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    return paths
+
+
+class BenchmarkData:
+    """Inputs of one dataset size, parsed on first use (outside the timed part)"""
+
+    def __init__(self, paths, work_dir):
+        from forensic_telco_analyzer.session import CaseSession
+        self.paths = paths
+        self.work_dir = work_dir
+        self.session = CaseSession(cdr_file=paths['cdr'], ipdr_file=paths['ipdr'], tdr_file=paths['tdr'])
+        self._registry = None
+
+    @property
+    def cdr(self):
+        return self.session.cdr
+
+    @property
+    def tdr(self):
+        return self.session.tdr
+
+    @property
+    def ipdr(self):
+        return self.session.ipdr
+
+    @property
+    def registry(self):
+        if self._registry is None:
+            from forensic_telco_analyzer.tdr.tower_registry import TowerRegistry
+            self._registry = TowerRegistry.load(self.paths['towers'], use_cache=False)
+        return self._registry
+
+    def busiest_imsis(self, n=1):
+        return self.tdr['imsi'].value_counts().index[:n].tolist()
+
+    def geo_mapper(self):
+        from forensic_telco_analyzer.tdr.geo_mapper import GeoMapper
+        return GeoMapper(self.tdr, registry=self.registry)
+
+    def correlation_engine(self, store=False):
+        """Engine over the case store tables of the full inputs, or over the first CORRELATION_MAX_ROWS rows of each"""
+        from forensic_telco_analyzer.correlation.engine import CorrelationEngine
+        frames = (self.cdr, self.ipdr, self.tdr)
+        if not store:
+            frames = tuple(frame.head(CORRELATION_MAX_ROWS) for frame in frames)
+        cdr, ipdr, tdr = frames
+        engine = CorrelationEngine()
+        engine.load_frames(cdr_data=cdr, ipdr_data=ipdr, tdr_data=tdr)
+        if store:
+            from forensic_telco_analyzer.store import CaseStore
+            case_store = CaseStore(os.path.join(self.work_dir, 'case.sqlite'))
+            for name, frame in (('cdr', cdr), ('ipdr', ipdr), ('tdr', tdr)):
+                case_store.write(name, frame)
+            engine.load_store(case_store)
+        return engine, len(cdr)
+
+    def network_analyzer(self, backend=None):
+        from forensic_telco_analyzer.analysis.network_analysis import NetworkAnalyzer
+        analyzer = NetworkAnalyzer(self.cdr)
+        if backend:
+            analyzer.build_graph(backend=backend)
+        return analyzer
+
+
+def _parse(parser_path, key):
+    def prepare(data):
+        module, name = parser_path.rsplit('.', 1)
+        parser_class = getattr(__import__(module, fromlist=[name]), name)
+        return lambda: parser_class(data.paths[key]).parse(), None
+    return prepare
+
+
+def _analyzer(class_path, key, method, *args):
+    def prepare(data):
+        module, name = class_path.rsplit('.', 1)
+        analyzer_class = getattr(__import__(module, fromlist=[name]), name)
+        frame = getattr(data, key)
+        # Some methods add columns to their frame; each run gets its own copy
+        analyzer = analyzer_class(frame.copy())
+        call_args = [arg(data) if callable(arg) else arg for arg in args]
+        return lambda: getattr(analyzer, method)(*call_args), len(frame)
+    return prepare
+
+
+def _correlation(method, store=False):
+    def prepare(data):
+        engine, rows = data.correlation_engine(store=store)
+        return getattr(engine, method), rows
+    return prepare
+
+
+def _geo(method, *args):
+    def prepare(data):
+        mapper = data.geo_mapper()
+        call_args = [arg(data) if callable(arg) else arg for arg in args]
+        return lambda: getattr(mapper, method)(*call_args), len(data.tdr)
+    return prepare
+
+
+def _load_towers(data):
+    from forensic_telco_analyzer.tdr.tower_registry import TowerRegistry
+    return lambda: TowerRegistry.load(data.paths['towers'], use_cache=False), len(data.registry.cell_ids)
+
+
+def _heatmap_tiles(data):
+    from forensic_telco_analyzer.tdr.heatmap_tiles import build_heatmap_tiles
+    tdr, registry = data.tdr, data.registry
+    output_file = os.path.join(data.work_dir, 'heatmap_tiles.npz')
+    return lambda: build_heatmap_tiles(tdr, registry, output_file), len(tdr)
+
+
+def _network(method, graph='sparse', **kwargs):
+    def prepare(data):
+        # The graph is built untimed, except when building it is what is measured
+        analyzer = data.network_analyzer(backend=None if method == 'build_graph' else graph)
+        return lambda: getattr(analyzer, method)(**kwargs), len(data.cdr)
+    return prepare
+
+
+def _busiest_imsi(data):
+    return data.busiest_imsis(1)[0]
+
+
+def _second_imsi(data):
+    return data.busiest_imsis(2)[-1]
+
+
+# name -> prepare(data) returning (callable timed, rows it processes; None for the dataset size)
+BENCHMARKS = {
+    'parse.cdr': _parse('forensic_telco_analyzer.cdr.parser.CDRParser', 'cdr'),
+    'parse.tdr': _parse('forensic_telco_analyzer.tdr.parser.TDRParser', 'tdr'),
+    'parse.ipdr': _parse('forensic_telco_analyzer.ipdr.parser.IPDRParser', 'ipdr'),
+    'cdr.find_frequent_contacts': _analyzer('forensic_telco_analyzer.cdr.analyzer.CDRAnalyzer', 'cdr',
+                                            'find_frequent_contacts'),
+    'cdr.detect_unusual_patterns': _analyzer('forensic_telco_analyzer.cdr.analyzer.CDRAnalyzer', 'cdr',
+                                             'detect_unusual_patterns'),
+    'ipdr.find_top_talkers': _analyzer('forensic_telco_analyzer.ipdr.analyzer.IPDRAnalyzer', 'ipdr',
+                                       'find_top_talkers'),
+    'ipdr.analyze_protocols': _analyzer('forensic_telco_analyzer.ipdr.analyzer.IPDRAnalyzer', 'ipdr',
+                                        'analyze_protocols'),
+    'ipdr.detect_anomalies': _analyzer('forensic_telco_analyzer.ipdr.analyzer.IPDRAnalyzer', 'ipdr',
+                                       'detect_anomalies'),
+    'tdr.find_common_locations': _analyzer('forensic_telco_analyzer.tdr.analyzer.TDRAnalyzer', 'tdr',
+                                           'find_common_locations', _busiest_imsi),
+    'tdr.find_co_location': _analyzer('forensic_telco_analyzer.tdr.analyzer.TDRAnalyzer', 'tdr',
+                                      'find_co_location', _busiest_imsi, _second_imsi),
+    'correlation.cdr_tdr': _correlation('correlate_cdr_tdr'),
+    'correlation.ipdr_cdr': _correlation('correlate_ipdr_cdr'),
+    'correlation.all': _correlation('correlate_all'),
+    'correlation.store.cdr_tdr': _correlation('correlate_cdr_tdr', store=True),
+    'correlation.store.ipdr_cdr': _correlation('correlate_ipdr_cdr', store=True),
+    'geo.load_tower_locations': _load_towers,
+    'geo.tower_activity': _geo('tower_activity'),
+    'geo.create_heatmap': _geo('create_heatmap'),
+    'geo.build_heatmap_tiles': _heatmap_tiles,
+    'geo.calculate_movement_speed': _geo('calculate_movement_speed', _busiest_imsi),
+    'geo.summarize_visits': _geo('summarize_visits', _busiest_imsi),
+    'geo.create_compact_movement_map': _geo('create_compact_movement_map', _busiest_imsi),
+    'network.build_graph_sparse': _network('build_graph', backend='sparse'),
+    'network.build_graph_networkx': _network('build_graph', backend='networkx'),
+    'network.calculate_centrality': _network('calculate_centrality'),
+    'network.detect_communities': _network('detect_communities'),
+}
+
+
+def run_benchmark(name, rows, paths, repeat, result_file):
+    """Run one benchmark in this (fresh) process and write its result as JSON to result_file"""
+    # Keep library chatter out of the benchmark report
+    logging.basicConfig(level=logging.WARNING)
+    sys.stdout = open(os.devnull, 'w')
+    result = {'status': 'ok'}
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            data = BenchmarkData(paths, work_dir)
+            runs = []
+            for _ in range(repeat):
+                # Setup (parsing inputs, building engines) is not timed
+                func, processed = BENCHMARKS[name](data)
+                exact_peak = _reset_peak_rss()
+                rss_before = _status_kb('VmRSS')
+                wall_start, cpu_start = time.perf_counter(), time.process_time()
+                func()
+                runs.append({
+                    'seconds': time.perf_counter() - wall_start,
+                    'cpu_seconds': time.process_time() - cpu_start,
+                    'peak_rss_bytes': _peak_rss(),
+                    'peak_rss_growth_bytes': (_peak_rss() - rss_before
+                                              if exact_peak and rss_before is not None else None),
+                    'rows': rows if processed is None else processed
+                })
+                del func
+        best = min(runs, key=lambda run: run['seconds'])
+        result.update(best)
+        result['peak_rss_bytes'] = max(run['peak_rss_bytes'] or 0 for run in runs) or None
+        growths = [run['peak_rss_growth_bytes'] for run in runs if run['peak_rss_growth_bytes'] is not None]
+        result['peak_rss_growth_bytes'] = max(growths) if growths else None
+        result['rows_per_second'] = round(best['rows'] / best['seconds']) if best['seconds'] > 0 else None
+        result['repeat'] = repeat
+    except Exception as e:
+        result = {'status': 'failed', 'error': f"{type(e).__name__}: {str(e)}"}
+    with open(result_file, 'w') as f:
+        json.dump(result, f)
+
+
+def _run_isolated(name, rows, paths, repeat, timeout):
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directory:
+        result_file = os.path.join(directory, 'result.json')
+        process = context.Process(target=run_benchmark, args=(name, rows, paths, repeat, result_file))
+        process.start()
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+            return {'status': 'timeout', 'error': f"Exceeded {timeout}s"}
+        try:
+            with open(result_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'status': 'failed', 'error': f"Benchmark process exited with code {process.exitcode}"}
+
+
+def environment():
+    """Machine and library versions a baseline was recorded with"""
+    import numpy as np
+    import pandas as pd
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Regressions of results against a baseline.
+    Returns:
+        list: (key, metric, old, new) for every benchmark slower or hungrier than threshold allows.
+    """
+    regressions = []
+    for key, new in results['results'].items():
+        old = baseline.get('results', {}).get(key)
+        if not old or old.get('status') != 'ok':
+            continue
+        if new.get('status') != 'ok':
+            # A benchmark that used to pass and now fails or times out
+            regressions.append((key, 'status', old['status'], new['status']))
+            continue
+        if (new['seconds'] > old['seconds'] * (1 + threshold) and
+                new['seconds'] - old['seconds'] > MIN_SECONDS_DELTA):
+            regressions.append((key, 'seconds', old['seconds'], new['seconds']))
+        old_memory, new_memory = old.get('peak_rss_growth_bytes'), new.get('peak_rss_growth_bytes')
+        if (old_memory is not None and new_memory is not None and new_memory > old_memory * (1 + threshold)
+                and new_memory - old_memory > MIN_MEMORY_DELTA):
+            regressions.append((key, 'peak_rss_growth_bytes', old_memory, new_memory))
+    return regressions
+
+
+def _format_result(key, result, baseline=None):
+    if result['status'] != 'ok':
+        return f"{key:<45} {result['status']}: {result.get('error', '')}"
+    memory = result.get('peak_rss_growth_bytes')
+    line = (f"{key:<45} {result['seconds']:>10.3f}s {result['rows_per_second'] or 0:>14,} rows/s "
+            f"{'-' if memory is None else f'{memory / 1048576:.1f}MB':>10}")
+    old = (baseline or {}).get('results', {}).get(key)
+    if old and old.get('status') == 'ok' and old['seconds'] > 0:
+        line += f" {100 * (result['seconds'] / old['seconds'] - 1):>+8.1f}%"
+    return line
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Benchmark the toolkit on synthetic data')
+    parser.add_argument('--sizes', default='10k', help=f"Comma-separated dataset sizes: {', '.join(SIZES)} (default: 10k)")
+    parser.add_argument('--only', help='Comma-separated substrings; run only benchmarks whose name contains one')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f'Runs per benchmark; the fastest is kept (default: {DEFAULT_REPEAT})')
+    parser.add_argument('--timeout', type=int, default=DEFAULT_TIMEOUT,
+                        help=f'Seconds before a benchmark is stopped (default: {DEFAULT_TIMEOUT})')
+    parser.add_argument('--data-dir', default=DATA_DIR, help=f'Where generated datasets are kept (default: {DATA_DIR})')
+    parser.add_argument('--output', default=os.path.join(DATA_DIR, 'benchmark_results.json'),
+                        help='Where to write the results JSON (usable as a later baseline)')
+    parser.add_argument('--compare', help='Baseline JSON to compare the results with')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Relative slowdown or memory growth flagged as a regression (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--list', action='store_true', help='List the benchmarks and exit')
+    return parser
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.list:
+        print('\n'.join(BENCHMARKS))
+        return 0
+
+    sizes = [size.strip().lower() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"Unknown sizes: {', '.join(unknown)} (choose from {', '.join(SIZES)})")
+    names = list(BENCHMARKS)
+    if args.only:
+        patterns = [pattern.strip() for pattern in args.only.split(',') if pattern.strip()]
+        names = [name for name in names if any(pattern in name for pattern in patterns)]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        if baseline.get('environment', {}).get('platform') != platform.platform():
+            logging.warning("Baseline was recorded on another machine; timings may not be comparable")
+
+    results = {
+        'version': BASELINE_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'repeat': args.repeat,
+        'results': {}
+    }
+    for size in sizes:
+        paths = prepare_datasets(size, SIZES[size], args.data_dir)
+        for name in names:
+            key = f'{size}/{name}'
+            result = _run_isolated(name, SIZES[size], paths, args.repeat, args.timeout)
+            results['results'][key] = result
+            print(_format_result(key, result, baseline), flush=True)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    logging.info(f"Results saved to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for key, metric, old, new in regressions:
+            if metric == 'status':
+                print(f"REGRESSION {key}: {old} -> {new}")
+            else:
+                print(f"REGRESSION {key}: {metric} {old:.4g} -> {new:.4g} ({100 * (new / old - 1):+.1f}%)")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
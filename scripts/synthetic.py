@@ -0,0 +1,39 @@
+"""Vectorized building blocks of the synthetic data generators"""
+import numpy as np
+import pandas as pd
+
+# Records generated and written at a time, so large datasets never sit in memory whole
+CHUNK_RECORDS = 1_000_000
+
+
+def random_digits(rng, size, width):
+    """Zero-padded random digit strings, like Faker's numerify('#' * width)"""
+    return np.char.zfill(rng.integers(0, 10 ** width, size).astype(str), width)
+
+
+def random_timestamps(rng, size, start_time, end_time):
+    """Uniform random whole-second timestamps between start_time and end_time"""
+    span = max(int((end_time - start_time).total_seconds()), 1)
+    return np.datetime64(start_time.replace(microsecond=0), 's') + rng.integers(0, span, size).astype('timedelta64[s]')
+
+
+def distinct_choice(rng, pool, size, other):
+    """Indices into pool for each row, redrawn where they equal the indices in other"""
+    if len(pool) < 2:
+        raise ValueError(f"Need at least 2 values to draw distinct pairs, got {len(pool)}")
+    picks = rng.integers(0, len(pool), size)
+    same = picks == other
+    while same.any():
+        picks[same] = rng.integers(0, len(pool), same.sum())
+        same = picks == other
+    return picks
+
+
+def write_chunks(chunks, output_file, return_data=True):
+    """Write generated frames to one CSV; the concatenated frame if return_data"""
+    kept = []
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(output_file, index=False, mode='w' if i == 0 else 'a', header=i == 0)
+        if return_data:
+            kept.append(chunk)
+    return pd.concat(kept, ignore_index=True) if return_data and kept else None
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from forensic_telco_analyzer.store import CaseStore
+
+
+def sample_frame():
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(['2024-03-01 10:00', '2024-03-01 09:30', None, '2024-03-02 08:15']),
+        'source_number': ['111', '222', '111', None],
+        'duration': [60, 5, 120, 30],
+        'cell_id': pd.array([7, None, 9, 7], dtype='Int64'),
+        'roaming': [True, False, False, True],
+        'score': [0.5, np.nan, 1.25, 2.0],
+    })
+
+
+def test_round_trip_keeps_values_and_dtypes(tmp_path):
+    frame = sample_frame()
+    store = CaseStore(str(tmp_path / 'case.sqlite'))
+    assert store.write('calls.csv', frame) == 'calls'
+
+    result = store.query('calls.csv')
+    assert list(result.columns) == list(frame.columns)
+    assert result['duration'].dtype == np.int64
+    assert result['cell_id'].dtype == 'Int64'
+    assert result['roaming'].dtype == bool
+    assert result['score'].dtype == float
+    # Datetimes come back at the nanosecond resolution they are stored in, missing text as None
+    expected = frame.assign(timestamp=frame['timestamp'].astype('datetime64[ns]'))
+    pd.testing.assert_frame_equal(result.drop(columns='source_number'), expected.drop(columns='source_number'),
+                                  check_dtype=False)
+    assert result['source_number'].tolist() == ['111', '222', '111', None]
+    assert result['timestamp'].isna().tolist() == [False, False, True, False]
+    assert store.count('calls.csv') == 4
+
+
+def test_filters_and_order_by(tmp_path):
+    store = CaseStore(str(tmp_path / 'case.sqlite'))
+    store.write('calls.csv', sample_frame())
+
+    result = store.query('calls.csv', columns=['source_number', 'duration'],
+                         filters=[('timestamp', '>=', pd.Timestamp('2024-03-01 09:45'))])
+    assert result.to_dict('records') == [{'source_number': '111', 'duration': 60},
+                                         {'source_number': None, 'duration': 30}]
+
+    result = store.query('calls.csv', filters=[('source_number', '=', '111'), ('roaming', '=', False)])
+    assert result['duration'].tolist() == [120]
+    assert store.count('calls.csv', [('duration', 'in', [5, 30])]) == 2
+    assert store.count('calls.csv', [('source_number', 'startswith', '2')]) == 1
+
+    # Missing values sort last in either direction
+    assert store.query('calls.csv', order_by=[('timestamp', True)])['duration'].tolist() == [5, 60, 30, 120]
+    assert store.query('calls.csv', order_by=[('score', False)])['duration'].tolist() == [30, 120, 60, 5]
+    assert store.query('calls.csv', order_by=[('duration', True)], limit=2, offset=1)['duration'].tolist() == [30, 60]
+
+
+def test_freshness_follows_source_file(tmp_path):
+    source = tmp_path / 'calls.csv'
+    frame = sample_frame()
+    frame.to_csv(source, index=False)
+    store = CaseStore(str(tmp_path / 'case.sqlite'))
+    assert store.query('calls.csv') is None
+    assert not store.is_fresh('calls.csv', str(source))
+
+    store.write('calls.csv', frame, source=str(source), tag='window')
+    assert store.is_fresh('calls.csv', str(source), tag='window')
+    assert not store.is_fresh('calls.csv', str(source))
+
+    frame.head(2).to_csv(source, index=False)
+    assert not store.is_fresh('calls.csv', str(source), tag='window')
@@ -0,0 +1,63 @@
+import networkx as nx
+import numpy as np
+import pandas as pd
+from networkx.algorithms.community import modularity as nx_modularity
+
+from forensic_telco_analyzer.analysis.community import louvain_communities, modularity
+from forensic_telco_analyzer.analysis.network_analysis import NetworkAnalyzer
+
+
+def planted_calls(groups=4, size=15, calls=600, crossing=0.05, seed=7):
+    """Calls mostly inside planted groups of numbers, with a few between groups"""
+    rng = np.random.default_rng(seed)
+    group = rng.integers(0, groups, calls)
+    source = group * size + rng.integers(0, size, calls)
+    other = np.where(rng.random(calls) < crossing, rng.integers(0, groups, calls), group)
+    destination = other * size + rng.integers(0, size, calls)
+    keep = source != destination
+    return pd.DataFrame({'source_number': source[keep] + 9100000000,
+                         'destination_number': destination[keep] + 9100000000})
+
+
+def weighted_graph(calls):
+    graph = nx.Graph()
+    for (a, b), count in calls.groupby(['source_number', 'destination_number']).size().items():
+        weight = graph[a][b]['weight'] + count if graph.has_edge(a, b) else count
+        graph.add_edge(a, b, weight=weight)
+    return graph
+
+
+def test_modularity_matches_networkx():
+    calls = planted_calls()
+    analyzer = NetworkAnalyzer(calls)
+    analyzer.build_graph(backend='sparse')
+    graph = weighted_graph(calls)
+
+    for labels in (louvain_communities(analyzer.adjacency),
+                   np.random.default_rng(1).integers(0, 5, len(analyzer.nodes))):
+        partition = [set(analyzer.nodes[labels == label].tolist()) for label in np.unique(labels)]
+        for resolution in (0.5, 1.0, 2.0):
+            expected = nx_modularity(graph, partition, weight='weight', resolution=resolution)
+            assert np.isclose(modularity(analyzer.adjacency, labels, resolution), expected)
+
+
+def test_louvain_recovers_planted_groups():
+    calls = planted_calls()
+    analyzer = NetworkAnalyzer(calls)
+    analyzer.build_graph(backend='sparse')
+    labels = louvain_communities(analyzer.adjacency, seed=42)
+
+    planted = (analyzer.nodes - 9100000000) // 15
+    # Every planted group ends up in one community of its own
+    assert len(np.unique(labels)) == 4
+    for group in range(4):
+        assert len(np.unique(labels[planted == group])) == 1
+
+    reference = nx.algorithms.community.louvain_communities(weighted_graph(calls), weight='weight', seed=42)
+    assert modularity(analyzer.adjacency, labels) >= nx_modularity(weighted_graph(calls), reference) - 1e-9
+
+
+def test_detect_communities_summary():
+    labels_df, summary_df = NetworkAnalyzer(planted_calls()).detect_communities()
+    assert summary_df['Size'].sum() == len(labels_df)
+    assert summary_df['Size'].is_monotonic_decreasing
@@ -0,0 +1,63 @@
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from forensic_telco_analyzer.analysis.graph_index import GraphIndex
+
+
+def random_calls(numbers=200, calls=350, seed=3):
+    """Sparse random calls, so the graph has long paths and several components"""
+    rng = np.random.default_rng(seed)
+    source = rng.integers(0, numbers, calls)
+    destination = rng.integers(0, numbers, calls)
+    keep = source != destination
+    return pd.DataFrame({'source_number': [f'+91{n:09d}' for n in source[keep]],
+                         'destination_number': [f'+91{n:09d}' for n in destination[keep]]})
+
+
+def test_shortest_path_matches_networkx():
+    calls = random_calls()
+    index = GraphIndex.from_frame(calls)
+    graph = nx.from_pandas_edgelist(calls, 'source_number', 'destination_number')
+    nodes = sorted(graph.nodes)
+    rng = np.random.default_rng(0)
+
+    for a, b in rng.choice(nodes, size=(300, 2)):
+        path = index.shortest_path(a, b)
+        if not nx.has_path(graph, a, b):
+            assert path is None
+            continue
+        assert path[0] == a and path[-1] == b
+        assert len(path) - 1 == nx.shortest_path_length(graph, a, b)
+        # Consecutive numbers on the path really called each other
+        assert all(graph.has_edge(u, v) for u, v in zip(path, path[1:]))
+
+
+def test_shortest_path_max_hops():
+    calls = random_calls()
+    index = GraphIndex.from_frame(calls)
+    graph = nx.from_pandas_edgelist(calls, 'source_number', 'destination_number')
+    source = sorted(graph.nodes)[0]
+
+    for target, length in nx.single_source_shortest_path_length(graph, source).items():
+        if length > 1:
+            assert index.shortest_path(source, target, max_hops=length - 1) is None
+            assert len(index.shortest_path(source, target, max_hops=length)) == length + 1
+
+
+def test_k_hop_matches_networkx():
+    calls = random_calls()
+    index = GraphIndex.from_frame(calls)
+    graph = nx.from_pandas_edgelist(calls, 'source_number', 'destination_number')
+
+    for number in sorted(graph.nodes)[:20]:
+        for k in (1, 2, 3):
+            hops = index.k_hop(number, k)
+            expected = nx.single_source_shortest_path_length(graph, number, cutoff=k)
+            assert dict(zip(hops['Node'], hops['Hops'])) == expected
+
+
+def test_neighbors_counts_calls():
+    calls = pd.DataFrame({'source_number': ['a', 'a', 'b', 'c'], 'destination_number': ['b', 'b', 'a', 'a']})
+    neighbors = GraphIndex.from_frame(calls).neighbors('a')
+    assert neighbors.to_dict('list') == {'Node': ['b', 'c'], 'Calls': [3, 1]}
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from forensic_telco_analyzer.analysis.incremental_centrality import IncrementalCentrality
+
+
+def random_calls(numbers, calls, seed):
+    rng = np.random.default_rng(seed)
+    source = rng.integers(0, numbers, calls)
+    destination = rng.integers(0, numbers, calls)
+    keep = source != destination
+    return pd.DataFrame({'source_number': [f'+91{n:09d}' for n in source[keep]],
+                         'destination_number': [f'+91{n:09d}' for n in destination[keep]]})
+
+
+def assert_same_scores(updated, rebuilt):
+    merged = updated.to_frame().merge(rebuilt.to_frame(), on='Node', suffixes=('_updated', '_rebuilt'))
+    assert len(merged) == len(rebuilt.nodes) == len(updated.nodes)
+    for column in ('Degree Centrality', 'Betweenness Centrality'):
+        assert np.allclose(merged[f'{column}_updated'], merged[f'{column}_rebuilt'])
+    # PageRank restarts from the previous vector; both stop once an iteration moves less than n * 1e-6
+    difference = (merged['PageRank_updated'] - merged['PageRank_rebuilt']).abs().sum()
+    assert difference < 10 * len(merged) * 1e-6
+
+
+def test_update_matches_full_rebuild():
+    calls = random_calls(numbers=120, calls=300, seed=1)
+    state = IncrementalCentrality.from_frame(calls.iloc[:200])
+
+    # Batches of repeated contacts, new contacts and new numbers
+    for start, end in ((200, 230), (230, len(calls))):
+        state.update(calls.iloc[start:end])
+    state.update(random_calls(numbers=150, calls=40, seed=2))
+
+    everything = pd.concat([calls, random_calls(numbers=150, calls=40, seed=2)], ignore_index=True)
+    assert_same_scores(state, IncrementalCentrality.from_frame(everything))
+
+
+def test_update_with_known_contacts_only():
+    calls = random_calls(numbers=60, calls=200, seed=4)
+    state = IncrementalCentrality.from_frame(calls)
+    stats = state.update(calls.iloc[:50])
+
+    assert stats['new_numbers'] == 0 and stats['new_contacts'] == 0
+    assert_same_scores(state, IncrementalCentrality.from_frame(pd.concat([calls, calls.iloc[:50]])))
+
+
+def test_frame_delta_after_append():
+    calls = random_calls(numbers=60, calls=200, seed=5)
+    state = IncrementalCentrality.from_frame(calls.iloc[:120])
+
+    delta = state.frame_delta(calls)
+    assert delta is not None and len(delta) == len(calls) - 120
+    # A rewritten frame is not treated as an append
+    assert state.frame_delta(calls.iloc[::-1].reset_index(drop=True)) is None
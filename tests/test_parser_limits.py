@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from forensic_telco_analyzer.cdr.parser import CDRParser
+from forensic_telco_analyzer.utils import parser_base
+
+
+@pytest.fixture
+def cdr_file(tmp_path, monkeypatch):
+    # Small chunks and row groups, so limits cross chunk and row-group boundaries
+    monkeypatch.setattr(parser_base, 'CHUNK_ROWS', 40)
+    monkeypatch.setattr(parser_base, 'ROW_GROUP_ROWS', 25)
+    rng = np.random.default_rng(3)
+    rows = 200
+    durations = rng.integers(1, 600, rows).astype(float)
+    # Missing durations only after the first chunk, whose types the columnar cache adopts
+    durations[[150, 170]] = np.nan
+    frame = pd.DataFrame({
+        'Source Number': rng.choice(['111', '222', '333', '444'], rows),
+        'Destination Number': rng.choice(['555', '666', '777'], rows),
+        'timestamp': pd.date_range('2024-03-01', periods=rows, freq='h').astype(str),
+        'Duration': durations,
+    })
+    frame['Duration'] = frame['Duration'].astype('Int64')
+    path = tmp_path / 'cdr.csv'
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+def expected(path, start=None, end=None, subscribers=None):
+    """Full parse, then the limits applied to the whole frame"""
+    data = CDRParser(path).parse()
+    times = pd.to_datetime(data['timestamp'])
+    mask = pd.Series(True, index=data.index)
+    if start is not None:
+        mask &= times >= pd.Timestamp(start)
+    if end is not None:
+        mask &= times < pd.Timestamp(end)
+    if subscribers is not None:
+        mask &= data['source_number'].astype(str).isin(subscribers) | \
+            data['destination_number'].astype(str).isin(subscribers)
+    return data[mask].reset_index(drop=True)
+
+
+def same_rows(result, wanted):
+    # Integer columns read in pieces are only float where the rows kept include missing values
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), wanted, check_dtype=False)
+
+
+LIMITS = [
+    {'start': '2024-03-03', 'end': '2024-03-06'},
+    {'subscribers': ['222', '777']},
+    {'start': '2024-03-02 12:00', 'subscribers': ['111']},
+    {'start': '2025-01-01'},
+]
+
+
+@pytest.mark.parametrize('limits', LIMITS)
+def test_chunked_read_matches_full_parse(cdr_file, limits):
+    same_rows(CDRParser(cdr_file, **limits).parse(), expected(cdr_file, **limits))
+
+
+@pytest.mark.parametrize('limits', LIMITS)
+def test_columnar_cache_matches_full_parse(cdr_file, tmp_path, limits):
+    pytest.importorskip('pyarrow')
+    cache_dir = str(tmp_path / 'cache')
+    # Written on the first read, reused on the second
+    for _ in range(2):
+        same_rows(CDRParser(cdr_file, cache_dir=cache_dir, **limits).parse(), expected(cdr_file, **limits))
+
+
+def test_columnar_cache_is_chunked_and_skips_row_groups(cdr_file, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    cache_dir = str(tmp_path / 'cache')
+    parser = CDRParser(cdr_file, cache_dir=cache_dir, start='2024-03-03', end='2024-03-04')
+    parser.parse()
+    metadata = pq.ParquetFile(parser._cache_path()).metadata
+    assert metadata.num_rows == 200
+    assert metadata.num_row_groups == 10
+    assert pq.read_schema(parser._cache_path()).field('Duration').type == 'int64'
+
+
+def test_requested_columns(cdr_file):
+    data = CDRParser(cdr_file, columns=['destination_number'], subscribers=['111']).parse()
+    assert list(data.columns) == ['destination_number']
+    assert len(data) == len(expected(cdr_file, subscribers=['111']))
@@ -0,0 +1,81 @@
+import pandas as pd
+
+from forensic_telco_analyzer.pipeline import Pipeline
+from forensic_telco_analyzer.session import CaseSession
+
+
+def build(tmp_path, calls, force=False, fail=False):
+    """Two-stage pipeline: counts per number from the input file, then a total from the counts"""
+    session = CaseSession(output_dir=str(tmp_path))
+    pipeline = Pipeline(session, workers=2, force=force)
+
+    def count(session, path):
+        if fail:
+            raise RuntimeError('transient failure')
+        calls.append('count')
+        counts = pd.read_csv(path)['number'].value_counts().rename_axis('number').reset_index()
+        session.put('counts.csv', counts)
+
+    def total(session):
+        calls.append('total')
+        session.put('total.csv', pd.DataFrame({'total': [session.get('counts.csv')['count'].sum()]}))
+
+    source = tmp_path / 'input.csv'
+    pipeline.add('count', count, files=[str(source)], outputs=['counts.csv'], params={'path': str(source)})
+    pipeline.add('total', total, inputs=['counts.csv'], outputs=['total.csv'])
+    return pipeline
+
+
+def write_input(tmp_path, numbers):
+    pd.DataFrame({'number': numbers}).to_csv(tmp_path / 'input.csv', index=False)
+
+
+def test_unchanged_inputs_are_skipped(tmp_path):
+    write_input(tmp_path, ['a', 'b', 'a'])
+    calls = []
+    assert build(tmp_path, calls).run() == {'count': 'ran', 'total': 'ran'}
+    assert build(tmp_path, calls).run() == {'count': 'skipped', 'total': 'skipped'}
+    assert calls == ['count', 'total']
+
+    assert build(tmp_path, calls, force=True).run() == {'count': 'ran', 'total': 'ran'}
+
+
+def test_changed_input_reruns_dependents(tmp_path):
+    write_input(tmp_path, ['a', 'b', 'a'])
+    build(tmp_path, []).run()
+
+    write_input(tmp_path, ['a', 'b', 'c'])
+    calls = []
+    assert build(tmp_path, calls).run() == {'count': 'ran', 'total': 'ran'}
+    assert pd.read_csv(tmp_path / 'total.csv')['total'].tolist() == [3]
+
+
+def test_edited_output_reruns_its_stage(tmp_path):
+    write_input(tmp_path, ['a', 'b', 'a'])
+    build(tmp_path, []).run()
+
+    (tmp_path / 'total.csv').write_text('total\n0\n')
+    assert build(tmp_path, []).run() == {'count': 'skipped', 'total': 'ran'}
+
+
+def test_failure_blocks_dependents_and_is_not_recorded(tmp_path):
+    write_input(tmp_path, ['a', 'b', 'a'])
+    assert build(tmp_path, [], fail=True).run() == {'count': 'failed', 'total': 'blocked'}
+
+    calls = []
+    assert build(tmp_path, calls).run() == {'count': 'ran', 'total': 'ran'}
+    assert calls == ['count', 'total']
+
+
+def test_stage_without_outputs_is_retried(tmp_path):
+    write_input(tmp_path, ['a'])
+    session = CaseSession(output_dir=str(tmp_path))
+    calls = []
+
+    for _ in range(2):
+        pipeline = Pipeline(session)
+        # Logs its own error and returns normally, writing nothing
+        pipeline.add('quiet', lambda session: calls.append('quiet'), files=[str(tmp_path / 'input.csv')],
+                     outputs=['quiet.csv'])
+        assert pipeline.run() == {'quiet': 'ran'}
+    assert calls == ['quiet', 'quiet']
@@ -0,0 +1,61 @@
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from forensic_telco_analyzer.analysis.network_analysis import NetworkAnalyzer
+from forensic_telco_analyzer.analysis.sparse_centrality import (betweenness_centrality, degree_centrality,
+                                                                pagerank)
+
+
+def small_graph(seed=11):
+    """Weighted graph with a self-loop, a separate component and an isolated node"""
+    rng = np.random.default_rng(seed)
+    graph = nx.gnm_random_graph(40, 90, seed=seed)
+    graph.add_edges_from([(40, 41), (41, 42)])
+    graph.add_node(43)
+    graph.add_edge(5, 5)
+    for a, b in graph.edges:
+        graph[a][b]['weight'] = int(rng.integers(1, 6))
+    nodes = list(graph.nodes)
+    return graph, nodes, nx.to_scipy_sparse_array(graph, nodelist=nodes, weight='weight', format='csr')
+
+
+def as_array(scores, nodes):
+    return np.array([scores[node] for node in nodes])
+
+
+def test_scores_match_networkx():
+    graph, nodes, adjacency = small_graph()
+
+    scores, iterations = pagerank(adjacency, tol=1e-12, max_iter=500)
+    expected = as_array(nx.pagerank(graph, weight='weight', tol=1e-12, max_iter=500), nodes)
+    assert iterations > 0
+    assert np.abs(scores - expected).max() < 1e-10
+
+    assert np.abs(degree_centrality(adjacency) - as_array(nx.degree_centrality(graph), nodes)).max() < 1e-12
+    exact = betweenness_centrality(adjacency, workers=1)
+    assert np.abs(exact - as_array(nx.betweenness_centrality(graph), nodes)).max() < 1e-12
+
+
+def test_parallel_pivots_match_serial():
+    _, _, adjacency = small_graph()
+    # Small batches, so the pivots are split across both workers
+    serial = betweenness_centrality(adjacency, k=30, seed=3, workers=1, batch_size=4)
+    parallel = betweenness_centrality(adjacency, k=30, seed=3, workers=2, batch_size=4)
+    np.testing.assert_allclose(parallel, serial, rtol=0, atol=1e-12)
+    assert not np.allclose(serial, betweenness_centrality(adjacency, workers=1))
+
+
+def test_sparse_backend_matches_networkx_backend():
+    graph, _, _ = small_graph()
+    calls = pd.DataFrame([(a, b) for a, b, weight in graph.edges(data='weight') for _ in range(weight)],
+                         columns=['source_number', 'destination_number'])
+    sparse_df = NetworkAnalyzer(calls).calculate_centrality(backend='sparse').set_index('Node')
+    analyzer = NetworkAnalyzer(calls)
+    analyzer.build_graph()
+    networkx_df = analyzer.calculate_centrality(backend='networkx').set_index('Node')
+    networkx_df = networkx_df.loc[sparse_df.index]
+    for column in ('Degree Centrality', 'Betweenness Centrality'):
+        np.testing.assert_allclose(sparse_df[column], networkx_df[column], atol=1e-12)
+    # Both stop at networkx's default tolerance of n * 1e-6 in L1
+    assert np.abs(sparse_df['PageRank'] - networkx_df['PageRank']).sum() < 10 * len(sparse_df) * 1e-6
@@ -0,0 +1,51 @@
+import os
+
+import pandas as pd
+
+from forensic_telco_analyzer.dashboard.data_access import DatasetCache
+from forensic_telco_analyzer.dashboard.tables import (JOB_RESULTS_DIR, PROCESSED_DIR, TableViews, server_table,
+                                                      table_path)
+
+
+def job_table(job_id, numbers):
+    """Centrality table written by one network job, as build_network_view writes it"""
+    os.makedirs(JOB_RESULTS_DIR, exist_ok=True)
+    frame = pd.DataFrame({'Node': numbers, 'Degree': range(len(numbers))})
+    path = os.path.join(JOB_RESULTS_DIR, f'{job_id}_centrality_measures.csv')
+    frame.to_csv(path, index=False)
+    return path, frame
+
+
+def test_concurrent_job_tables_page_their_own_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first_path, first = job_table('a1', [f'1{i:03d}' for i in range(45)])
+    second_path, second = job_table('b2', [f'2{i:03d}' for i in range(30)])
+    # The CLI artifact of the same name is neither overwritten nor served for job tables
+    pd.DataFrame({'Node': ['cli'], 'Degree': [0]}).to_csv(os.path.join(PROCESSED_DIR, 'centrality_measures.csv'),
+                                                          index=False)
+
+    first_id = server_table(first_path, first, page_size=20).id['index']
+    second_id = server_table(second_path, second, page_size=20).id['index']
+    assert first_id != second_id
+    assert table_path(first_id) == first_path
+
+    views = TableViews(DatasetCache())
+    # Pages of the two views interleave as two analysts page through them
+    for page in range(3):
+        records, page_count = views.page(first_id, page, 20)
+        assert page_count == 3
+        assert [r['Node'] for r in records] == first['Node'].astype(int).tolist()[page * 20:(page + 1) * 20]
+        records, page_count = views.page(second_id, page, 20, sort_by=[{'column_id': 'Degree', 'direction': 'desc'}])
+        assert page_count == 2
+        expected = second['Node'].astype(int).tolist()[::-1][min(page, 1) * 20:(min(page, 1) + 1) * 20]
+        assert [r['Node'] for r in records] == expected
+
+    records, _ = views.page('centrality_measures.csv', 0, 20)
+    assert [r['Node'] for r in records] == ['cli']
+
+
+def test_table_paths_stay_in_processed_directories():
+    assert table_path('../../etc/passwd') == os.path.join(PROCESSED_DIR, 'passwd')
+    assert table_path('job_results/../../secret.csv') == os.path.join(PROCESSED_DIR, 'secret.csv')
+    assert table_path('job_results/x_centrality_measures.csv') == \
+        os.path.join(PROCESSED_DIR, 'job_results', 'x_centrality_measures.csv')
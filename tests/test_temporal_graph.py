@@ -0,0 +1,107 @@
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pytest
+
+from forensic_telco_analyzer.analysis.temporal_graph import TemporalGraph
+from forensic_telco_analyzer.session import CaseSession
+from forensic_telco_analyzer.stages.temporal import process_temporal_analysis
+
+
+def dated_calls(days=8, calls_per_day=40, seed=5):
+    """Calls among a growing set of numbers, so later days bring contacts never seen before"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for day in range(days):
+        pool = [f'9{i:03d}' for i in range(6 + 2 * day)]
+        for _ in range(calls_per_day):
+            a, b = rng.choice(pool, 2, replace=False)
+            stamp = pd.Timestamp('2024-03-04') + pd.Timedelta(days=day, minutes=int(rng.integers(0, 1440)))
+            rows.append({'source_number': a, 'destination_number': b, 'timestamp': stamp})
+    return pd.DataFrame(rows)
+
+
+def slice_graph(calls, periods):
+    """networkx graph of the calls in some daily periods, weighted by call count"""
+    rows = calls[calls['timestamp'].dt.to_period('D').isin(periods)]
+    graph = nx.Graph()
+    for a, b in zip(rows['source_number'], rows['destination_number']):
+        weight = graph[a][b]['weight'] + 1 if graph.has_edge(a, b) else 1
+        graph.add_edge(a, b, weight=weight)
+    return graph, len(rows)
+
+
+def test_rolling_windows_match_rebuilt_graphs():
+    calls = dated_calls()
+    temporal = TemporalGraph(calls, slice_freq='D')
+    assert len(temporal) == 8
+
+    windows = list(temporal.rolling(window=3))
+    assert len(windows) == 6
+    for start, end, adjacency in windows:
+        graph, _ = slice_graph(calls, pd.period_range(start, end, freq='D'))
+        index = {node: i for i, node in enumerate(temporal.nodes)}
+        rows, cols = adjacency.nonzero()
+        edges = {(temporal.nodes[r], temporal.nodes[c]): adjacency[r, c] for r, c in zip(rows, cols) if r < c}
+        expected = {tuple(sorted((a, b), key=index.get)): d['weight'] for a, b, d in graph.edges(data=True)}
+        assert edges == expected
+
+
+def test_rolling_centrality_matches_networkx_per_window():
+    calls = dated_calls()
+    temporal = TemporalGraph(calls, slice_freq='D')
+    summary, rankings = temporal.rolling_centrality(window=3, top_n=5)
+    assert len(summary) == 6
+
+    for window in summary.itertuples(index=False):
+        periods = pd.period_range(window[0], window[1], freq='D')
+        graph, call_count = slice_graph(calls, periods)
+        assert window.Nodes == graph.number_of_nodes()
+        assert window.Edges == graph.number_of_edges()
+        assert window.Calls == call_count
+
+        expected = nx.pagerank(graph, alpha=0.85, weight='weight', tol=1e-10)
+        top = rankings[rankings['Window End'] == window[1]]
+        assert top['Rank'].tolist() == [1, 2, 3, 4, 5]
+        assert set(top['Node']) == set(sorted(expected, key=expected.get, reverse=True)[:5])
+        for node, score, contacts in zip(top['Node'], top['PageRank'], top['Contacts']):
+            assert score == pytest.approx(expected[node], abs=1e-5)
+            assert contacts == graph.degree(node)
+
+    # Ranks carry over between windows
+    later = rankings[rankings['Window End'] == summary['Window End'].iloc[-1]].dropna(subset=['Previous Rank'])
+    assert (later['Rank Change'] == later['Previous Rank'] - later['Rank']).all()
+
+
+def test_new_contacts_are_reported_in_their_first_slice():
+    calls = dated_calls()
+    temporal = TemporalGraph(calls, slice_freq='D')
+    new = temporal.new_contacts()
+
+    pairs = calls.assign(
+        a=calls[['source_number', 'destination_number']].min(axis=1),
+        b=calls[['source_number', 'destination_number']].max(axis=1),
+        period=calls['timestamp'].dt.to_period('D').astype(str))
+    first = pairs.groupby(['a', 'b'])['period'].min()
+    reported = {tuple(sorted((a, b))): period for a, b, period in zip(new['Number A'], new['Number B'], new['Period'])}
+    assert reported == first.to_dict()
+    # Numbers that only join the pool later have contacts first seen after the first slice
+    assert (new['Period'] > new['Period'].min()).any()
+
+    summary, _ = temporal.rolling_centrality(window=3)
+    per_period = new.groupby('Period').size()
+    assert summary['New Contacts'].iloc[0] == per_period.iloc[:3].sum()
+    assert summary['New Contacts'].iloc[1:].tolist() == per_period.iloc[3:].tolist()
+
+
+def test_temporal_stage_writes_its_outputs(tmp_path):
+    calls = dated_calls(days=4)
+    session = CaseSession(output_dir=str(tmp_path))
+    session.put('correlated_data.csv', calls)
+    process_temporal_analysis(session, 'correlated_data.csv', slice_freq='D', window=2)
+    assert len(pd.read_csv(tmp_path / 'temporal_windows.csv')) == 3
+    assert len(pd.read_csv(tmp_path / 'new_contacts.csv')) == len(TemporalGraph(calls, slice_freq='D').new_contacts())
+    assert not pd.read_csv(tmp_path / 'temporal_rankings.csv').empty
+
+    with pytest.raises(FileNotFoundError):
+        process_temporal_analysis(session, 'missing.csv')